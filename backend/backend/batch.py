@@ -0,0 +1,100 @@
+"""
+Despacho interno de varias peticiones GET dentro de una sola petición HTTP.
+
+Cada sub-petición se arma a partir de la petición original cambiando la ruta
+y la query string, y se resuelve con el URLconf del proyecto. Conserva las
+cabeceras originales, incluida Authorization, así que DRF autentica cada
+sub-petición con el mismo token que el lote. Las cabeceras condicionales no
+se copian: iban dirigidas al lote, no a cada sub-petición.
+"""
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+
+logger = logging.getLogger(__name__)
+
+CABECERAS_EXCLUIDAS = {
+    'CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_CONTENT_LENGTH', 'HTTP_CONTENT_TYPE',
+    # Un 304 vacío dentro de un lote 200 no le sirve al cliente
+    'HTTP_IF_NONE_MATCH', 'HTTP_IF_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_UNMODIFIED_SINCE', 'HTTP_IF_RANGE',
+    'HTTP_RANGE',
+}
+
+
+def _sub_peticion(request, url):
+    partes = urlsplit(url)
+    environ = {clave: valor for clave, valor in request.META.items() if clave not in CABECERAS_EXCLUIDAS}
+    environ.update({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': partes.path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': partes.query,
+        'wsgi.input': io.BytesIO(b''),
+    })
+    return WSGIRequest(environ)
+
+
+def _cuerpo(response):
+    contenido = response.content
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(contenido or b'null')
+    return contenido.decode(response.charset or 'utf-8', errors='replace')
+
+
+def ejecutar(request, url):
+    """
+    Ejecuta una sub-petición GET y devuelve {'status', 'body'}.
+
+    Solo se aceptan rutas de la API; las respuestas por streaming (descargas de
+    archivos) no caben en un lote y se rechazan. Un error inesperado en una
+    sub-petición se devuelve como un 500 de esa entrada, no del lote.
+    """
+    if not isinstance(url, str) or not url.startswith('/api/') or urlsplit(url).path == '/api/batch/':
+        return {'status': 400, 'body': {'error': 'Solo se permiten rutas GET de /api/ (excepto /api/batch/).'}}
+    try:
+        match = resolve(urlsplit(url).path)
+    except Resolver404:
+        return {'status': 404, 'body': {'error': 'Ruta no encontrada.'}}
+
+    sub = _sub_peticion(request, url)
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    except Exception:
+        logger.exception('Error en la sub-petición %s del lote', url)
+        return {'status': 500, 'body': {'error': 'Error interno del servidor.'}}
+    if response.streaming:
+        return {'status': 400, 'body': {'error': 'Las respuestas por streaming no se pueden agrupar.'}}
+    return {'status': response.status_code, 'body': _cuerpo(response)}
+
+
+def _ejecutar_grupo(request, urls):
+    try:
+        return [ejecutar(request, url) for url in urls]
+    finally:
+        # Cada hilo del pool abre su propia conexión: se cierra al terminar su grupo
+        connections.close_all()
+
+
+def ejecutar_lote(request, urls):
+    """Ejecuta las sub-peticiones (en paralelo si BATCH_MAX_WORKERS > 1) conservando su orden."""
+    trabajadores = min(getattr(settings, 'BATCH_MAX_WORKERS', 1), len(urls))
+    if trabajadores <= 1:
+        return [ejecutar(request, url) for url in urls]
+    grupos = [urls[i::trabajadores] for i in range(trabajadores)]
+    with ThreadPoolExecutor(max_workers=trabajadores) as pool:
+        resultados = list(pool.map(lambda grupo: _ejecutar_grupo(request, grupo), grupos))
+    ordenados = [None] * len(urls)
+    for i, grupo in enumerate(resultados):
+        ordenados[i::trabajadores] = grupo
+    return ordenados
@@ -0,0 +1,218 @@
+"""
+Registro de métricas operativas en formato de texto de Prometheus.
+
+Implementación ligera y sin dependencias externas: contadores, gauges e
+histogramas con etiquetas, protegidos por un lock para poder usarse desde
+varios hilos del servidor. Cada proceso mantiene su propio registro, por lo
+que con varios workers el scraper debe consultar cada proceso por separado.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+# Buckets por defecto pensados para latencias de una API (en segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pares = list(zip(labelnames, labelvalues))
+    if extra:
+        pares.extend(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pares) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    tipo = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"La métrica '{self.name}' requiere las etiquetas {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.tipo}',
+        ]
+        for suffix, labelvalues, extra, value in self.samples():
+            labels = _format_labels(self.labelnames, labelvalues, extra)
+            lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    tipo = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [('', key, None, value) for key, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    tipo = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        """
+        Calcula el valor en el momento del scrape. La función devuelve un
+        número (gauge sin etiquetas) o un diccionario {tupla_de_etiquetas: valor}.
+        """
+        self._function = function
+
+    def samples(self):
+        if self._function is not None:
+            result = self._function()
+            if not isinstance(result, dict):
+                result = {(): result}
+            return [('', key, None, value) for key, value in sorted(result.items())]
+        with self._lock:
+            return [('', key, None, value) for key, value in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    tipo = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels):
+        """Decorador que registra la duración de cada llamada a la función."""
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    result.append(('_bucket', key, [('le', _format_value(float(bound)))], count))
+                result.append(('_sum', key, None, total))
+                result.append(('_count', key, None, counts[-1]))
+        return result
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                return self._metrics[metric.name]
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds',
+    'Latencia de las peticiones HTTP por vista.',
+    ('view', 'method', 'status'),
+)
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    'db_queries_per_request',
+    'Número de consultas SQL ejecutadas por petición.',
+    ('view',),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 250, 500, 1000),
+)
+DB_QUERIES = REGISTRY.counter(
+    'db_queries_total',
+    'Consultas SQL ejecutadas.',
+    ('view',),
+)
+EMAIL_SEND_SECONDS = REGISTRY.histogram(
+    'email_send_duration_seconds',
+    'Duración del envío de correos de notificación.',
+)
+EMAIL_SEND_FAILURES = REGISTRY.counter(
+    'email_send_failures_total',
+    'Correos de notificación que no pudieron enviarse.',
+)
+REPORT_RENDER_SECONDS = REGISTRY.histogram(
+    'report_render_duration_seconds',
+    'Tiempo de generación de los reportes.',
+    ('report',),
+)
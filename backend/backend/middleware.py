@@ -0,0 +1,187 @@
+import cProfile
+import gzip
+import re
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import profiling
+from .metrics import HTTP_REQUEST_SECONDS, DB_QUERIES_PER_REQUEST, DB_QUERIES
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+
+def nombre_de_vista(request):
+    """Etiqueta de baja cardinalidad para la vista que atendió la petición."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'sin_resolver'
+    if match.url_name:
+        return match.view_name
+    # Ruta sin nombre: módulo y clase (o función) de la vista
+    vista = getattr(match.func, 'view_class', match.func)
+    return f'{vista.__module__}.{vista.__qualname__}'
+
+
+class MetricsMiddleware:
+    """
+    Registra la latencia y el número de consultas SQL de cada petición.
+    Debe ir al principio de MIDDLEWARE para medir la petición completa.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        consultas = [0]
+
+        def contar_consultas(execute, sql, params, many, context):
+            consultas[0] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(contar_consultas):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        view = nombre_de_vista(request)
+        HTTP_REQUEST_SECONDS.observe(duration, view=view, method=request.method, status=response.status_code)
+        DB_QUERIES_PER_REQUEST.observe(consultas[0], view=view)
+        DB_QUERIES.inc(consultas[0], view=view)
+        return response
+
+
+def codificaciones_aceptadas(cabecera):
+    """Codificaciones de Accept-Encoding con q > 0 ('gzip;q=0' las excluye)."""
+    aceptadas = set()
+    for parte in cabecera.split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        match = re.search(r'q=([0-9.]+)', parametros)
+        try:
+            calidad = float(match.group(1)) if match else 1.0
+        except ValueError:
+            calidad = 0.0
+        if nombre and calidad > 0:
+            aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+class CompressionMiddleware:
+    """
+    Comprime con brotli (si está instalado) o gzip las respuestas que superen
+    COMPRESSION_MIN_BYTES, según lo que acepte el cliente. Las respuestas por
+    streaming (descargas de respaldos y PDFs) y las que ya vienen codificadas
+    se dejan tal cual.
+    """
+    TIPOS = ('application/json', 'text/', 'application/javascript', 'image/svg+xml')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.streaming or response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(self.TIPOS)):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < getattr(settings, 'COMPRESSION_MIN_BYTES', 1024):
+            return response
+
+        aceptadas = codificaciones_aceptadas(request.headers.get('Accept-Encoding', ''))
+        if brotli is not None and 'br' in aceptadas:
+            codificacion, contenido = 'br', brotli.compress(response.content, quality=getattr(settings, 'BROTLI_QUALITY', 5))
+        elif 'gzip' in aceptadas:
+            codificacion, contenido = 'gzip', gzip.compress(response.content, compresslevel=6, mtime=0)
+        else:
+            return response
+        if len(contenido) >= len(response.content):
+            return response
+
+        response.content = contenido
+        response['Content-Length'] = str(len(contenido))
+        response['Content-Encoding'] = codificacion
+        # El cuerpo cambia de bytes: un ETag fuerte ya no lo identifica
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Perfilado opcional de una petición para usuarios staff.
+
+    Se activa con la cabecera X-Profile: 1 o con el parámetro ?_profile=1. La
+    vista se ejecuta bajo cProfile, se registra su SQL y el resultado se guarda
+    con backend.profiling; la respuesta incluye X-Profile-URL con el enlace al
+    perfil. Para cualquier otra petición el costo es solo revisar la bandera.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.solicitado(request):
+            return self.get_response(request)
+        user = self.usuario_staff(request)
+        if user is None:
+            return self.get_response(request)
+
+        consultas = []
+
+        def registrar_sql(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                consultas.append({'sql': sql, 'duracion_ms': round((time.perf_counter() - inicio) * 1000, 3)})
+
+        profiler = cProfile.Profile()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(registrar_sql):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duracion = time.perf_counter() - inicio
+
+        perfil_id = profiling.guardar(profiler, {
+            'metodo': request.method,
+            'ruta': request.get_full_path(),
+            'vista': nombre_de_vista(request),
+            'usuario': user.get_username(),
+            'estado': response.status_code,
+            'duracion_ms': round(duracion * 1000, 3),
+            'num_consultas': len(consultas),
+            'tiempo_sql_ms': round(sum(c['duracion_ms'] for c in consultas), 3),
+            'sql': consultas,
+        })
+        response['X-Profile-Id'] = perfil_id
+        response['X-Profile-URL'] = request.build_absolute_uri(reverse('profile-detail', args=[perfil_id]))
+        return response
+
+    @staticmethod
+    def solicitado(request):
+        return request.headers.get('X-Profile') == '1' or request.GET.get('_profile') == '1'
+
+    @staticmethod
+    def usuario_staff(request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            # La API se autentica con JWT dentro de DRF; aquí se decodifica el token solo
+            # cuando se pidió un perfil
+            try:
+                resultado = JWTAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                return None
+            user = resultado[0] if resultado else None
+        return user if user is not None and user.is_staff else None
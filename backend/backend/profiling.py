@@ -0,0 +1,92 @@
+"""
+Almacenamiento de perfiles de peticiones en un buffer circular en disco.
+
+Cada perfil se guarda como dos archivos en PROFILER_DIR: el volcado de
+cProfile (<id>.prof, legible con pstats o snakeviz) y un JSON con los datos
+de la petición y su registro de SQL (<id>.json). Al superar
+PROFILER_MAX_ENTRIES se eliminan los perfiles más antiguos.
+"""
+import io
+import json
+import pstats
+import re
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+
+ID_PATTERN = re.compile(r'^[0-9]{8}T[0-9]{12}-[0-9a-f]{8}$')
+
+
+def directorio():
+    ruta = Path(getattr(settings, 'PROFILER_DIR', settings.BASE_DIR / 'profiles'))
+    ruta.mkdir(parents=True, exist_ok=True)
+    return ruta
+
+
+def guardar(profiler, meta):
+    """
+    Guarda un perfil y devuelve su identificador.
+
+    Args:
+        profiler (cProfile.Profile): Perfil ya detenido.
+        meta (dict): Datos de la petición (ruta, usuario, duración, consultas SQL...).
+
+    Returns:
+        str: Identificador del perfil.
+    """
+    perfil_id = f"{timezone.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+    ruta = directorio()
+    profiler.dump_stats(str(ruta / f'{perfil_id}.prof'))
+    (ruta / f'{perfil_id}.json').write_text(json.dumps({'id': perfil_id, **meta}, default=str))
+    _recortar(ruta)
+    return perfil_id
+
+
+def _recortar(ruta):
+    maximo = getattr(settings, 'PROFILER_MAX_ENTRIES', 50)
+    perfiles = sorted(ruta.glob('*.json'))
+    for antiguo in perfiles[:max(0, len(perfiles) - maximo)]:
+        antiguo.unlink(missing_ok=True)
+        antiguo.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def listar():
+    perfiles = []
+    for archivo in sorted(directorio().glob('*.json'), reverse=True):
+        try:
+            meta = json.loads(archivo.read_text())
+        except FileNotFoundError:
+            # Otro proceso lo sacó del buffer entre el glob y la lectura
+            continue
+        meta.pop('sql', None)
+        perfiles.append(meta)
+    return perfiles
+
+
+def ruta_prof(perfil_id):
+    if not ID_PATTERN.match(perfil_id):
+        return None
+    ruta = directorio() / f'{perfil_id}.prof'
+    return ruta if ruta.exists() else None
+
+
+def cargar(perfil_id, limite=40, orden='cumulative'):
+    """
+    Devuelve los datos de la petición, su SQL y las funciones más costosas,
+    o None si el perfil no existe (o ya salió del buffer).
+    """
+    ruta = ruta_prof(perfil_id)
+    if ruta is None:
+        return None
+    try:
+        meta = json.loads(ruta.with_suffix('.json').read_text())
+        salida = io.StringIO()
+        stats = pstats.Stats(str(ruta), stream=salida)
+    except FileNotFoundError:
+        return None
+    stats.strip_dirs().sort_stats(orden).print_stats(limite)
+    meta['estadisticas'] = salida.getvalue()
+    return meta
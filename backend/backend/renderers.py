@@ -0,0 +1,53 @@
+"""
+Renderer y parser JSON rápidos para la API.
+
+Si orjson está instalado (y FAST_JSON no está desactivado) se usa para
+serializar y leer JSON; si no, se cae al módulo json estándar de DRF. La
+salida es la misma en ambos casos: JSON compacto en UTF-8, y los tipos que
+orjson no conoce (Decimal, fechas, textos traducibles...) se convierten con
+el codificador de DRF.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+def disponible():
+    return orjson is not None and getattr(settings, 'FAST_JSON', True)
+
+
+if orjson is not None:
+    # Las fechas pasan por el codificador de DRF para conservar su formato ('Z' en UTC)
+    OPCIONES = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    _por_defecto = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # La API navegable pide sangría: ahí no importa la velocidad
+        if not disponible() or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_por_defecto, option=OPCIONES)
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not disponible() or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -54,9 +55,32 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # Paginación por cursor opcional: solo con ?page_size=N o ?cursor=...
+    'DEFAULT_PAGINATION_CLASS': 'inventory.pagination.OptionalCursorPagination',
+    # JSON con orjson cuando está instalado (ver backend.renderers)
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'backend.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+# FAST_JSON=False vuelve al módulo json estándar aunque orjson esté instalado
+FAST_JSON = os.environ.get('FAST_JSON', 'True') == 'True'
+
+# Compresión de respuestas (gzip, o brotli si el paquete está instalado) a
+# partir de este tamaño en bytes
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
 MIDDLEWARE = [
+    'backend.middleware.MetricsMiddleware',
+    'backend.middleware.ProfilerMiddleware',
+    'backend.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -97,6 +121,26 @@ DATABASES = {
     }
 }
 
+# Caché de respuestas (resumen de inventario, reportes...). Guarda también los
+# contadores de versión con que se invalidan los reportes, los ETag y el índice
+# de reservas (inventory.cache), así que todos los procesos deben compartirlo:
+# LocMemCache es por proceso y con varios workers una escritura en uno no
+# invalidaría a los demás hasta REPORT_CACHE_TIMEOUT. Con WEB_CONCURRENCY > 1
+# (número de workers de gunicorn) y sin CACHE_BACKEND se usa FileBasedCache.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+if WEB_CONCURRENCY > 1:
+    CACHE_BACKEND_DEFAULT = 'django.core.cache.backends.filebased.FileBasedCache'
+    CACHE_LOCATION_DEFAULT = str(BASE_DIR / 'cache')
+else:
+    CACHE_BACKEND_DEFAULT = 'django.core.cache.backends.locmem.LocMemCache'
+    CACHE_LOCATION_DEFAULT = 'banquetes'
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', CACHE_BACKEND_DEFAULT),
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_LOCATION_DEFAULT),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -140,6 +184,9 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_EXPOSE_HEADERS = ['X-Profile-Id', 'X-Profile-URL', 'ETag', 'Idempotent-Replayed']
+# If-Match: control de concurrencia optimista al editar artículos de inventario
+CORS_ALLOW_HEADERS = (*default_headers, 'if-match', 'idempotency-key')
 
 # Media files
 MEDIA_URL = '/media/'
@@ -153,3 +200,41 @@ EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
+
+# Métricas (/metrics): además de usuarios autenticados, un scraper puede
+# enviar este token en la cabecera X-Metrics-Token
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Perfilado bajo demanda para staff (X-Profile: 1 o ?_profile=1)
+PROFILER_DIR = BASE_DIR / 'profiles'
+PROFILER_MAX_ENTRIES = int(os.environ.get('PROFILER_MAX_ENTRIES', '50'))
+
+# Endpoint /api/batch/: máximo de sub-peticiones por lote y cuántas corren en
+# paralelo. Con SQLite los hilos no ganan nada (todo es CPU bajo el GIL); subirlo
+# solo conviene con una base de datos en red, donde las consultas esperan E/S.
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', '20'))
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', '1'))
+
+# Horas que se conserva la respuesta de una petición con Idempotency-Key
+# (altas de eventos y degustaciones); purgar_idempotencia borra las vencidas
+IDEMPOTENCY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', '24'))
+
+# Duración supuesta de eventos y degustaciones: al cumplirse desde su fecha y
+# hora de inicio, transicionar_eventos los finaliza y devuelve su mobiliario
+EVENT_DURATION_HOURS = float(os.environ.get('EVENT_DURATION_HOURS', '8'))
+DEGUSTACION_DURATION_HOURS = float(os.environ.get('DEGUSTACION_DURATION_HOURS', '2'))
+# Zona horaria en que se capturan la fecha y la hora de inicio de eventos y
+# degustaciones (campos sin zona). Es independiente de TIME_ZONE, que sigue en UTC
+EVENT_TIME_ZONE = os.environ.get('EVENT_TIME_ZONE', 'America/Mexico_City')
+
+# Pronóstico de demanda (pronosticar_demanda): días que tarda un reabastecimiento,
+# días de demanda que cubre un pedido y factor de nivel de servicio (1.65 ~ 95%)
+REORDER_LEAD_DAYS = int(os.environ.get('REORDER_LEAD_DAYS', '14'))
+REORDER_CYCLE_DAYS = int(os.environ.get('REORDER_CYCLE_DAYS', '30'))
+REORDER_SERVICE_Z = float(os.environ.get('REORDER_SERVICE_Z', '1.65'))
+
+# Caché de reportes: segundos de vida de una entrada y, si es mayor que cero,
+# cuántos segundos más se sirve una entrada vieja o invalidada mientras se
+# recalcula en segundo plano (stale-while-revalidate)
+REPORT_CACHE_TIMEOUT = int(os.environ.get('REPORT_CACHE_TIMEOUT', '600'))
+REPORT_CACHE_STALE_SECONDS = int(os.environ.get('REPORT_CACHE_STALE_SECONDS', '0'))
@@ -0,0 +1,73 @@
+"""
+Utilidades compartidas por las pruebas de las apps del proyecto.
+
+QueryBudgetMixin verifica que el número de consultas SQL de un endpoint no
+crezca con el número de filas (N+1).
+"""
+import re
+from collections import Counter
+
+from django.core.cache import cache as django_cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+
+def normalizar_sql(sql):
+    """Reemplaza los literales para agrupar las consultas que solo difieren en sus parámetros."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(\.\d+)?\b', '?', sql)
+    return re.sub(r'IN \((?:\?, )*\?\)', 'IN (...)', sql)
+
+
+def tabla_de(sql):
+    match = re.search(r'FROM "(\w+)"', sql)
+    return match.group(1) if match else 'desconocida'
+
+
+class QueryBudgetMixin:
+    """
+    Verifica que el número de consultas de un endpoint no crezca con el número
+    de filas. Si crece, el error indica la tabla y la consulta que se repite.
+
+    Con `vista` la petición se hace directo a la vista (como self.user), para
+    las que no tienen ruta en el URLconf.
+    """
+    pocos = 2
+    muchos = 6
+
+    def pedir(self, url, vista=None):
+        if vista is None:
+            return self.client.get(url)
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user=self.user)
+        return vista(request)
+
+    def consultas(self, url, vista=None):
+        # Se mide el cálculo, no el caché de reportes
+        django_cache.clear()
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.pedir(url, vista)
+        self.assertEqual(response.status_code, 200, f'{url} respondió {response.status_code}')
+        return [query['sql'] for query in contexto.captured_queries]
+
+    def assertConsultasConstantes(self, url, sembrar, vista=None):
+        sembrar(self.pocos)
+        self.pedir(url, vista)  # Calentar cachés (ContentType, etc.)
+        con_pocos = self.consultas(url, vista)
+        sembrar(self.muchos - self.pocos)
+        con_muchos = self.consultas(url, vista)
+
+        if len(con_pocos) == len(con_muchos):
+            return
+
+        antes = Counter(normalizar_sql(sql) for sql in con_pocos)
+        despues = Counter(normalizar_sql(sql) for sql in con_muchos)
+        detalles = [
+            f"  - tabla '{tabla_de(sql)}': {antes[sql]} -> {veces} veces\n    {sql}"
+            for sql, veces in despues.items() if veces > antes[sql]
+        ]
+        self.fail(
+            f'{url}: {len(con_pocos)} consultas con {self.pocos} filas y {len(con_muchos)} con '
+            f'{self.muchos} filas. Consultas que crecen con los datos (posible N+1):\n' + '\n'.join(detalles)
+        )
@@ -20,6 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from posts.views import CreateUserView, MyTokenObtainPairView, UserListView, UserCreateView, UserUpdateView, UserDeleteView, PasswordResetRequestView, PasswordResetConfirmView
 from rest_framework_simplejwt.views import TokenRefreshView
+from .views import MetricsView, ProfileListView, ProfileDetailView, BatchView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -28,6 +29,8 @@ urlpatterns = [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='refresh'),
     path('api-auth/', include('rest_framework.urls')),
     path('api/inventory/', include('inventory.urls')),
+    # Varias peticiones GET en una sola llamada
+    path('api/batch/', BatchView.as_view(), name='batch'),
     path('api/', include('posts.urls')), 
     path('api/users/', UserListView.as_view(), name='user-list'),
     path('api/users/create/', UserCreateView.as_view(), name='user-create'),
@@ -36,6 +39,11 @@ urlpatterns = [
     # Password Reset
     path('api/password-reset/', PasswordResetRequestView.as_view(), name='password-reset-request'),
     path('api/password-reset-confirm/', PasswordResetConfirmView.as_view(), name='password-reset-confirm'),
+    # Métricas operativas (formato Prometheus)
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    # Perfiles de peticiones (solo staff)
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('api/profiles/<str:perfil_id>/', ProfileDetailView.as_view(), name='profile-detail'),
 ]
 
 if settings.DEBUG:
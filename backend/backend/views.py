@@ -0,0 +1,101 @@
+import hmac
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from rest_framework import status
+from rest_framework.permissions import BasePermission, IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import batch, profiling
+from .metrics import REGISTRY
+
+
+class HasMetricsAccess(BasePermission):
+    """
+    Permite el acceso a usuarios autenticados o a un scraper que envíe el
+    token configurado en METRICS_TOKEN mediante la cabecera X-Metrics-Token.
+    """
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return True
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        enviado = request.headers.get('X-Metrics-Token', '')
+        return bool(token) and hmac.compare_digest(token, enviado)
+
+
+class MetricsView(APIView):
+    permission_classes = [HasMetricsAccess]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Devuelve las métricas del proceso en formato de texto de Prometheus.
+        """
+        return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ProfileListView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Lista los perfiles guardados (el más reciente primero), sin su SQL.
+        """
+        return Response(profiling.listar())
+
+
+class ProfileDetailView(APIView):
+    permission_classes = [IsAdminUser]
+    ORDENES = ('cumulative', 'tottime', 'calls')
+
+    def get(self, request, perfil_id, *args, **kwargs):
+        """
+        Devuelve un perfil: datos de la petición, su SQL y las funciones más
+        costosas. Con ?raw=1 descarga el archivo .prof para abrirlo con
+        pstats o snakeviz.
+        """
+        if request.query_params.get('raw') == '1':
+            ruta = profiling.ruta_prof(perfil_id)
+            if ruta is None:
+                raise Http404('Perfil no encontrado.')
+            return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=ruta.name)
+
+        orden = request.query_params.get('orden', 'cumulative')
+        if orden not in self.ORDENES:
+            orden = 'cumulative'
+        try:
+            limite = max(1, min(int(request.query_params.get('limite', 40)), 500))
+        except ValueError:
+            limite = 40
+        perfil = profiling.cargar(perfil_id, limite=limite, orden=orden)
+        if perfil is None:
+            raise Http404('Perfil no encontrado.')
+        return Response(perfil)
+
+
+class BatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Ejecuta varias peticiones GET de la API en una sola llamada.
+
+        Recibe {"requests": ["/api/inventory/bodegas/", {"id": "tipos", "url": "/api/inventory/tipos-evento/"}]}
+        y devuelve {"responses": [{"id", "url", "status", "body"}, ...]} en el
+        mismo orden. Todas se autentican con el mismo token que el lote y se
+        ejecutan en paralelo hasta BATCH_MAX_WORKERS a la vez.
+        """
+        peticiones = request.data.get('requests') if isinstance(request.data, dict) else None
+        maximo = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if not isinstance(peticiones, list) or not peticiones:
+            return Response({'error': "Se requiere una lista 'requests'."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(peticiones) > maximo:
+            return Response({'error': f'Máximo {maximo} peticiones por lote.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        normalizadas = [p if isinstance(p, dict) else {'url': p} for p in peticiones]
+        resultados = batch.ejecutar_lote(request._request, [p.get('url') for p in normalizadas])
+        return Response({'responses': [
+            {'id': p.get('id', i), 'url': p.get('url'), **resultado}
+            for i, (p, resultado) in enumerate(zip(normalizadas, resultados))
+        ]})
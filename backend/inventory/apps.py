@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        # Registra las métricas calculadas al momento del scrape
+        from . import metrics  # noqa: F401
+        # Sincroniza el índice de búsqueda en cada save()/delete()
+        from . import signals  # noqa: F401
@@ -0,0 +1,163 @@
+"""
+Autocompletado por prefijo de clientes, productos y artículos de inventario.
+
+Las búsquedas usan las columnas normalizadas (sin acentos y en minúsculas)
+con un rango `>= prefijo AND < prefijo + '\\uffff'`, que SQLite resuelve con
+el índice de la columna; un `LIKE 'x%'` no lo aprovecharía porque en SQLite
+no distingue mayúsculas. Los prefijos más pedidos se guardan en un LRU en
+memoria: los signals lo vacían cuando cambia lo que se busca (nombres,
+productos, bodega) y el TTL acota lo que puede durar un resultado viejo en
+los demás procesos. Los movimientos de stock no lo vacían, así que la
+cantidad de un artículo sugerido puede tener hasta TTL segundos de atraso.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import (
+    Cliente, Product, Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge, Periquera, Carpa,
+    PistaTarima, Extra, normalizar
+)
+
+
+INVENTORY_MODELS = [Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge, Periquera, Carpa, PistaTarima, Extra]
+
+
+class LRUCache:
+    """LRU con expiración, seguro entre hilos."""
+
+    def __init__(self, maxsize=256, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            guardado, valor = entrada
+            if time.monotonic() - guardado > self.ttl:
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic(), valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+CACHE = LRUCache()
+
+
+def rango(campo, prefijo):
+    return {f'{campo}__gte': prefijo, f'{campo}__lt': prefijo + '\uffff'}
+
+
+def clientes(prefijo, limite):
+    condicion = (
+        Q(**rango('nombre_normalizado', prefijo))
+        | Q(**rango('apellido_normalizado', prefijo))
+        | Q(**rango('numero', prefijo.replace(' ', '')))
+    )
+    if ' ' in prefijo:
+        # "sofia gar": nombre completo seguido del inicio del apellido
+        nombre, apellido = prefijo.split(' ', 1)
+        condicion |= Q(nombre_normalizado=nombre, **rango('apellido_normalizado', apellido))
+    return list(
+        Cliente.objects.filter(condicion)
+        .order_by('nombre_normalizado', 'apellido_normalizado', 'id')
+        .values('id', 'nombre', 'apellido', 'numero')[:limite]
+    )
+
+
+def productos(prefijo, limite):
+    return list(
+        Product.objects.filter(**rango('normalized_name', prefijo))
+        .order_by('normalized_name', 'id')
+        .values('id', 'name')[:limite]
+    )
+
+
+_consulta_inventario = None
+
+
+def _sql_inventario():
+    """
+    SQL del UNION ALL de las 11 categorías, armado una sola vez: construir los
+    11 querysets en cada pulsación costaba más que ejecutar la consulta. Cada
+    rama recibe (modelo, desde, hasta) y al final va el límite.
+    """
+    global _consulta_inventario
+    if _consulta_inventario is None:
+        q = connection.ops.quote_name
+        ramas = [
+            f"SELECT {q('id')}, {q('producto')}, {q('producto_normalizado')}, {q('cantidad')}, "
+            f"{q(model._meta.get_field('bodega').column)}, %s AS {q('modelo')} "
+            f"FROM {q(model._meta.db_table)} "
+            f"WHERE {q('producto_normalizado')} >= %s AND {q('producto_normalizado')} < %s"
+            for model in INVENTORY_MODELS
+        ]
+        _consulta_inventario = (
+            ' UNION ALL '.join(ramas)
+            + f" ORDER BY {q('producto_normalizado')}, {q('modelo')}, {q('id')} LIMIT %s"
+        )
+    return _consulta_inventario
+
+
+def inventario(prefijo, limite):
+    # Una sola consulta: UNION ALL de las 11 categorías, cada rama por su índice
+    params = []
+    for model in INVENTORY_MODELS:
+        params.extend([model._meta.model_name, prefijo, prefijo + '\uffff'])
+    with connection.cursor() as cursor:
+        cursor.execute(_sql_inventario(), params + [limite])
+        return [
+            {'id': item_id, 'producto': producto, 'cantidad': cantidad, 'bodega': bodega, 'modelo': modelo}
+            for item_id, producto, _, cantidad, bodega, modelo in cursor.fetchall()
+        ]
+
+
+FUENTES = {'clientes': clientes, 'productos': productos, 'inventario': inventario}
+
+
+def sugerencias(texto, tipos, limite):
+    """
+    Devuelve las sugerencias de cada tipo pedido para el prefijo dado.
+
+    Args:
+        texto (str): Lo que el usuario lleva escrito.
+        tipos (list): Claves de FUENTES.
+        limite (int): Máximo de sugerencias por tipo.
+
+    Returns:
+        dict: {tipo: [sugerencias]}.
+    """
+    prefijo = normalizar(texto)
+    resultado = {}
+    for tipo in tipos:
+        if not prefijo:
+            resultado[tipo] = []
+            continue
+        clave = (tipo, prefijo, limite)
+        valor = CACHE.get(clave)
+        if valor is None:
+            valor = FUENTES[tipo](prefijo, limite)
+            CACHE.set(clave, valor)
+        resultado[tipo] = valor
+    return resultado
@@ -0,0 +1,151 @@
+"""
+Caché de respuestas con invalidación por versión.
+
+Cada espacio de nombres ('inventario', ...) tiene un contador de versión en
+el caché de Django que forma parte de todas sus claves. Al escribir en los
+modelos de un espacio, los signals llaman a invalidar_al_confirmar(), que incrementa la
+versión: las entradas anteriores dejan de leerse y expiran solas.
+
+Los reportes usan reporte_cacheado(): la entrada guarda las versiones con que
+se calculó, de modo que una entrada invalidada todavía puede servirse (vieja)
+mientras se recalcula en segundo plano.
+
+Las versiones se incrementan al confirmar la transacción que escribe
+(invalidar_al_confirmar): si subieran antes, una lectura concurrente
+calcularía con las filas anteriores al commit y las guardaría bajo la versión
+nueva, y esa entrada vieja se serviría hasta que expirara.
+
+Los contadores viven en el caché por defecto: para que una escritura invalide
+a todos los workers ese caché debe ser compartido entre procesos (ver CACHES
+en settings; con LocMemCache cada proceso tiene sus propias versiones).
+"""
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from rest_framework.response import Response
+
+
+INVENTARIO = 'inventario'
+EVENTOS = 'eventos'
+MANTENIMIENTO = 'mantenimiento'
+
+
+def version(espacio):
+    # El valor inicial se toma del reloj para no repetir una versión ya usada
+    # si el contador se pierde (reinicio del caché, desalojo).
+    return cache.get_or_set(f'version:{espacio}', time.time_ns(), None)
+
+
+def invalidar(*espacios):
+    for espacio in espacios:
+        try:
+            cache.incr(f'version:{espacio}')
+        except ValueError:
+            cache.set(f'version:{espacio}', time.time_ns(), None)
+
+
+def invalidar_al_confirmar(*espacios):
+    """invalidar() cuando se confirme la transacción en curso (de inmediato si no hay una)."""
+    transaction.on_commit(lambda: invalidar(*espacios))
+
+
+def tabla(model):
+    """Espacio de nombres de una tabla, usado por las respuestas condicionales."""
+    return f'tabla:{model._meta.label_lower}'
+
+
+def clave(espacio, *partes):
+    return ':'.join([espacio, f'v{version(espacio)}', *map(str, partes)])
+
+
+def obtener(espacio, partes, calcular, timeout=300):
+    """
+    Devuelve el valor guardado para (espacio, partes) o lo calcula y lo guarda.
+
+    Args:
+        espacio (str): Espacio de nombres que invalida el valor.
+        partes (tuple): Parámetros que distinguen el valor dentro del espacio.
+        calcular (callable): Función sin argumentos que produce el valor.
+        timeout (int): Segundos de vida máximos de la entrada.
+    """
+    llave = clave(espacio, *partes)
+    valor = cache.get(llave)
+    if valor is None:
+        valor = calcular()
+        cache.set(llave, valor, timeout)
+    return valor
+
+
+def en_segundo_plano(funcion):
+    threading.Thread(target=funcion, daemon=True).start()
+
+
+def _calcular_reporte(llave, espacios, calcular, vida):
+    # Las versiones se leen antes de calcular: si hay una escritura a la mitad,
+    # la entrada queda marcada como vieja y se recalcula en la siguiente lectura
+    versiones = [version(espacio) for espacio in espacios]
+    valor = calcular()
+    cache.set(llave, (time.time(), versiones, valor), vida)
+    return valor
+
+
+def _recalcular(llave, espacios, calcular, vida, candado):
+    try:
+        _calcular_reporte(llave, espacios, calcular, vida)
+    finally:
+        cache.delete(candado)
+        connections.close_all()
+
+
+def obtener_reporte(nombre, espacios, partes, calcular):
+    """
+    Devuelve el reporte guardado si sigue vigente o lo calcula.
+
+    Con REPORT_CACHE_STALE_SECONDS > 0, una entrada invalidada o vencida (pero
+    dentro del margen) se devuelve tal cual y se lanza un único recálculo en
+    segundo plano.
+    """
+    vigencia = settings.REPORT_CACHE_TIMEOUT
+    margen = settings.REPORT_CACHE_STALE_SECONDS
+    llave = ':'.join(['reporte', nombre, *map(str, partes)])
+    entrada = cache.get(llave)
+    if entrada is not None:
+        calculado, versiones, valor = entrada
+        edad = time.time() - calculado
+        if edad < vigencia and versiones == [version(espacio) for espacio in espacios]:
+            return valor
+        if margen and edad < vigencia + margen:
+            candado = f'{llave}:recalculando'
+            if cache.add(candado, 1, 60):
+                en_segundo_plano(lambda: _recalcular(llave, espacios, calcular, vigencia + margen, candado))
+            return valor
+    return _calcular_reporte(llave, espacios, calcular, vigencia + margen)
+
+
+def reporte_cacheado(nombre, *espacios, partes=None):
+    """
+    Decora el get() de un reporte para guardar los datos de su respuesta por
+    reporte y query string.
+
+    Args:
+        nombre (str): Nombre del reporte en la clave.
+        espacios (str): Espacios de nombres cuyos cambios invalidan el reporte.
+        partes (callable): Recibe la petición y devuelve partes extra de la clave
+            (p. ej. la fecha, si el reporte depende del día).
+    """
+    def decorador(get):
+        @functools.wraps(get)
+        def envoltura(vista, request, *args, **kwargs):
+            clave_partes = [f'{k}={v}' for k, v in sorted(request.query_params.lists())]
+            if partes is not None:
+                clave_partes.extend(partes(request))
+            datos = obtener_reporte(
+                nombre, espacios, clave_partes, lambda: get(vista, request, *args, **kwargs).data
+            )
+            return Response(datos)
+        return envoltura
+    return decorador
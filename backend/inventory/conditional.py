@@ -0,0 +1,131 @@
+"""
+Respuestas condicionales (ETag / Last-Modified) para los viewsets.
+
+El validador se calcula sin serializar nada: una consulta de agregados sobre
+el queryset (número de filas, id máximo y, si existe, updated_at máximo) más
+los contadores de versión de las tablas involucradas, que los signals
+incrementan en cada escritura. Si coincide con If-None-Match se responde 304
+antes de tocar el serializer.
+
+Los modelos con columna `version` (artículos de inventario) usan en el
+detalle un ETag fuerte con esa versión, que IfMatchMixin compara con el
+If-Match de PUT/PATCH para rechazar con 412 las escrituras sobre una versión
+vieja.
+"""
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import cache
+
+
+def versionado(model):
+    return any(field.name == 'version' for field in model._meta.concrete_fields)
+
+
+def etag_version(version):
+    return f'"{version}"'
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'El registro fue modificado por otra persona. Recarga para ver la versión actual.'
+    default_code = 'precondition_failed'
+
+
+class ConditionalGetMixin:
+    # Modelos (además del propio) cuyo cambio altera la respuesta, p. ej. el
+    # nombre de la bodega que se muestra en los artículos
+    conditional_dependencies = ()
+
+    def validadores(self, request, queryset, detalle=False):
+        model = queryset.model
+        agregados = {'filas': Count('pk'), 'ultimo_id': Max('pk')}
+        tiene_updated_at = any(field.name == 'updated_at' for field in model._meta.concrete_fields)
+        if tiene_updated_at:
+            agregados['modificado'] = Max('updated_at')
+        if detalle and versionado(model):
+            agregados['version'] = Max('version')
+        datos = queryset.order_by().aggregate(**agregados)
+        versiones = [cache.version(cache.tabla(m)) for m in (model, *self.conditional_dependencies)]
+
+        semilla = '|'.join(map(str, [
+            request.get_full_path(), request.headers.get('Accept', ''), datos, versiones
+        ]))
+        etag = f'W/"{hashlib.md5(semilla.encode()).hexdigest()}"'
+        if datos.get('version') is not None:
+            etag = etag_version(datos['version'])
+        # Last-Modified solo es exacto para un objeto: en una lista, borrar una fila
+        # no cambia el updated_at máximo
+        modificado = datos.get('modificado') if detalle else None
+        return etag, (int(modificado.timestamp()) if modificado else None)
+
+    def condicional(self, request, queryset, generar, detalle=False):
+        """
+        Devuelve 304 si el cliente ya tiene la versión actual; si no, la
+        respuesta de `generar()` con sus validadores.
+        """
+        etag, modificado = self.validadores(request, queryset, detalle)
+        no_modificado = get_conditional_response(request, etag=etag, last_modified=modificado)
+        if no_modificado is not None:
+            no_modificado['ETag'] = etag
+            return no_modificado
+        response = generar()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if modificado is not None:
+                response['Last-Modified'] = http_date(modificado)
+        return response
+
+    # Los validadores se calculan sobre el mismo queryset que usa la vista
+    # (get_queryset puede filtrar o anotar), para que describan su respuesta
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.condicional(request, queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+        return self.condicional(
+            request, queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs), detalle=True
+        )
+
+
+class IfMatchMixin:
+    """
+    Control de concurrencia optimista para PUT/PATCH: si la petición trae
+    If-Match y no coincide con la versión actual del registro se responde 412.
+    La comprobación y la escritura ocurren en la misma transacción, después de
+    tomar el candado de escritura de la fila con un UPDATE condicional, así que
+    dos escritores con la misma versión no pueden pasar ambos.
+    """
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        response['ETag'] = etag_version(self.version_guardada)
+        return response
+
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        cabecera = self.request.headers.get('If-Match')
+        aceptadas = parse_etags(cabecera) if cabecera is not None else ['*']
+        if '*' not in aceptadas:
+            if etag_version(instance.version) not in aceptadas:
+                raise PreconditionFailed()
+            # No cambia nada, pero toma el candado de escritura de la fila hasta el
+            # final de la transacción y falla si otro escritor se adelantó
+            bloqueada = type(instance).objects.filter(pk=instance.pk, version=instance.version).update(
+                version=instance.version
+            )
+            if not bloqueada:
+                raise PreconditionFailed()
+        super().perform_update(serializer)
+        self.version_guardada = serializer.instance.version
@@ -0,0 +1,151 @@
+"""
+Índice de reservas por artículo y detección de sobreventa.
+
+Para cada artículo, un barrido sobre las reservas abiertas ordenadas por
+fecha deja su uso como tramos de días con uso constante, y sobre esos tramos
+una tabla dispersa de máximos. Así, el uso máximo de un artículo en una
+ventana de fechas (¿cabe una reserva nueva?) se responde con dos búsquedas
+binarias y una consulta O(1), sin recorrer las asignaciones.
+
+Hay conflicto en un día cuando las reservas activas ese día suman más
+unidades de las que tiene el artículo fuera de mantenimiento (`existencias`
+menos `cantidad_en_mantenimiento`). Reservar nunca lo provoca, porque el
+stock se descuenta al reservar; lo provoca un conteo físico (acción
+`existencias`) por debajo de lo ya reservado, en los días en que el uso
+supera lo que quedó. El índice es también la base para reservar por fechas.
+
+El índice vive en memoria del proceso y se reconstruye cuando cambian las
+versiones de caché de eventos o de inventario (o el día).
+"""
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+
+from . import cache, transiciones
+from .proyeccion import MODELOS, articulos, reservas_abiertas
+
+
+class UsoDiario:
+    """Uso de un artículo por día: tramos [dias[i], dias[i + 1]) con uso[i] unidades."""
+
+    __slots__ = ('dias', 'uso', 'niveles', 'reservas', 'inicios')
+
+    def __init__(self, reservas):
+        """reservas: [(desde, hasta, unidades, origen, id)] con días ordinales (hasta incluido)."""
+        cambios = defaultdict(int)
+        for desde, hasta, unidades, *_ in reservas:
+            cambios[desde] += unidades
+            cambios[hasta + 1] -= unidades
+        self.dias, self.uso = [], []
+        actual = 0
+        for dia in sorted(cambios):
+            actual += cambios[dia]
+            self.dias.append(dia)
+            self.uso.append(actual)
+
+        # niveles[k][i] = máximo de uso[i:i + 2**k]
+        self.niveles = [self.uso]
+        ancho = 1
+        while 2 * ancho <= len(self.uso):
+            anterior = self.niveles[-1]
+            self.niveles.append([max(anterior[i], anterior[i + ancho]) for i in range(len(anterior) - ancho)])
+            ancho *= 2
+
+        self.reservas = sorted(reservas)
+        self.inicios = [reserva[0] for reserva in self.reservas]
+
+    def maximo(self, desde, hasta):
+        """Uso máximo entre los días ordinales `desde` y `hasta` (incluidos)."""
+        fin = bisect_right(self.dias, hasta) - 1
+        if fin < 0:
+            return 0
+        inicio = max(bisect_right(self.dias, desde) - 1, 0)
+        nivel = (fin - inicio + 1).bit_length() - 1
+        tabla = self.niveles[nivel]
+        return max(tabla[inicio], tabla[fin - (1 << nivel) + 1])
+
+    def excesos(self, capacidad, desde, hasta):
+        """Tramos (desde, hasta, uso) dentro de la ventana con más uso que `capacidad`."""
+        primero = max(bisect_right(self.dias, desde) - 1, 0)
+        for i in range(primero, len(self.dias) - 1):
+            if self.dias[i] > hasta:
+                break
+            if self.uso[i] > capacidad:
+                yield max(self.dias[i], desde), min(self.dias[i + 1] - 1, hasta), self.uso[i]
+
+    def activas(self, dia):
+        """Reservas que ocupan el artículo en el día ordinal dado."""
+        return [reserva for reserva in self.reservas[:bisect_right(self.inicios, dia)] if reserva[1] >= dia]
+
+
+class IndiceReservas:
+    def __init__(self, hoy):
+        self.hoy = hoy.toordinal()
+        self.articulos = {(a['content_type_id'], a['id']): a for a in articulos([(model, None) for model in MODELOS])}
+        por_articulo = defaultdict(list)
+        for content_type_id, object_id, cantidad, dia, fin, origen, evento_id in reservas_abiertas(
+            {content_type_id for content_type_id, _ in self.articulos}
+        ):
+            # Un evento vencido que aún no se cierra sigue ocupando sus unidades hoy
+            por_articulo[(content_type_id, object_id)].append(
+                (dia.toordinal(), max(fin.toordinal(), self.hoy), cantidad, origen, evento_id)
+            )
+        self.usos = {}
+        for clave, reservas in por_articulo.items():
+            if clave in self.articulos:
+                self.articulos[clave]['reservado'] = sum(reserva[2] for reserva in reservas)
+                self.usos[clave] = UsoDiario(reservas)
+
+    def capacidad(self, clave):
+        articulo = self.articulos[clave]
+        return articulo['existencias'] - articulo['cantidad_en_mantenimiento']
+
+    def uso_maximo(self, clave, desde, hasta):
+        uso = self.usos.get(clave)
+        return uso.maximo(desde.toordinal(), hasta.toordinal()) if uso is not None else 0
+
+    def disponible(self, clave, desde, hasta):
+        """Unidades del artículo libres en todos los días de la ventana."""
+        return self.capacidad(clave) - self.uso_maximo(clave, desde, hasta)
+
+    def conflictos(self, desde=None, hasta=None, content_type_id=None):
+        """
+        Pares (artículo, día) con más unidades reservadas que existentes, de
+        `desde` (hoy) a `hasta` (sin límite).
+        """
+        desde = max(desde.toordinal(), self.hoy) if desde else self.hoy
+        hasta = hasta.toordinal() if hasta else date.max.toordinal()
+        resultado = []
+        for clave, uso in self.usos.items():
+            if content_type_id is not None and clave[0] != content_type_id:
+                continue
+            articulo, capacidad = self.articulos[clave], self.capacidad(clave)
+            for inicio, fin, unidades in uso.excesos(capacidad, desde, hasta):
+                for dia in range(inicio, fin + 1):
+                    resultado.append({
+                        'model': articulo['model'], 'content_type_id': clave[0], 'id': clave[1],
+                        'producto': articulo['producto'], 'fecha': date.fromordinal(dia),
+                        'reservado': unidades, 'capacidad': capacidad, 'exceso': unidades - capacidad,
+                        'reservas': [
+                            {'origen': origen, 'id': evento_id, 'cantidad': cantidad}
+                            for _, _, cantidad, origen, evento_id in uso.activas(dia)
+                        ],
+                    })
+        resultado.sort(key=lambda conflicto: (conflicto['fecha'], conflicto['model'], conflicto['id']))
+        return resultado
+
+
+_memo = {}
+_lock = threading.Lock()
+
+
+def indice():
+    """Índice vigente: se reconstruye si cambiaron los eventos, el inventario o el día."""
+    hoy = transiciones.hoy()
+    llave = (cache.version(cache.EVENTOS), cache.version(cache.INVENTARIO), hoy)
+    with _lock:
+        if _memo.get('llave') != llave:
+            _memo['indice'] = IndiceReservas(hoy)
+            _memo['llave'] = llave
+        return _memo['indice']
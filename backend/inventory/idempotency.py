@@ -0,0 +1,72 @@
+"""
+Cabecera Idempotency-Key para las altas que reservan mobiliario.
+
+La primera petición con una clave registra la clave antes de hacer el
+trabajo, dentro de la misma transacción, y guarda su respuesta al terminar.
+Un reintento concurrente queda bloqueado por el índice único hasta que la
+primera termina y entonces recibe la misma respuesta, con la cabecera
+Idempotent-Replayed; un reintento posterior la recibe directamente.
+"""
+import functools
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import SolicitudIdempotente
+
+
+def idempotente(create):
+    """Decora el create() (o una acción POST) de un viewset para respetar la cabecera Idempotency-Key."""
+    @functools.wraps(create)
+    def envoltura(self, request, *args, **kwargs):
+        clave = request.headers.get('Idempotency-Key')
+        if clave is None:
+            return create(self, request, *args, **kwargs)
+        if not 0 < len(clave) <= 255:
+            return Response(
+                {'error': 'Idempotency-Key debe tener entre 1 y 255 caracteres.'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        huella = hashlib.sha256(request.body).hexdigest()
+        ahora = timezone.now()
+        registros = SolicitudIdempotente.objects.filter(usuario=request.user, clave=clave)
+        anterior = registros.filter(expira_en__gt=ahora).first()
+        if anterior is not None:
+            return repetir(anterior, huella)
+        registros.delete()  # Una clave vencida puede reutilizarse
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    registro = SolicitudIdempotente.objects.create(
+                        usuario=request.user, clave=clave, metodo=request.method, ruta=request.path[:255],
+                        huella=huella, expira_en=ahora + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+                    )
+            except IntegrityError:
+                # Otra petición con la misma clave se adelantó y ya terminó
+                return repetir(registros.get(), huella)
+
+            response = create(self, request, *args, **kwargs)
+            if response.status_code >= 500:
+                # Un error del servidor no se guarda: el reintento vuelve a intentarlo
+                registro.delete()
+            else:
+                registro.estado_http = response.status_code
+                registro.respuesta = response.data
+                registro.save(update_fields=['estado_http', 'respuesta'])
+            return response
+    return envoltura
+
+
+def repetir(registro, huella):
+    if registro.huella != huella:
+        return Response(
+            {'error': 'La Idempotency-Key ya se usó con otra petición.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(registro.respuesta, status=registro.estado_http, headers={'Idempotent-Replayed': 'true'})
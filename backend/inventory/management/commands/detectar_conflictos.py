@@ -0,0 +1,38 @@
+"""
+Lista los pares (artículo, día) con más unidades reservadas que existentes
+(inventory.conflictos). Pensado para cron, una vez por noche: si hay
+conflictos deja una notificación con el resumen.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory import conflictos
+from inventory.models import Notification
+
+
+class Command(BaseCommand):
+    help = 'Detecta días en que las reservas abiertas de un artículo superan sus unidades.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sin-notificar', action='store_true', help='Solo imprime los conflictos.')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resultado = conflictos.indice().conflictos()
+        duracion = (time.perf_counter() - inicio) * 1000
+        for conflicto in resultado:
+            self.stdout.write(
+                f"{conflicto['fecha']} {conflicto['model']} #{conflicto['id']} {conflicto['producto']}: "
+                f"{conflicto['reservado']} reservadas de {conflicto['capacidad']} (+{conflicto['exceso']})"
+            )
+        self.stdout.write(f'{len(resultado)} conflictos ({duracion:.1f} ms)')
+
+        if resultado and not options['sin_notificar']:
+            articulos = {(conflicto['model'], conflicto['id']): conflicto['producto'] for conflicto in resultado}
+            nombres = ', '.join(sorted(set(articulos.values()))[:5])
+            Notification.objects.create(message=(
+                f"¡Sobreventa de mobiliario! {len(articulos)} artículos tienen más unidades reservadas que "
+                f"existentes en {len({conflicto['fecha'] for conflicto in resultado})} días ({nombres}). "
+                f"Desde el {resultado[0]['fecha'].strftime('%d/%m/%Y')}."
+            ))
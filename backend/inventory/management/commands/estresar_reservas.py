@@ -0,0 +1,360 @@
+"""
+Arnés de estrés concurrente para el flujo de reservas sobre SQLite.
+
+Lanza varios procesos que crean, actualizan y finalizan eventos y mueven
+artículos a mantenimiento al mismo tiempo, todos contra unos pocos artículos
+"calientes" con poco stock. Trabaja sobre un archivo SQLite propio (nunca la
+base de datos real) y al terminar verifica las invariantes de existencias:
+
+    cantidad >= 0, cantidad_en_mantenimiento >= 0 y
+    cantidad + cantidad_en_mantenimiento + unidades asignadas = constante
+"""
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+OPERACIONES = [
+    ('crear', 0.4),
+    ('actualizar', 0.2),
+    ('finalizar', 0.15),
+    ('mantenimiento', 0.15),
+    ('reintegrar', 0.1),
+]
+
+
+def existencias_por_articulo(modelos):
+    """
+    Devuelve {(content_type_id, object_id): (cantidad, mantenimiento, asignado)}
+    para todos los artículos de los modelos indicados.
+    """
+    from inventory.models import EventoMobiliario, DegustacionMobiliario
+
+    asignado = defaultdict(int)
+    for model in (EventoMobiliario, DegustacionMobiliario):
+        filas = model.objects.values('content_type_id', 'object_id').annotate(total=Sum('cantidad'))
+        for fila in filas:
+            asignado[(fila['content_type_id'], fila['object_id'])] += fila['total']
+
+    resultado = {}
+    for model in modelos:
+        content_type = ContentType.objects.get_for_model(model)
+        for pk, cantidad, mantenimiento in model.objects.values_list('id', 'cantidad', 'cantidad_en_mantenimiento'):
+            key = (content_type.id, pk)
+            resultado[key] = (cantidad, mantenimiento, asignado.get(key, 0))
+    return resultado
+
+
+def _trabajador(indice, config, cola):
+    """Proceso hijo: ejecuta operaciones aleatorias hasta agotar su cuota o el tiempo."""
+    connections.close_all()
+    # Los rechazos por falta de stock son esperados; no llenar la salida con ellos
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    rng = random.Random(config['semilla'] + indice)
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {config['token']}")
+    eventos = list(config['eventos'])
+    calientes = config['calientes']
+
+    stats = {
+        'operaciones': defaultdict(int),
+        'exitos': defaultdict(int),
+        'rechazos': defaultdict(int),
+        'errores': defaultdict(int),
+        'excepciones': defaultdict(int),
+        'latencias': defaultdict(list),
+        'reintentos': 0,
+        'espera_bloqueo': 0.0,
+        'espera_bloqueo_max': 0.0,
+    }
+
+    def lineas():
+        elegidos = rng.sample(calientes, k=min(len(calientes), rng.randint(1, 3)))
+        return [
+            {'content_type_id': ct_id, 'object_id': obj_id, 'cantidad': rng.randint(1, config['max_unidades'])}
+            for ct_id, obj_id, _ in elegidos
+        ]
+
+    def peticion(operacion):
+        if operacion == 'crear':
+            return client.post('/api/inventory/eventos/', {
+                'nombre': f'Estrés {indice}', 'tipo_evento': None, 'cantidad_personas': 50,
+                'responsable': 'Estrés', 'lugar': 'Salón', 'fecha_inicio': '2030-01-01',
+                'hora_inicio': '18:00', 'mobiliario': lineas(),
+            }, content_type='application/json')
+        if operacion in ('actualizar', 'finalizar'):
+            if not eventos:
+                return None
+            evento_id = rng.choice(eventos)
+            if operacion == 'finalizar':
+                eventos.remove(evento_id)
+                data = {'estado': 'Finalizado'}
+            else:
+                data = {'mobiliario': lineas()}
+            return client.patch(f'/api/inventory/eventos/{evento_id}/', data, content_type='application/json')
+        _, obj_id, ruta = rng.choice(calientes)
+        return client.post(f'/api/inventory/{ruta}/{obj_id}/{operacion}/', {'cantidad': rng.randint(1, 3)},
+                           content_type='application/json')
+
+    try:
+        limite = time.monotonic() + config['duracion']
+        nombres, pesos = zip(*OPERACIONES)
+        for _ in range(config['operaciones']):
+            if time.monotonic() > limite:
+                break
+            operacion = rng.choices(nombres, pesos)[0]
+            stats['operaciones'][operacion] += 1
+            inicio = time.perf_counter()
+            response = None
+            for intento in range(config['reintentos'] + 1):
+                intento_inicio = time.perf_counter()
+                try:
+                    response = peticion(operacion)
+                    break
+                except OperationalError as e:
+                    if 'locked' not in str(e):
+                        stats['errores'][operacion] += 1
+                        break
+                    espera = time.perf_counter() - intento_inicio
+                    if intento < config['reintentos']:
+                        stats['reintentos'] += 1
+                        pausa = rng.uniform(0, 0.01 * (2 ** intento))
+                        time.sleep(pausa)
+                        espera += pausa
+                    stats['espera_bloqueo'] += espera
+                    stats['espera_bloqueo_max'] = max(stats['espera_bloqueo_max'], espera)
+                    connections.close_all()
+                except Exception as e:
+                    # Cualquier otra falla se cuenta: el proceso debe seguir y entregar sus estadísticas
+                    stats['errores'][operacion] += 1
+                    stats['excepciones'][type(e).__name__] += 1
+                    connections.close_all()
+                    break
+            else:
+                stats['errores'][operacion] += 1
+
+            stats['latencias'][operacion].append((time.perf_counter() - inicio) * 1000)
+            if response is None:
+                continue
+            if response.status_code < 300:
+                stats['exitos'][operacion] += 1
+                if operacion == 'crear':
+                    eventos.append(response.json()['id'])
+            elif response.status_code < 500:
+                stats['rechazos'][operacion] += 1
+            else:
+                stats['errores'][operacion] += 1
+    finally:
+        # Siempre se entregan las estadísticas: el proceso padre las espera en la cola
+        connections.close_all()
+        cola.put(json.loads(json.dumps(stats)))
+
+
+class Command(BaseCommand):
+    help = 'Estresa concurrentemente el flujo de reservas y verifica las invariantes de stock.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=4)
+        parser.add_argument('--operaciones', type=int, default=200, help='Operaciones por proceso.')
+        parser.add_argument('--duracion', type=float, default=60.0, help='Tiempo máximo en segundos.')
+        parser.add_argument('--articulos-calientes', type=int, default=5,
+                            help='Artículos con poco stock sobre los que compiten todos los procesos.')
+        parser.add_argument('--stock-caliente', type=int, default=40)
+        parser.add_argument('--max-unidades', type=int, default=5, help='Unidades máximas por línea reservada.')
+        parser.add_argument('--reintentos', type=int, default=5, help='Reintentos ante "database is locked".')
+        parser.add_argument('--timeout', type=float, default=5.0, help='busy_timeout de SQLite en segundos.')
+        parser.add_argument('--bd', help='Archivo SQLite a usar. Por defecto uno temporal.')
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--salida', help='Archivo JSON donde guardar el informe.')
+        parser.add_argument('--fallar-si-violacion', action='store_true')
+
+    def handle(self, *args, **options):
+        from inventory.models import Silla, Mesa, Manteleria
+        from inventory.synthetic import INVENTORY_MODELS, generar_datos
+
+        ruta_bd = options['bd'] or os.path.join(tempfile.mkdtemp(prefix='estres_'), 'estres.sqlite3')
+        if 'sqlite3' not in connections['default'].settings_dict['ENGINE']:
+            raise CommandError('El arnés de estrés está pensado para SQLite.')
+
+        # Apuntar la conexión por defecto al archivo del arnés (heredado por los procesos hijos)
+        connections.close_all()
+        settings_dict = connections['default'].settings_dict
+        settings_dict['NAME'] = ruta_bd
+        settings_dict.setdefault('OPTIONS', {})['timeout'] = options['timeout']
+
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            call_command('migrate', verbosity=0, interactive=False)
+            generar_datos(bodegas=2, items=110, eventos=200, degustaciones=20, clientes=10,
+                          notificaciones=50, semilla=options['semilla'])
+
+            rutas = {Silla: 'sillas', Mesa: 'mesas', Manteleria: 'mantelerias'}
+            calientes = []
+            for i in range(options['articulos_calientes']):
+                model = list(rutas)[i % len(rutas)]
+                obj = model.objects.create(producto=f'Artículo caliente {i + 1}', cantidad=options['stock_caliente'])
+                calientes.append((ContentType.objects.get_for_model(model).id, obj.id, rutas[model]))
+
+            from inventory.models import Evento
+            user = User.objects.create_user('estres', password='estres')
+            config = {
+                'token': str(RefreshToken.for_user(user).access_token),
+                'eventos': list(Evento.objects.filter(estado='Por iniciar').values_list('id', flat=True)[:200]),
+                'calientes': calientes,
+                'operaciones': options['operaciones'],
+                'duracion': options['duracion'],
+                'max_unidades': options['max_unidades'],
+                'reintentos': options['reintentos'],
+                'semilla': options['semilla'],
+            }
+            iniciales = existencias_por_articulo(INVENTORY_MODELS)
+            connections.close_all()
+
+            contexto = multiprocessing.get_context('fork')
+            cola = contexto.Queue()
+            inicio = time.perf_counter()
+            procesos = [
+                contexto.Process(target=_trabajador, args=(i, config, cola))
+                for i in range(options['procesos'])
+            ]
+            for proceso in procesos:
+                proceso.start()
+            resultados, exitcodes = self.recolectar(cola, procesos, options['duracion'] + 60)
+            duracion = time.perf_counter() - inicio
+
+            finales = existencias_por_articulo(INVENTORY_MODELS)
+
+        informe = self.informe(resultados, duracion, iniciales, finales, ruta_bd)
+        informe['procesos'] = {
+            'total': len(exitcodes), 'sin_estadisticas': len(exitcodes) - len(resultados), 'exitcodes': exitcodes,
+        }
+        self.imprimir(informe)
+        if options['salida']:
+            with open(options['salida'], 'w') as f:
+                json.dump(informe, f, indent=2, ensure_ascii=False)
+        if options['fallar_si_violacion'] and informe['violaciones']['total']:
+            raise CommandError(f"{informe['violaciones']['total']} violaciones de invariantes de stock.")
+
+    def recolectar(self, cola, procesos, espera):
+        """
+        Recibe las estadísticas de los procesos hijos sin bloquearse si alguno
+        murió antes de enviarlas. Devuelve las estadísticas recibidas y los
+        exitcode de los procesos.
+        """
+        resultados, limite = [], time.monotonic() + espera
+        while len(resultados) < len(procesos) and time.monotonic() < limite:
+            try:
+                resultados.append(cola.get(timeout=1))
+            except queue.Empty:
+                if all(proceso.exitcode is not None for proceso in procesos):
+                    # Todos terminaron: lo que no esté ya en la cola no va a llegar
+                    try:
+                        while len(resultados) < len(procesos):
+                            resultados.append(cola.get(timeout=0.5))
+                    except queue.Empty:
+                        pass
+                    break
+        for proceso in procesos:
+            proceso.join(timeout=5)
+            if proceso.is_alive():
+                proceso.terminate()
+                proceso.join()
+        return resultados, [proceso.exitcode for proceso in procesos]
+
+    def informe(self, resultados, duracion, iniciales, finales, ruta_bd):
+        operaciones = {}
+        latencias = defaultdict(list)
+        excepciones = defaultdict(int)
+        for stats in resultados:
+            for campo in ('operaciones', 'exitos', 'rechazos', 'errores'):
+                for operacion, valor in stats[campo].items():
+                    contadores = operaciones.setdefault(
+                        operacion, {'operaciones': 0, 'exitos': 0, 'rechazos': 0, 'errores': 0}
+                    )
+                    contadores[campo] += valor
+            for operacion, valores in stats['latencias'].items():
+                latencias[operacion].extend(valores)
+            for nombre, valor in stats['excepciones'].items():
+                excepciones[nombre] += valor
+
+        for operacion, valores in latencias.items():
+            ordenados = sorted(valores)
+            operaciones[operacion]['p50_ms'] = round(statistics.median(ordenados), 2)
+            operaciones[operacion]['p95_ms'] = round(ordenados[int(0.95 * (len(ordenados) - 1))], 2)
+
+        negativos, derivas = [], []
+        for key, (cantidad, mantenimiento, asignado) in finales.items():
+            if cantidad < 0 or mantenimiento < 0:
+                negativos.append({'articulo': key, 'cantidad': cantidad, 'mantenimiento': mantenimiento})
+            if key in iniciales:
+                antes = sum(iniciales[key])
+                despues = cantidad + mantenimiento + asignado
+                if antes != despues:
+                    derivas.append({'articulo': key, 'existencia_inicial': antes, 'existencia_final': despues})
+
+        total = sum(op['operaciones'] for op in operaciones.values())
+        return {
+            'base_de_datos': ruta_bd,
+            'duracion_s': round(duracion, 3),
+            'operaciones_totales': total,
+            'throughput_ops_s': round(total / duracion, 2) if duracion else 0,
+            'reintentos': sum(stats['reintentos'] for stats in resultados),
+            'espera_bloqueo_s': round(sum(stats['espera_bloqueo'] for stats in resultados), 3),
+            'espera_bloqueo_max_s': round(max((stats['espera_bloqueo_max'] for stats in resultados), default=0), 3),
+            'por_operacion': operaciones,
+            'excepciones': dict(excepciones),
+            'violaciones': {
+                'total': len(negativos) + len(derivas),
+                'cantidades_negativas': negativos,
+                'existencias_con_deriva': derivas,
+            },
+        }
+
+    def imprimir(self, informe):
+        self.stdout.write(f"Base de datos: {informe['base_de_datos']}")
+        self.stdout.write(
+            f"{informe['operaciones_totales']} operaciones en {informe['duracion_s']}s "
+            f"({informe['throughput_ops_s']} ops/s)"
+        )
+        self.stdout.write(
+            f"Reintentos por bloqueo: {informe['reintentos']}, espera total {informe['espera_bloqueo_s']}s, "
+            f"máxima {informe['espera_bloqueo_max_s']}s"
+        )
+        for operacion, valores in sorted(informe['por_operacion'].items()):
+            self.stdout.write(
+                f"  {operacion:<14} total={valores['operaciones']} ok={valores['exitos']} "
+                f"rechazos={valores['rechazos']} errores={valores['errores']} "
+                f"p50={valores.get('p50_ms', 0)}ms p95={valores.get('p95_ms', 0)}ms"
+            )
+        if informe['excepciones']:
+            self.stdout.write(self.style.WARNING(f"Excepciones inesperadas: {informe['excepciones']}"))
+        procesos = informe['procesos']
+        if procesos['sin_estadisticas'] or any(procesos['exitcodes']):
+            self.stdout.write(self.style.ERROR(
+                f"{procesos['sin_estadisticas']} procesos sin estadísticas (exitcodes: {procesos['exitcodes']})"
+            ))
+        violaciones = informe['violaciones']
+        if violaciones['total']:
+            self.stdout.write(self.style.ERROR(
+                f"Violaciones: {len(violaciones['cantidades_negativas'])} cantidades negativas, "
+                f"{len(violaciones['existencias_con_deriva'])} existencias con deriva"
+            ))
+            for detalle in (violaciones['cantidades_negativas'] + violaciones['existencias_con_deriva'])[:10]:
+                self.stdout.write(f'    {detalle}')
+        else:
+            self.stdout.write(self.style.SUCCESS('Sin violaciones de invariantes de stock.'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.synthetic import generar_datos
+
+
+class Command(BaseCommand):
+    help = 'Puebla la base de datos con datos sintéticos para pruebas de rendimiento.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bodegas', type=int, default=5)
+        parser.add_argument('--items', type=int, default=2000, help='Artículos repartidos entre las 11 categorías.')
+        parser.add_argument('--eventos', type=int, default=20000)
+        parser.add_argument('--degustaciones', type=int, default=2000)
+        parser.add_argument('--clientes', type=int, default=500)
+        parser.add_argument('--notificaciones', type=int, default=5000)
+        parser.add_argument('--lineas-min', type=int, default=2, help='Mínimo de líneas de mobiliario por evento pendiente.')
+        parser.add_argument('--lineas-max', type=int, default=8, help='Máximo de líneas de mobiliario por evento pendiente.')
+        parser.add_argument('--semilla', type=int, default=0)
+
+    def handle(self, *args, **options):
+        # Las asignaciones y las notificaciones se reparten entre los artículos
+        if options['items'] < 1:
+            raise CommandError('--items debe ser al menos 1.')
+        resumen = generar_datos(
+            bodegas=options['bodegas'],
+            items=options['items'],
+            eventos=options['eventos'],
+            degustaciones=options['degustaciones'],
+            clientes=options['clientes'],
+            notificaciones=options['notificaciones'],
+            lineas_por_evento=(options['lineas_min'], options['lineas_max']),
+            semilla=options['semilla'],
+        )
+        for nombre, cantidad in resumen.items():
+            self.stdout.write(f'{nombre}: {cantidad}')
+        self.stdout.write(self.style.SUCCESS('Datos sintéticos generados.'))
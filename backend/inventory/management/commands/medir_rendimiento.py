@@ -0,0 +1,215 @@
+"""
+Benchmark de los endpoints principales sobre datos sintéticos.
+
+Crea una base de datos de prueba (nunca toca la base de datos real), la puebla
+con inventory.synthetic y mide cada endpoint con el cliente de pruebas de
+Django, autenticándose con un JWT real. Guarda los percentiles de latencia y
+el número de consultas en un JSON y, si se indica una línea base, marca las
+regresiones.
+
+Los reportes con caché (REPORTES_CACHEADOS) se miden dos veces: con su nombre,
+vaciando el caché antes de cada petición (el costo de calcular el reporte), y
+con el sufijo `_cache`, con el caché ya lleno.
+"""
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache as django_cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+REPORTES_CACHEADOS = {'bajo_stock', 'reporte_bodegas', 'analisis_eventos', 'reporte_mantenimiento'}
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = (len(ordenados) - 1) * p / 100
+    inferior = int(indice)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (indice - inferior)
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia y consultas SQL de los endpoints principales sobre datos sintéticos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=20)
+        parser.add_argument('--bodegas', type=int, default=5)
+        parser.add_argument('--items', type=int, default=2000)
+        parser.add_argument('--eventos', type=int, default=5000)
+        parser.add_argument('--degustaciones', type=int, default=500)
+        parser.add_argument('--notificaciones', type=int, default=2000)
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--salida', default='benchmark_resultados.json', help='Archivo JSON con los resultados.')
+        parser.add_argument('--linea-base', help='JSON de una ejecución anterior contra el cual comparar.')
+        parser.add_argument('--tolerancia', type=float, default=0.25,
+                            help='Incremento relativo del p95 permitido antes de marcar una regresión.')
+        parser.add_argument('--fallar-si-regresion', action='store_true',
+                            help='Termina con error si se detecta alguna regresión.')
+
+    def handle(self, *args, **options):
+        from inventory.synthetic import generar_datos
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+                resumen = generar_datos(
+                    bodegas=options['bodegas'],
+                    items=options['items'],
+                    eventos=options['eventos'],
+                    degustaciones=options['degustaciones'],
+                    notificaciones=options['notificaciones'],
+                    semilla=options['semilla'],
+                )
+                self.stdout.write(f'Datos generados: {resumen}')
+                resultados = self.medir(options['iteraciones'], options['semilla'])
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        salida = {'escala': resumen, 'iteraciones': options['iteraciones'], 'endpoints': resultados}
+        Path(options['salida']).write_text(json.dumps(salida, indent=2, ensure_ascii=False))
+        self.stdout.write(f"Resultados guardados en {options['salida']}")
+
+        for nombre, datos in resultados.items():
+            self.stdout.write(
+                f"{nombre:<28} p50={datos['p50_ms']:8.2f}ms p95={datos['p95_ms']:8.2f}ms "
+                f"p99={datos['p99_ms']:8.2f}ms consultas={datos['consultas']}"
+            )
+
+        if options['linea_base']:
+            regresiones = self.comparar(resultados, options['linea_base'], options['tolerancia'])
+            for mensaje in regresiones:
+                self.stdout.write(self.style.ERROR(mensaje))
+            if not regresiones:
+                self.stdout.write(self.style.SUCCESS('Sin regresiones respecto a la línea base.'))
+            elif options['fallar_si_regresion']:
+                raise CommandError(f'{len(regresiones)} regresiones detectadas.')
+
+    def endpoints(self, rng):
+        """Devuelve (nombre, función que hace la petición) para cada endpoint medido."""
+        from inventory.models import Silla, Mesa, Evento
+
+        silla_ct = ContentType.objects.get_for_model(Silla)
+        mesa_ct = ContentType.objects.get_for_model(Mesa)
+        sillas = list(Silla.objects.filter(cantidad__gte=100).values_list('id', flat=True)[:50])
+        mesas = list(Mesa.objects.filter(cantidad__gte=100).values_list('id', flat=True)[:50])
+        evento_base = {
+            'nombre': 'Evento de benchmark',
+            'tipo_evento': None,
+            'cantidad_personas': 100,
+            'responsable': 'Benchmark',
+            'lugar': 'Salón',
+            'fecha_inicio': '2030-01-01',
+            'hora_inicio': '18:00',
+        }
+        creados = []
+
+        def mobiliario():
+            lineas = []
+            if sillas:
+                lineas.append({'content_type_id': silla_ct.id, 'object_id': rng.choice(sillas), 'cantidad': 1})
+            if mesas:
+                lineas.append({'content_type_id': mesa_ct.id, 'object_id': rng.choice(mesas), 'cantidad': 1})
+            return lineas
+
+        def crear_evento(client):
+            response = client.post('/api/inventory/eventos/', {**evento_base, 'mobiliario': mobiliario()},
+                                   content_type='application/json')
+            if response.status_code == 201:
+                creados.append(response.json()['id'])
+            return response
+
+        def actualizar_evento(client):
+            if not creados:
+                crear_evento(client)
+            evento_id = rng.choice(creados) if creados else Evento.objects.values_list('id', flat=True).first()
+            return client.patch(f'/api/inventory/eventos/{evento_id}/', {'mobiliario': mobiliario()},
+                                content_type='application/json')
+
+        return [
+            ('calendario', lambda client: client.get('/api/inventory/calendar/')),
+            ('bajo_stock', lambda client: client.get('/api/inventory/items/bajo-stock/')),
+            ('reporte_bodegas', lambda client: client.get('/api/inventory/items/warehouse-report/')),
+            ('analisis_eventos', lambda client: client.get('/api/inventory/items/event-analysis/?period=monthly')),
+            ('reporte_mantenimiento', lambda client: client.get('/api/inventory/items/maintenance-report/')),
+            ('notificaciones', lambda client: client.get('/api/inventory/notifications/')),
+            ('crear_evento', crear_evento),
+            ('actualizar_evento', actualizar_evento),
+        ]
+
+    def medir(self, iteraciones, semilla):
+        user = User.objects.create_user('benchmark', password='benchmark')
+        token = str(RefreshToken.for_user(user).access_token)
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        rng = random.Random(semilla)
+
+        resultados = {}
+        for nombre, peticion in self.endpoints(rng):
+            if nombre in REPORTES_CACHEADOS:
+                resultados[nombre] = self.medir_endpoint(client, peticion, iteraciones, antes=django_cache.clear)
+                resultados[f'{nombre}_cache'] = self.medir_endpoint(client, peticion, iteraciones)
+            else:
+                resultados[nombre] = self.medir_endpoint(client, peticion, iteraciones)
+        return resultados
+
+    def medir_endpoint(self, client, peticion, iteraciones, antes=None):
+        """Percentiles de latencia y consultas de `iteraciones` peticiones; `antes` corre fuera del tiempo medido."""
+        # Calentamiento: la primera petición carga cachés (ContentType, URLconf...)
+        peticion(client)
+        tiempos, consultas, estados = [], [], set()
+        for _ in range(iteraciones):
+            if antes is not None:
+                antes()
+            with CaptureQueriesContext(connection) as contexto:
+                inicio = time.perf_counter()
+                response = peticion(client)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas.append(len(contexto.captured_queries))
+            estados.add(response.status_code)
+        return {
+            'p50_ms': round(percentil(tiempos, 50), 3),
+            'p90_ms': round(percentil(tiempos, 90), 3),
+            'p95_ms': round(percentil(tiempos, 95), 3),
+            'p99_ms': round(percentil(tiempos, 99), 3),
+            'max_ms': round(max(tiempos), 3),
+            'media_ms': round(statistics.mean(tiempos), 3),
+            'consultas': max(consultas),
+            'bytes': len(response.content),
+            'estados': sorted(estados),
+        }
+
+    def comparar(self, resultados, ruta_linea_base, tolerancia):
+        try:
+            linea_base = json.loads(Path(ruta_linea_base).read_text())['endpoints']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'No se pudo leer la línea base: {e}')
+
+        regresiones = []
+        for nombre, actual in resultados.items():
+            anterior = linea_base.get(nombre)
+            if anterior is None:
+                continue
+            if actual['p95_ms'] > anterior['p95_ms'] * (1 + tolerancia):
+                regresiones.append(
+                    f"{nombre}: p95 {actual['p95_ms']:.2f}ms vs {anterior['p95_ms']:.2f}ms en la línea base"
+                )
+            if actual['consultas'] > anterior['consultas']:
+                regresiones.append(
+                    f"{nombre}: {actual['consultas']} consultas vs {anterior['consultas']} en la línea base"
+                )
+        return regresiones
@@ -0,0 +1,112 @@
+"""
+Benchmark de serialización y compresión de las respuestas más grandes.
+
+Igual que medir_rendimiento, crea una base de datos de prueba y la puebla con
+inventory.synthetic. Para cada endpoint obtiene los datos de la respuesta y
+mide cuánto tarda en convertirlos a JSON el renderer estándar de DRF y el
+rápido (backend.renderers), y cuántos bytes ocupa el cuerpo sin comprimir,
+con gzip y con brotli (si está instalado).
+"""
+import gzip
+import json
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend import renderers
+from backend.middleware import brotli
+
+
+ENDPOINTS = [
+    ('eventos_con_mobiliario', '/api/inventory/eventos/?expand=mobiliario_asignado'),
+    ('eventos', '/api/inventory/eventos/'),
+    ('calendario', '/api/inventory/calendar/'),
+    ('sillas', '/api/inventory/sillas/'),
+    ('bajo_stock', '/api/inventory/items/bajo-stock/'),
+    ('analisis_eventos', '/api/inventory/items/event-analysis/?period=monthly'),
+    ('resumen_inventario', '/api/inventory/items/overview/?items=all'),
+]
+
+
+def milisegundos(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) * 1000 / repeticiones, resultado
+
+
+class Command(BaseCommand):
+    help = 'Compara bytes y tiempo de render JSON (json vs orjson, sin comprimir/gzip/brotli) sobre datos sintéticos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=10)
+        parser.add_argument('--bodegas', type=int, default=5)
+        parser.add_argument('--items', type=int, default=2000)
+        parser.add_argument('--eventos', type=int, default=2000)
+        parser.add_argument('--degustaciones', type=int, default=200)
+        parser.add_argument('--notificaciones', type=int, default=200)
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--salida', default='benchmark_respuestas.json', help='Archivo JSON con los resultados.')
+
+    def handle(self, *args, **options):
+        from inventory.synthetic import generar_datos
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+                resumen = generar_datos(
+                    bodegas=options['bodegas'],
+                    items=options['items'],
+                    eventos=options['eventos'],
+                    degustaciones=options['degustaciones'],
+                    notificaciones=options['notificaciones'],
+                    semilla=options['semilla'],
+                )
+                self.stdout.write(f'Datos generados: {resumen}')
+                resultados = self.medir(options['repeticiones'])
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        salida = {'escala': resumen, 'orjson': renderers.orjson is not None, 'brotli': brotli is not None,
+                  'endpoints': resultados}
+        Path(options['salida']).write_text(json.dumps(salida, indent=2, ensure_ascii=False))
+        self.stdout.write(f"Resultados guardados en {options['salida']}")
+
+        for nombre, datos in resultados.items():
+            self.stdout.write(
+                f"{nombre:<24} json={datos['json_ms']:8.2f}ms rapido={datos['rapido_ms']:8.2f}ms "
+                f"bytes={datos['bytes']:>9} gzip={datos['gzip_bytes']:>8} br={datos['br_bytes'] or '-':>8}"
+            )
+
+    def medir(self, repeticiones):
+        user = User.objects.create_user('benchmark', password='benchmark')
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        estandar, rapido = JSONRenderer(), renderers.FastJSONRenderer()
+
+        resultados = {}
+        for nombre, url in ENDPOINTS:
+            datos = client.get(url).data
+            json_ms, cuerpo = milisegundos(lambda: estandar.render(datos), repeticiones)
+            rapido_ms, cuerpo_rapido = milisegundos(lambda: rapido.render(datos), repeticiones)
+            if json.loads(cuerpo) != json.loads(cuerpo_rapido):
+                self.stdout.write(self.style.WARNING(f'{nombre}: los dos renderers no producen el mismo JSON'))
+            gzip_ms, comprimido = milisegundos(lambda: gzip.compress(cuerpo, compresslevel=6), repeticiones)
+            resultados[nombre] = {
+                'json_ms': round(json_ms, 3),
+                'rapido_ms': round(rapido_ms, 3),
+                'bytes': len(cuerpo),
+                'gzip_bytes': len(comprimido),
+                'gzip_ms': round(gzip_ms, 3),
+                'br_bytes': len(brotli.compress(cuerpo, quality=5)) if brotli is not None else None,
+            }
+        return resultados
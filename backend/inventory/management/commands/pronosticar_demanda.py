@@ -0,0 +1,23 @@
+"""
+Actualiza el pronóstico de demanda y los puntos de reorden
+(inventory.pronostico). Pensado para cron, p. ej. una vez por noche: cada
+pasada solo suma el historial nuevo.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory import pronostico
+
+
+class Command(BaseCommand):
+    help = 'Suma el historial de mobiliario nuevo a la demanda por artículo y recalcula los puntos de reorden.'
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resumen = pronostico.actualizar()
+        duracion = (time.perf_counter() - inicio) * 1000
+        self.stdout.write(
+            f"{resumen['acumulados']} usos nuevos sumados, {resumen['articulos']} puntos de reorden "
+            f"recalculados ({duracion:.1f} ms)"
+        )
@@ -0,0 +1,15 @@
+"""
+Borra las respuestas guardadas por Idempotency-Key que ya vencieron
+(IDEMPOTENCY_TTL_HOURS). Pensado para ejecutarse periódicamente (cron).
+"""
+from django.core.management.base import BaseCommand
+
+from inventory.models import SolicitudIdempotente
+
+
+class Command(BaseCommand):
+    help = 'Borra las respuestas de Idempotency-Key vencidas.'
+
+    def handle(self, *args, **options):
+        borradas = SolicitudIdempotente.purgar()
+        self.stdout.write(f'{borradas} respuestas vencidas borradas.')
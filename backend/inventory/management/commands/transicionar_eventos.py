@@ -0,0 +1,34 @@
+"""
+Aplica los cambios de estado automáticos de eventos y degustaciones
+(inventory.transiciones): una vez, para cron, o en bucle con --intervalo.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from inventory import transiciones
+
+
+class Command(BaseCommand):
+    help = 'Pasa a "En proceso" y "Finalizado" los eventos y degustaciones según su fecha, hora y duración.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=200, help='Eventos finalizados por transacción.')
+        parser.add_argument('--intervalo', type=float, default=0,
+                            help='Segundos entre pasadas; 0 ejecuta una sola vez.')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            inicio = time.perf_counter()
+            resumen = transiciones.procesar(lote=options['lote'])
+            duracion = (time.perf_counter() - inicio) * 1000
+            detalle = ', '.join(
+                f"{origen}: {datos['en_proceso']} en proceso, {datos['finalizados']} finalizados"
+                for origen, datos in resumen.items()
+            )
+            self.stdout.write(f'{detalle} ({duracion:.1f} ms)')
+            if not options['intervalo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,26 @@
+"""
+Métricas de la aplicación de inventario que se calculan en el momento del scrape.
+"""
+from django.db.models import Count, Q
+
+from backend.metrics import REGISTRY
+
+
+NOTIFICATIONS = REGISTRY.gauge(
+    'inventory_notifications',
+    'Filas en la tabla de notificaciones.',
+    ('estado',),
+)
+
+
+def _contar_notificaciones():
+    from .models import Notification
+
+    totales = Notification.objects.aggregate(
+        leidas=Count('id', filter=Q(is_read=True)),
+        no_leidas=Count('id', filter=Q(is_read=False)),
+    )
+    return {('leidas',): totales['leidas'], ('no_leidas',): totales['no_leidas']}
+
+
+NOTIFICATIONS.set_function(_contar_notificaciones)
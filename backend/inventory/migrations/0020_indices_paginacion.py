@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0019_notification'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carpa',
+            index=models.Index(fields=['created_at', 'id'], name='carpa_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cristaleria',
+            index=models.Index(fields=['created_at', 'id'], name='cristaleria_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cubierto',
+            index=models.Index(fields=['created_at', 'id'], name='cubierto_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='degustacion',
+            index=models.Index(fields=['created_at', 'id'], name='degustacion_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['created_at', 'id'], name='evento_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='extra',
+            index=models.Index(fields=['created_at', 'id'], name='extra_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loza',
+            index=models.Index(fields=['created_at', 'id'], name='loza_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='manteleria',
+            index=models.Index(fields=['created_at', 'id'], name='manteleria_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mesa',
+            index=models.Index(fields=['created_at', 'id'], name='mesa_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['created_at', 'id'], name='notification_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='periquera',
+            index=models.Index(fields=['created_at', 'id'], name='periquera_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pistatarima',
+            index=models.Index(fields=['created_at', 'id'], name='pistatarima_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salalounge',
+            index=models.Index(fields=['created_at', 'id'], name='salalounge_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='silla',
+            index=models.Index(fields=['created_at', 'id'], name='silla_creado_idx'),
+        ),
+    ]
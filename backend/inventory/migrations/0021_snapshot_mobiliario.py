@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copiar_datos_articulos(apps, schema_editor):
+    """Llena la copia de datos de las líneas existentes con el estado actual de cada artículo."""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    for nombre in ('EventoMobiliario', 'DegustacionMobiliario'):
+        Linea = apps.get_model('inventory', nombre)
+        for content_type_id in Linea.objects.values_list('content_type_id', flat=True).distinct():
+            content_type = ContentType.objects.get(pk=content_type_id)
+            try:
+                Articulo = apps.get_model(content_type.app_label, content_type.model)
+            except LookupError:
+                continue
+            lineas = list(Linea.objects.filter(content_type_id=content_type_id))
+            articulos = Articulo.objects.select_related('bodega').in_bulk({linea.object_id for linea in lineas})
+            for linea in lineas:
+                articulo = articulos.get(linea.object_id)
+                if articulo is None:
+                    continue
+                linea.categoria = str(Articulo._meta.verbose_name)
+                linea.producto = articulo.producto
+                linea.descripcion = articulo.descripcion
+                linea.bodega_id = articulo.bodega_id
+                linea.bodega_nombre = articulo.bodega.nombre if articulo.bodega_id else ''
+            Linea.objects.bulk_update(
+                lineas, ['categoria', 'producto', 'descripcion', 'bodega', 'bodega_nombre'], batch_size=500
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventory', '0020_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='degustacionmobiliario',
+            name='bodega',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.bodega'),
+        ),
+        migrations.AddField(
+            model_name='degustacionmobiliario',
+            name='bodega_nombre',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='degustacionmobiliario',
+            name='categoria',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='degustacionmobiliario',
+            name='descripcion',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='degustacionmobiliario',
+            name='producto',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='eventomobiliario',
+            name='bodega',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.bodega'),
+        ),
+        migrations.AddField(
+            model_name='eventomobiliario',
+            name='bodega_nombre',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='eventomobiliario',
+            name='categoria',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='eventomobiliario',
+            name='descripcion',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='eventomobiliario',
+            name='producto',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='degustacionmobiliario',
+            index=models.Index(fields=['content_type', 'object_id'], name='degustacionmobiliario_obj_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventomobiliario',
+            index=models.Index(fields=['content_type', 'object_id'], name='eventomobiliario_obj_idx'),
+        ),
+        migrations.RunPython(copiar_datos_articulos, migrations.RunPython.noop),
+    ]
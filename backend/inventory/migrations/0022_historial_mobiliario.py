@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventory', '0021_snapshot_mobiliario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorialMobiliario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField()),
+                ('object_id', models.PositiveIntegerField()),
+                ('categoria', models.CharField(blank=True, default='', max_length=50)),
+                ('producto', models.CharField(blank=True, default='', max_length=100)),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('bodega_nombre', models.CharField(blank=True, default='', max_length=100)),
+                ('origen', models.CharField(choices=[('evento', 'Evento'), ('degustacion', 'Degustación')], max_length=12)),
+                ('estado', models.CharField(max_length=20)),
+                ('fecha', models.DateField()),
+                ('archivado_en', models.DateTimeField(auto_now_add=True)),
+                ('bodega', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.bodega')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('degustacion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historial_mobiliario', to='inventory.degustacion')),
+                ('evento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historial_mobiliario', to='inventory.evento')),
+                ('tipo_evento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.tipoevento')),
+            ],
+            options={
+                'abstract': False,
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='historialmobiliario_obj_idx'), models.Index(fields=['estado', 'fecha'], name='historial_estado_fecha_idx')],
+            },
+        ),
+    ]
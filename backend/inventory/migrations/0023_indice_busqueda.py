@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+TABLA = 'inventory_busqueda'
+
+# Orden de las categorías tal como quedó en el índice: rowid = id del artículo * 16 + posición
+MODELOS = [
+    'Manteleria', 'Cubierto', 'Loza', 'Cristaleria', 'Silla', 'Mesa', 'SalaLounge', 'Periquera', 'Carpa',
+    'PistaTarima', 'Extra',
+]
+
+
+def crear_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    quote = schema_editor.quote_name
+    bodegas = quote(apps.get_model('inventory', 'Bodega')._meta.db_table)
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA} USING fts5("
+        "producto, descripcion, categoria, bodega, modelo UNINDEXED, item_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(f'DELETE FROM {TABLA}')
+    for posicion, nombre in enumerate(MODELOS):
+        model = apps.get_model('inventory', nombre)
+        schema_editor.execute(
+            f'INSERT INTO {TABLA} (rowid, producto, descripcion, categoria, bodega, modelo, item_id) '
+            f"SELECT a.id * 16 + %s, a.producto, COALESCE(a.descripcion, ''), %s, COALESCE(b.nombre, ''), %s, a.id "
+            f'FROM {quote(model._meta.db_table)} a LEFT JOIN {bodegas} b ON b.id = a.bodega_id',
+            [posicion, str(model._meta.verbose_name), model._meta.model_name]
+        )
+
+
+def eliminar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLA}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0022_historial_mobiliario'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:09
+
+import re
+
+import unidecode
+from django.db import migrations, models
+
+CATEGORIAS = [
+    'Manteleria', 'Cubierto', 'Loza', 'Cristaleria', 'Silla', 'Mesa', 'SalaLounge', 'Periquera', 'Carpa',
+    'PistaTarima', 'Extra',
+]
+
+
+def normalizar(texto):
+    # Copia de inventory.models.normalizar tal como era al crear la migración
+    return re.sub(r'\s+', ' ', unidecode.unidecode(texto or '')).strip().lower()
+
+
+def normalizar_existentes(apps, schema_editor):
+    for nombre in CATEGORIAS:
+        model = apps.get_model('inventory', nombre)
+        items = list(model.objects.only('id', 'producto'))
+        for item in items:
+            item.producto_normalizado = normalizar(item.producto)
+        model.objects.bulk_update(items, ['producto_normalizado'], batch_size=500)
+
+    Cliente = apps.get_model('inventory', 'Cliente')
+    clientes = list(Cliente.objects.only('id', 'nombre', 'apellido'))
+    for cliente in clientes:
+        cliente.nombre_normalizado = normalizar(cliente.nombre)
+        cliente.apellido_normalizado = normalizar(cliente.apellido)
+    Cliente.objects.bulk_update(clientes, ['nombre_normalizado', 'apellido_normalizado'], batch_size=500)
+
+    Product = apps.get_model('inventory', 'Product')
+    productos = list(Product.objects.only('id', 'name'))
+    for producto in productos:
+        producto.normalized_name = normalizar(producto.name)
+    Product.objects.bulk_update(productos, ['normalized_name'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0023_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carpa',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='apellido_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='nombre_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='cristaleria',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='cubierto',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='extra',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='loza',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='manteleria',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='mesa',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='periquera',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='pistatarima',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='normalized_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='salalounge',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='silla',
+            name='producto_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='cliente',
+            name='numero',
+            field=models.CharField(db_index=True, max_length=20),
+        ),
+        migrations.RunPython(normalizar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventory', '0026_solicitudes_idempotentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandaArticulo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('rango_personas', models.PositiveSmallIntegerField()),
+                ('temporada', models.PositiveSmallIntegerField()),
+                ('eventos', models.PositiveIntegerField(default=0)),
+                ('unidades', models.PositiveBigIntegerField(default=0)),
+                ('unidades_cuadrado', models.PositiveBigIntegerField(default=0)),
+                ('personas', models.PositiveBigIntegerField(default=0)),
+                ('primera_fecha', models.DateField()),
+                ('ultima_fecha', models.DateField()),
+                ('ultimo_historial_id', models.PositiveBigIntegerField(db_index=True, default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('tipo_evento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.tipoevento')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='demanda_articulo_obj_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PuntoReorden',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('punto_reorden', models.PositiveIntegerField()),
+                ('cantidad_reorden', models.PositiveIntegerField()),
+                ('demanda_semanal', models.FloatField()),
+                ('temporada', models.PositiveSmallIntegerField()),
+                ('eventos_observados', models.PositiveIntegerField()),
+                ('calculado_en', models.DateTimeField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='punto_reorden_obj_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:12
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models.functions import Greatest
+
+
+MODELOS = [
+    'Manteleria', 'Cubierto', 'Loza', 'Cristaleria', 'Silla', 'Mesa', 'SalaLounge', 'Periquera', 'Carpa',
+    'PistaTarima', 'Extra',
+]
+# Estados en los que un evento o degustación aún tiene su mobiliario descontado
+ABIERTOS = ['Por iniciar', 'En proceso']
+
+
+def calcular_existencias(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    lineas = [
+        (apps.get_model('inventory', 'EventoMobiliario'), 'evento'),
+        (apps.get_model('inventory', 'DegustacionMobiliario'), 'degustacion'),
+    ]
+    for nombre in MODELOS:
+        model = apps.get_model('inventory', nombre)
+        model.objects.update(
+            existencias=Greatest(models.F('cantidad') + models.F('cantidad_en_mantenimiento'), models.Value(0))
+        )
+        content_type = ContentType.objects.filter(app_label='inventory', model=nombre.lower()).first()
+        if content_type is None:
+            continue
+        reservado = Counter()
+        for linea_model, origen in lineas:
+            filas = (
+                linea_model.objects.filter(content_type=content_type, **{f'{origen}__estado__in': ABIERTOS})
+                .values('object_id').annotate(total=models.Sum('cantidad')).values_list('object_id', 'total')
+            )
+            for object_id, total in filas:
+                reservado[object_id] += total
+        for object_id, total in reservado.items():
+            model.objects.filter(pk=object_id).update(existencias=models.F('existencias') + total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventory', '0027_pronostico_demanda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carpa',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cristaleria',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cubierto',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='extra',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='loza',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='manteleria',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mesa',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='periquera',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pistatarima',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salalounge',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='silla',
+            name='existencias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(calcular_existencias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventory', '0028_existencias_articulos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Kit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tipo_evento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='kits', to='inventory.tipoevento')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='KitLinea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('cantidad', models.PositiveIntegerField()),
+                ('por_personas', models.PositiveIntegerField(blank=True, null=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('kit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineas', to='inventory.kit')),
+            ],
+        ),
+    ]
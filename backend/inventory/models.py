@@ -4,10 +4,27 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.dispatch import Signal
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from backend.metrics import EMAIL_SEND_SECONDS, EMAIL_SEND_FAILURES
 import logging
+import math
+import re
+from collections import Counter, defaultdict
+
+import unidecode
 
 logger = logging.getLogger(__name__)
 
+# Se envía tras InventarioItem.ajustar_stock(), que usa update() y no dispara post_save
+stock_ajustado = Signal()
+
+
+def normalizar(texto):
+    """Texto en minúsculas, sin acentos y con espacios simples ("  Mantelería " -> "manteleria")."""
+    return re.sub(r'\s+', ' ', unidecode.unidecode(texto or '')).strip().lower()
+
 
 def send_notification_email(message):
     """
@@ -52,18 +69,20 @@ Sistema de Gestión de Banquetes
         """
         
         # Enviar el correo
-        sent_count = send_mail(
-            subject=subject,
-            message=email_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipient_list,
-            fail_silently=False,
-        )
+        with EMAIL_SEND_SECONDS.time():
+            sent_count = send_mail(
+                subject=subject,
+                message=email_message,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=recipient_list,
+                fail_silently=False,
+            )
         
         logger.info(f"Correos de notificación enviados exitosamente a {len(recipient_list)} usuarios")
         return sent_count
         
     except Exception as e:
+        EMAIL_SEND_FAILURES.inc()
         logger.error(f"Error al enviar correos de notificación: {str(e)}")
         # No lanzar la excepción para no interrumpir el flujo del guardado
         return 0
@@ -83,116 +102,385 @@ class Bodega(models.Model):
     def __str__(self):
         return self.nombre
 
-class InventarioItem(models.Model):
+# Umbral de la alerta de bajo stock para los artículos sin punto de reorden pronosticado
+ALERTA_STOCK_MINIMO = 10
+
+
+def alertar_bajo_stock(producto, cantidad):
+    message = f"¡Alerta de bajo stock! El artículo '{producto}' tiene actualmente {cantidad} unidades. ¡Requiere reabastecimiento urgente!"
+    Notification.objects.create(message=message)
+    # Enviar correo a usuarios admin y Encargado
+    send_notification_email(message)
+    logger.info(f"Notificación creada y correo enviado para {producto}")
+
+
+class CambiosMixin:
+    """
+    Recuerda los valores con que la instancia se leyó de la base de datos
+    (from_db), para saber qué cambió sin volver a consultar la fila. Al
+    guardar una instancia leída se escriben solo las columnas modificadas; si
+    no cambió nada, no se escribe.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._guardar_originales()
+        return instance
+
+    def _guardar_originales(self):
+        cargados = self.__dict__
+        self._originales = {
+            field.attname: cargados[field.attname]
+            for field in self._meta.concrete_fields if not field.primary_key and field.attname in cargados
+        }
+
+    def campos_modificados(self):
+        """Columnas cuyo valor difiere del leído (None si la instancia no se leyó de la base de datos)."""
+        originales = getattr(self, '_originales', None)
+        if originales is None:
+            return None
+        return [campo for campo, valor in originales.items() if self.__dict__.get(campo, valor) != valor]
+
+    def valor_anterior(self, campo):
+        """
+        Valor de `campo` antes de los cambios en memoria. Solo consulta la base
+        de datos si la instancia no se leyó de ella (p. ej. se construyó con pk).
+        """
+        originales = getattr(self, '_originales', None)
+        if originales is not None and campo in originales:
+            return originales[campo]
+        return type(self)._default_manager.filter(pk=self.pk).values_list(campo, flat=True).first()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._guardar_originales()
+
+    def save(self, *args, **kwargs):
+        cambiados = self.campos_modificados()
+        if (cambiados is not None and not args and not self._state.adding
+                and kwargs.get('update_fields') is None and not kwargs.get('force_insert')):
+            if cambiados:
+                # auto_now solo se aplica a los campos que se escriben
+                cambiados += [
+                    field.attname for field in self._meta.concrete_fields
+                    if getattr(field, 'auto_now', False) and field.attname not in cambiados
+                ]
+            kwargs['update_fields'] = cambiados
+        super().save(*args, **kwargs)
+        self._guardar_originales()
+
+
+class InventarioItem(CambiosMixin, models.Model):
     producto = models.CharField(max_length=100)
     descripcion = models.TextField(blank=True, null=True)
     cantidad = models.IntegerField(default=0)
     cantidad_en_mantenimiento = models.IntegerField(default=0)
+    # Unidades propias del artículo: disponibles + en mantenimiento + reservadas en eventos y degustaciones abiertos
+    existencias = models.PositiveIntegerField(default=0)
     bodega = models.ForeignKey(Bodega, on_delete=models.SET_NULL, null=True, blank=True, related_name='%(class)s_items')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Copia normalizada de producto para búsquedas por prefijo con índice
+    producto_normalizado = models.CharField(max_length=100, blank=True, default='', editable=False, db_index=True)
+    # Se incrementa en cada escritura; se expone como ETag para el control de concurrencia optimista
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         abstract = True
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='%(class)s_creado_idx'),
+        ]
 
     def __str__(self):
         return f"{self.producto} - Disp: {self.cantidad} / Mant: {self.cantidad_en_mantenimiento}"
 
     def save(self, *args, **kwargs):
         if self.pk is not None:
-            try:
-                old_item = self.__class__.objects.get(pk=self.pk)
-                if old_item.cantidad >= 10 and self.cantidad < 10:
-                    message = f"¡Alerta de bajo stock! El artículo '{self.producto}' tiene actualmente {self.cantidad} unidades. ¡Requiere reabastecimiento urgente!"
-                    Notification.objects.create(message=message)
-                    # Enviar correo a usuarios admin y Encargado
-                    send_notification_email(message)
-                    logger.info(f"Notificación creada y correo enviado para {self.producto}")
-            except self.__class__.DoesNotExist:
-                pass  # El objeto es nuevo, no hay nada que comparar
-
+            cantidad_anterior = self.valor_anterior('cantidad')
+            # None: el objeto es nuevo, no hay nada que comparar
+            if cantidad_anterior is not None and self.cantidad < cantidad_anterior:
+                if cantidad_anterior >= self.umbral_alerta(self.pk) > self.cantidad:
+                    alertar_bajo_stock(self.producto, self.cantidad)
+
+        if self._state.adding and not self.existencias:
+            self.existencias = max(self.cantidad + self.cantidad_en_mantenimiento, 0)
+
+        self.producto_normalizado = normalizar(self.producto)
+        if not self._state.adding and self.campos_modificados() != []:
+            self.version = (self.valor_anterior('version') or 0) + 1
         super().save(*args, **kwargs)
 
+    @classmethod
+    def ajustar_stock(cls, pk, cantidad=0, mantenimiento=0):
+        """
+        Suma `cantidad` al stock disponible y `mantenimiento` al que está en
+        mantenimiento con un solo UPDATE condicional (nunca deja valores
+        negativos), sin leer antes la fila: dos escrituras concurrentes no se
+        pisan.
+
+        Returns:
+            bool: False si no había stock suficiente (o el artículo no existe).
+        """
+        condiciones = {}
+        if cantidad < 0:
+            condiciones['cantidad__gte'] = -cantidad
+        if mantenimiento < 0:
+            condiciones['cantidad_en_mantenimiento__gte'] = -mantenimiento
+        actualizadas = cls.objects.filter(pk=pk, **condiciones).update(
+            cantidad=models.F('cantidad') + cantidad,
+            cantidad_en_mantenimiento=models.F('cantidad_en_mantenimiento') + mantenimiento,
+            version=models.F('version') + 1,
+            updated_at=timezone.now(),
+        )
+        if not actualizadas:
+            return False
+
+        if cantidad < 0:
+            producto, actual = cls.objects.filter(pk=pk).values_list('producto', 'cantidad').get()
+            if actual - cantidad >= cls.umbral_alerta(pk) > actual:
+                alertar_bajo_stock(producto, actual)
+        stock_ajustado.send(sender=cls, pk=pk)
+        return True
+
+    @classmethod
+    def contar_existencias(cls, pk, existencias):
+        """
+        Registra un conteo físico: fija las existencias y mueve el stock
+        disponible en la misma diferencia con un solo UPDATE. Si el conteo
+        queda por debajo de lo reservado, `cantidad` queda negativa (unidades
+        que se deben a eventos ya reservados) y las devoluciones la corrigen.
+
+        Returns:
+            bool: False si el conteo es menor que lo que está en mantenimiento
+            (o el artículo no existe).
+        """
+        actualizadas = cls.objects.filter(pk=pk, cantidad_en_mantenimiento__lte=existencias).update(
+            cantidad=models.F('cantidad') + existencias - models.F('existencias'),
+            existencias=existencias,
+            version=models.F('version') + 1,
+            updated_at=timezone.now(),
+        )
+        if not actualizadas:
+            return False
+        stock_ajustado.send(sender=cls, pk=pk)
+        return True
+
+    @classmethod
+    def umbral_alerta(cls, pk):
+        """Punto de reorden pronosticado del artículo (PuntoReorden) o ALERTA_STOCK_MINIMO si no lo tiene."""
+        return cls.umbrales_alerta([pk])[pk]
+
+    @classmethod
+    def umbrales_alerta(cls, pks):
+        """umbral_alerta() de varios artículos con una consulta: {pk: umbral}."""
+        puntos = dict(
+            PuntoReorden.objects.filter(content_type=ContentType.objects.get_for_model(cls), object_id__in=pks)
+            .values_list('object_id', 'punto_reorden')
+        )
+        return {pk: puntos.get(pk, ALERTA_STOCK_MINIMO) for pk in pks}
+
+    @classmethod
+    def reservar_stock(cls, cantidades):
+        """
+        Resta del stock disponible las unidades de varios artículos ({pk: unidades})
+        con un UPDATE condicional por bloque de artículos. Debe llamarse dentro
+        de una transacción: si a algún artículo le falta stock devuelve False y
+        quien llama debe revertir lo que sí se descontó.
+
+        Returns:
+            bool: False si algún artículo no tenía stock suficiente (o no existe).
+        """
+        pks = list(cantidades)
+        for inicio in range(0, len(pks), 400):
+            bloque = pks[inicio:inicio + 400]
+            unidades = models.Case(
+                *[models.When(pk=pk, then=models.Value(cantidades[pk])) for pk in bloque],
+                default=models.Value(0), output_field=models.IntegerField(),
+            )
+            actualizadas = cls.objects.filter(pk__in=bloque, cantidad__gte=unidades).update(
+                cantidad=models.F('cantidad') - unidades,
+                version=models.F('version') + 1,
+                updated_at=timezone.now(),
+            )
+            if actualizadas < len(bloque):
+                return False
+
+        umbrales = cls.umbrales_alerta(pks)
+        for pk, producto, actual in cls.objects.filter(pk__in=pks).values_list('pk', 'producto', 'cantidad'):
+            if actual + cantidades[pk] >= umbrales[pk] > actual:
+                alertar_bajo_stock(producto, actual)
+        stock_ajustado.send(sender=cls, pk=None)
+        return True
+
+    @classmethod
+    def devolver_stock(cls, cantidades):
+        """
+        Suma al stock disponible las unidades de varios artículos ({pk: unidades})
+        con un UPDATE ... CASE por cada bloque de artículos, en lugar de leer y
+        guardar cada uno.
+
+        Returns:
+            int: Número de artículos actualizados.
+        """
+        pks = list(cantidades)
+        actualizadas = 0
+        for inicio in range(0, len(pks), 400):
+            bloque = pks[inicio:inicio + 400]
+            unidades = models.Case(
+                *[models.When(pk=pk, then=models.Value(cantidades[pk])) for pk in bloque],
+                default=models.Value(0), output_field=models.IntegerField(),
+            )
+            actualizadas += cls.objects.filter(pk__in=bloque).update(
+                cantidad=models.F('cantidad') + unidades,
+                version=models.F('version') + 1,
+                updated_at=timezone.now(),
+            )
+        if actualizadas:
+            stock_ajustado.send(sender=cls, pk=None)
+        return actualizadas
+
+
+def devolver_asignaciones(asignaciones):
+    """Devuelve al stock las unidades de las líneas de mobiliario dadas: un UPDATE por categoría."""
+    por_categoria = defaultdict(Counter)
+    for linea in asignaciones:
+        por_categoria[linea.content_type_id][linea.object_id] += linea.cantidad
+    for content_type_id, cantidades in por_categoria.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is not None:
+            model.devolver_stock(cantidades)
+
+
+class StockInsuficiente(Exception):
+    """No hay stock para reservar una línea de mobiliario."""
+
+
+def reservar_asignaciones(linea_model, unidades, **padre):
+    """
+    Reserva de una vez varias líneas de mobiliario de un evento o degustación:
+    por categoría, una lectura de los artículos, un UPDATE condicional del
+    stock y, al final, un solo INSERT de las líneas. Debe llamarse dentro de
+    una transacción.
+
+    Args:
+        linea_model: EventoMobiliario o DegustacionMobiliario.
+        unidades (dict): {(content_type_id, object_id): unidades}.
+        **padre: El evento o la degustación de las líneas (evento=..., degustacion=...).
+
+    Raises:
+        StockInsuficiente: Algún artículo no existe o no tiene stock suficiente.
+    """
+    por_categoria = defaultdict(dict)
+    for (content_type_id, object_id), cantidad in unidades.items():
+        por_categoria[content_type_id][object_id] = cantidad
+
+    lineas = []
+    for content_type_id, cantidades in por_categoria.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        articulos = model.objects.select_related('bodega').in_bulk(list(cantidades))
+        if not model.reservar_stock(cantidades):
+            for object_id, cantidad in cantidades.items():
+                articulo = articulos.get(object_id)
+                if articulo is None:
+                    raise StockInsuficiente(f"El item de mobiliario con id {object_id} no existe.")
+                if articulo.cantidad < cantidad:
+                    raise StockInsuficiente(f"No hay suficiente stock para {articulo.producto}.")
+            raise StockInsuficiente("No hay suficiente stock para reservar el mobiliario.")
+        for object_id, cantidad in cantidades.items():
+            linea = linea_model(content_type_id=content_type_id, object_id=object_id, cantidad=cantidad, **padre)
+            linea.tomar_snapshot(articulos[object_id])
+            lineas.append(linea)
+    return linea_model.objects.bulk_create(lineas)
+
 
 class Cliente(models.Model):
     nombre = models.CharField(max_length=100)
     apellido = models.CharField(max_length=100)
     tipo_evento = models.ForeignKey(TipoEvento, on_delete=models.SET_NULL, null=True, blank=True)
     cantidad_aprox = models.IntegerField()
-    numero = models.CharField(max_length=20)
+    numero = models.CharField(max_length=20, db_index=True)
     comentarios = models.TextField(blank=True, null=True)
+    # Copias normalizadas para búsquedas por prefijo con índice
+    nombre_normalizado = models.CharField(max_length=100, blank=True, default='', editable=False, db_index=True)
+    apellido_normalizado = models.CharField(max_length=100, blank=True, default='', editable=False, db_index=True)
 
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
 
+    def save(self, *args, **kwargs):
+        self.nombre_normalizado = normalizar(self.nombre)
+        self.apellido_normalizado = normalizar(self.apellido)
+        super().save(*args, **kwargs)
+
 class Manteleria(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Mantelería'
         verbose_name_plural = 'Mantelerías'
 
 class Cubierto(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Cubierto'
         verbose_name_plural = 'Cubiertos'
 
 class Loza(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Loza'
         verbose_name_plural = 'Lozas'
 
 class Cristaleria(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Cristalería'
         verbose_name_plural = 'Cristalerías'
 
 class Silla(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Silla'
         verbose_name_plural = 'Sillas'
 
 class Mesa(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Mesa'
         verbose_name_plural = 'Mesas'
 
 class SalaLounge(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Sala-Lounge'
         verbose_name_plural = 'Salas-Lounge'
 
 class Periquera(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Periquera'
         verbose_name_plural = 'Periqueras'
 
 class Carpa(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Carpa'
         verbose_name_plural = 'Carpas'
 
 class PistaTarima(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Pista y Tarima'
         verbose_name_plural = 'Pistas y Tarimas'
 
 class Extra(InventarioItem):
 
-    class Meta:
+    class Meta(InventarioItem.Meta):
         verbose_name = 'Extra'
         verbose_name_plural = 'Extras'
 
 
-class Evento(models.Model):
+class Evento(CambiosMixin, models.Model):
     ESTADO_CHOICES = [
         ('Por iniciar', 'Por iniciar'),
         ('En proceso', 'En proceso'),
@@ -211,6 +499,11 @@ class Evento(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='evento_creado_idx'),
+        ]
+
     def __str__(self):
         return self.nombre
 
@@ -219,20 +512,20 @@ class Evento(models.Model):
 
         # Lógica de actualización para eventos existentes
         if not is_new:
-            try:
-                evento_anterior = Evento.objects.get(pk=self.pk)
-                if evento_anterior.estado not in ['Finalizado', 'Cancelado'] and self.estado in ['Finalizado', 'Cancelado']:
-                    for item_asignado in self.mobiliario_asignado.all():
-                        if item_asignado.content_object:
-                            item_asignado.content_object.cantidad += item_asignado.cantidad
-                            item_asignado.content_object.save()
+            estado_anterior = self.valor_anterior('estado')
+            if estado_anterior is not None:
+                if estado_anterior not in ['Finalizado', 'Cancelado'] and self.estado in ['Finalizado', 'Cancelado']:
+                    asignaciones = list(self.mobiliario_asignado.all())
+                    devolver_asignaciones(asignaciones)
+                    HistorialMobiliario.archivar(
+                        asignaciones, origen='evento', evento=self, tipo_evento_id=self.tipo_evento_id,
+                        fecha=self.fecha_inicio, estado=self.estado,
+                    )
                     self.mobiliario_asignado.all().delete()
 
                     if self.estado == 'Finalizado':
                         message = f"El evento '{self.nombre}' en '{self.lugar}' ha terminado."
                         Notification.objects.create(message=message)
-            except Evento.DoesNotExist:
-                pass
 
         super().save(*args, **kwargs)  # Guardar el objeto
 
@@ -241,8 +534,15 @@ class Evento(models.Model):
             message = f"Nuevo pedido creado: Evento '{self.nombre}', Fecha: {self.fecha_inicio.strftime('%d/%m/%Y')}, Lugar: {self.lugar}."
             Notification.objects.create(message=message)
 
-class EventoMobiliario(models.Model):
-    evento = models.ForeignKey(Evento, related_name='mobiliario_asignado', on_delete=models.CASCADE)
+class MobiliarioAsignado(models.Model):
+    """
+    Base de las líneas de mobiliario de eventos y degustaciones.
+
+    Además de la referencia genérica al artículo, cada línea guarda una copia
+    de sus datos (categoría, producto, descripción y bodega) tomada al
+    reservar, para que el detalle y los reportes no consulten las tablas de
+    inventario y sigan siendo correctos aunque el artículo cambie o se borre.
+    """
     cantidad = models.PositiveIntegerField()
 
     # Generic foreign key to link to any inventory item model
@@ -250,11 +550,44 @@ class EventoMobiliario(models.Model):
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
 
+    # Copia de los datos del artículo al momento de la reserva
+    categoria = models.CharField(max_length=50, blank=True, default='')
+    producto = models.CharField(max_length=100, blank=True, default='')
+    descripcion = models.TextField(blank=True, null=True)
+    bodega = models.ForeignKey(Bodega, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    bodega_nombre = models.CharField(max_length=100, blank=True, default='')
+
+    class Meta:
+        abstract = True
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='%(class)s_obj_idx'),
+        ]
+
+    def tomar_snapshot(self, item=None):
+        """Copia los datos del artículo (por defecto, content_object) a la línea."""
+        item = item if item is not None else self.content_object
+        if item is None:
+            return
+        self.categoria = str(item._meta.verbose_name)
+        self.producto = item.producto
+        self.descripcion = item.descripcion
+        self.bodega_id = item.bodega_id
+        self.bodega_nombre = item.bodega.nombre if item.bodega_id else ''
+
+    def save(self, *args, **kwargs):
+        if not self.producto:
+            self.tomar_snapshot()
+        super().save(*args, **kwargs)
+
+
+class EventoMobiliario(MobiliarioAsignado):
+    evento = models.ForeignKey(Evento, related_name='mobiliario_asignado', on_delete=models.CASCADE)
+
     def __str__(self):
-        return f'{self.cantidad} x {self.content_object.producto} para {self.evento.nombre}'
+        return f'{self.cantidad} x {self.producto} para {self.evento.nombre}'
 
 
-class Degustacion(models.Model):
+class Degustacion(CambiosMixin, models.Model):
     ESTADO_CHOICES = [
         ('Por iniciar', 'Por iniciar'),
         ('En proceso', 'En proceso'),
@@ -273,38 +606,97 @@ class Degustacion(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='degustacion_creado_idx'),
+        ]
+
     def __str__(self):
         return self.nombre
 
     def save(self, *args, **kwargs):
         if self.pk:
-            try:
-                degustacion_anterior = Degustacion.objects.get(pk=self.pk)
-                if degustacion_anterior.estado not in ['Finalizado', 'Cancelado'] and self.estado in ['Finalizado', 'Cancelado']:
-                    for item_asignado in self.mobiliario_asignado.all():
-                        if item_asignado.content_object:
-                            item_asignado.content_object.cantidad += item_asignado.cantidad
-                            item_asignado.content_object.save()
+            estado_anterior = self.valor_anterior('estado')
+            if estado_anterior is not None:
+                if estado_anterior not in ['Finalizado', 'Cancelado'] and self.estado in ['Finalizado', 'Cancelado']:
+                    asignaciones = list(self.mobiliario_asignado.all())
+                    devolver_asignaciones(asignaciones)
+                    HistorialMobiliario.archivar(
+                        asignaciones, origen='degustacion', degustacion=self,
+                        fecha=self.fecha_degustacion, estado=self.estado,
+                    )
                     self.mobiliario_asignado.all().delete()
 
                     if self.estado == 'Finalizado':
                         message = f"La degustación del evento '{self.nombre}' ha finalizado."
                         Notification.objects.create(message=message)
-            except Degustacion.DoesNotExist:
-                pass
 
         super().save(*args, **kwargs)
 
-class DegustacionMobiliario(models.Model):
+class DegustacionMobiliario(MobiliarioAsignado):
     degustacion = models.ForeignKey(Degustacion, related_name='mobiliario_asignado', on_delete=models.CASCADE)
-    cantidad = models.PositiveIntegerField()
 
-    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
-    object_id = models.PositiveIntegerField()
-    content_object = GenericForeignKey('content_type', 'object_id')
+    def __str__(self):
+        return f'{self.cantidad} x {self.producto} para {self.degustacion.nombre}'
+
+
+class HistorialMobiliario(MobiliarioAsignado):
+    """
+    Mobiliario que usó un evento o una degustación ya cerrados (Finalizado o
+    Cancelado). Las asignaciones se copian aquí antes de borrarse, para poder
+    analizar el uso del inventario a lo largo del tiempo.
+    """
+    ORIGEN_CHOICES = [
+        ('evento', 'Evento'),
+        ('degustacion', 'Degustación'),
+    ]
+
+    origen = models.CharField(max_length=12, choices=ORIGEN_CHOICES)
+    evento = models.ForeignKey(Evento, on_delete=models.SET_NULL, null=True, blank=True, related_name='historial_mobiliario')
+    degustacion = models.ForeignKey(Degustacion, on_delete=models.SET_NULL, null=True, blank=True, related_name='historial_mobiliario')
+    tipo_evento = models.ForeignKey(TipoEvento, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    estado = models.CharField(max_length=20)
+    fecha = models.DateField()
+    archivado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta(MobiliarioAsignado.Meta):
+        indexes = MobiliarioAsignado.Meta.indexes + [
+            models.Index(fields=['estado', 'fecha'], name='historial_estado_fecha_idx'),
+        ]
 
     def __str__(self):
-        return f'{self.cantidad} x {self.content_object.producto} para {self.degustacion.nombre}'
+        return f'{self.cantidad} x {self.producto} ({self.estado}, {self.fecha})'
+
+    @classmethod
+    def archivar(cls, asignaciones, datos_de=None, **datos):
+        """
+        Copia al historial las asignaciones dadas (EventoMobiliario o
+        DegustacionMobiliario) en una sola inserción.
+
+        Args:
+            asignaciones (list): Líneas de mobiliario a archivar.
+            datos_de (callable): Recibe una línea y devuelve campos propios de su
+                fila, cuando se archivan líneas de varios eventos a la vez.
+            **datos: Campos comunes a todas las filas (origen, evento, fecha, estado...).
+        """
+        for linea in asignaciones:
+            if not linea.producto:
+                linea.tomar_snapshot()
+        return cls.objects.bulk_create([
+            cls(
+                content_type_id=linea.content_type_id,
+                object_id=linea.object_id,
+                cantidad=linea.cantidad,
+                categoria=linea.categoria,
+                producto=linea.producto,
+                descripcion=linea.descripcion,
+                bodega_id=linea.bodega_id,
+                bodega_nombre=linea.bodega_nombre,
+                **datos,
+                **(datos_de(linea) if datos_de else {}),
+            )
+            for linea in asignaciones
+        ])
 
 
 class Product(models.Model):
@@ -312,14 +704,161 @@ class Product(models.Model):
     description = models.TextField(blank=True, null=True)
     colors = models.CharField(max_length=255, blank=True, null=True)  # Storing as comma-separated string for simplicity
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # Normalized copy of name for indexed prefix lookups
+    normalized_name = models.CharField(max_length=255, blank=True, default='', editable=False, db_index=True)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalizar(self.name)
+        super().save(*args, **kwargs)
+
 class Notification(models.Model):
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='notification_creado_idx'),
+        ]
+
     def __str__(self):
         return self.message
+
+
+class SolicitudIdempotente(models.Model):
+    """
+    Primera respuesta a una petición enviada con la cabecera Idempotency-Key.
+    Los reintentos con la misma clave (y el mismo usuario) reciben esta
+    respuesta en lugar de volver a ejecutar la operación.
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    clave = models.CharField(max_length=255)
+    metodo = models.CharField(max_length=10)
+    ruta = models.CharField(max_length=255)
+    # sha256 del cuerpo: la misma clave con otro cuerpo es un error del cliente
+    huella = models.CharField(max_length=64)
+    # Nulos solo dentro de la transacción de la primera petición, mientras se atiende
+    estado_http = models.PositiveSmallIntegerField(null=True)
+    respuesta = models.JSONField(null=True, encoder=JSONEncoder)
+    creado_en = models.DateTimeField(auto_now_add=True)
+    expira_en = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'clave'], name='idempotencia_usuario_clave_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.clave} ({self.metodo} {self.ruta} -> {self.estado_http})'
+
+    @classmethod
+    def purgar(cls):
+        """Borra las entradas vencidas; devuelve cuántas se borraron."""
+        return cls.objects.filter(expira_en__lte=timezone.now()).delete()[0]
+
+
+class DemandaArticulo(models.Model):
+    """
+    Demanda histórica acumulada de un artículo por segmento: tipo de evento,
+    rango de personas y temporada (trimestre). inventory.pronostico la
+    actualiza sumando solo las filas nuevas de HistorialMobiliario.
+    """
+    # Límites superiores de los rangos de cantidad_personas (el último no tiene límite)
+    RANGOS_PERSONAS = [50, 100, 200, 400]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    tipo_evento = models.ForeignKey(TipoEvento, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    rango_personas = models.PositiveSmallIntegerField()
+    temporada = models.PositiveSmallIntegerField()
+    eventos = models.PositiveIntegerField(default=0)
+    unidades = models.PositiveBigIntegerField(default=0)
+    # Suma de los cuadrados de las unidades por evento, para la varianza
+    unidades_cuadrado = models.PositiveBigIntegerField(default=0)
+    personas = models.PositiveBigIntegerField(default=0)
+    primera_fecha = models.DateField()
+    ultima_fecha = models.DateField()
+    # Última fila de HistorialMobiliario sumada
+    ultimo_historial_id = models.PositiveBigIntegerField(default=0, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='demanda_articulo_obj_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.content_type_id}:{self.object_id} T{self.temporada} ({self.eventos} eventos)'
+
+    @classmethod
+    def rango_de(cls, personas):
+        for indice, limite in enumerate(cls.RANGOS_PERSONAS):
+            if personas <= limite:
+                return indice
+        return len(cls.RANGOS_PERSONAS)
+
+
+class PuntoReorden(models.Model):
+    """
+    Punto y cantidad de reorden pronosticados de un artículo. El reporte de
+    bajo stock y las alertas los usan en lugar de los umbrales fijos.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    punto_reorden = models.PositiveIntegerField()
+    cantidad_reorden = models.PositiveIntegerField()
+    demanda_semanal = models.FloatField()
+    temporada = models.PositiveSmallIntegerField()
+    eventos_observados = models.PositiveIntegerField()
+    calculado_en = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='punto_reorden_obj_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.content_type_id}:{self.object_id} -> {self.punto_reorden} (+{self.cantidad_reorden})'
+
+
+class Kit(models.Model):
+    """
+    Paquete de mobiliario reutilizable (p. ej. "Boda clásica": una mesa
+    redonda, diez sillas y su mantelería por cada diez invitados). Sus líneas
+    se escalan por la cantidad de personas del evento que lo reserva.
+    """
+    nombre = models.CharField(max_length=100, unique=True)
+    descripcion = models.TextField(blank=True, null=True)
+    tipo_evento = models.ForeignKey(TipoEvento, on_delete=models.SET_NULL, null=True, blank=True, related_name='kits')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.nombre
+
+    def expandir(self, cantidad_personas):
+        """{(content_type_id, object_id): unidades} del kit para un evento de `cantidad_personas`."""
+        unidades = Counter()
+        for linea in self.lineas.all():
+            unidades[(linea.content_type_id, linea.object_id)] += linea.unidades_para(cantidad_personas)
+        return {clave: cantidad for clave, cantidad in unidades.items() if cantidad > 0}
+
+
+class KitLinea(models.Model):
+    kit = models.ForeignKey(Kit, on_delete=models.CASCADE, related_name='lineas')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    cantidad = models.PositiveIntegerField()
+    # `cantidad` unidades por cada `por_personas` invitados (o fracción); vacío: cantidad fija
+    por_personas = models.PositiveIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.cantidad} x {self.content_type_id}:{self.object_id} ({self.kit_id})'
+
+    def unidades_para(self, cantidad_personas):
+        if not self.por_personas:
+            return self.cantidad
+        return self.cantidad * math.ceil(cantidad_personas / self.por_personas)
@@ -0,0 +1,29 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """
+    Paginación por cursor que solo se activa cuando el cliente la pide con
+    ?page_size=N o ?cursor=..., para no romper las pantallas que esperan la
+    lista completa.
+
+    El orden se toma del atributo `cursor_ordering` de la vista; si no existe,
+    se usa -created_at (con -id para desempatar) cuando el modelo tiene ese
+    campo, o -id en caso contrario. Esos campos están indexados.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering is None:
+            campos = {field.name for field in queryset.model._meta.get_fields()}
+            ordering = ('-created_at', '-id') if 'created_at' in campos else ('-id',)
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
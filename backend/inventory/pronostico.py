@@ -0,0 +1,228 @@
+"""
+Pronóstico de demanda y puntos de reorden a partir del historial de mobiliario.
+
+actualizar() hace dos pasos:
+
+1. Suma a DemandaArticulo las filas de HistorialMobiliario (eventos y
+   degustaciones finalizados) posteriores a la última ya sumada, agrupadas por
+   artículo y evento y clasificadas por tipo de evento, rango de personas y
+   temporada (trimestre). El costo depende de las filas nuevas, no del tamaño
+   del historial.
+2. Recalcula PuntoReorden de cada artículo con demanda a partir de esos
+   acumulados (su tamaño no crece con el historial): para la temporada del
+   periodo de reabastecimiento se estima la frecuencia de eventos que usan el
+   artículo y las unidades por evento, y con ellas
+
+       punto de reorden  = demanda esperada en REORDER_LEAD_DAYS
+                           + REORDER_SERVICE_Z * desviación de esa demanda
+       cantidad de reorden = demanda esperada en REORDER_CYCLE_DAYS
+
+   La demanda en un plazo se modela como una suma de eventos (Poisson
+   compuesta): su varianza es eventos esperados * E[unidades²].
+
+   Las unidades por evento se promedian por segmento (tipo de evento y rango
+   de personas) ponderando cada uno por los eventos ya reservados en el
+   periodo de reabastecimiento: si vienen bodas grandes pesan más las bodas
+   grandes del historial. Sin reservas que coincidan con algún segmento se
+   pondera por el número de eventos del historial.
+"""
+import math
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import cache
+from .models import Degustacion, DemandaArticulo, Evento, HistorialMobiliario, PuntoReorden
+from .transiciones import ABIERTOS
+
+
+def temporada_de(fecha):
+    return (fecha.month - 1) // 3 + 1
+
+
+def dias_de_temporada(desde, hasta, temporada):
+    """Días entre `desde` y `hasta` (incluidos) que caen en la temporada dada."""
+    dias = 0
+    for anio in range(desde.year, hasta.year + 1):
+        inicio = date(anio, 3 * temporada - 2, 1)
+        fin = date(anio + 1, 1, 1) if temporada == 4 else date(anio, 3 * temporada + 1, 1)
+        dias += max(0, (min(fin, hasta + timedelta(days=1)) - max(inicio, desde)).days)
+    return dias
+
+
+@transaction.atomic
+def acumular():
+    """Suma a DemandaArticulo el historial nuevo; devuelve cuántos (artículo, evento) se sumaron."""
+    marca = DemandaArticulo.objects.aggregate(marca=Coalesce(Max('ultimo_historial_id'), 0))['marca']
+    # Una fila por artículo y evento (o degustación): un evento puede tener varias líneas del mismo artículo
+    nuevos = list(
+        HistorialMobiliario.objects.filter(pk__gt=marca, estado='Finalizado')
+        .values('content_type_id', 'object_id', 'evento_id', 'degustacion_id', 'tipo_evento_id', 'fecha')
+        .annotate(
+            unidades=Sum('cantidad'),
+            personas=Coalesce(Max('evento__cantidad_personas'), Max('degustacion__cantidad_personas'), 0),
+            ultimo=Max('id'),
+        )
+        .order_by()
+    )
+    if not nuevos:
+        return 0
+
+    segmentos, duplicados = {}, []
+    for segmento in existentes({(fila['content_type_id'], fila['object_id']) for fila in nuevos}):
+        clave = (segmento.content_type_id, segmento.object_id, segmento.tipo_evento_id,
+                 segmento.rango_personas, segmento.temporada)
+        if clave in segmentos:
+            # Al borrar un tipo de evento sus segmentos quedan sin tipo y pueden repetirse
+            sumar(segmentos[clave], segmento)
+            duplicados.append(segmento.pk)
+        else:
+            segmentos[clave] = segmento
+
+    nuevos_segmentos = []
+    for fila in nuevos:
+        clave = (fila['content_type_id'], fila['object_id'], fila['tipo_evento_id'],
+                 DemandaArticulo.rango_de(fila['personas']), temporada_de(fila['fecha']))
+        segmento = segmentos.get(clave)
+        if segmento is None:
+            segmento = segmentos[clave] = DemandaArticulo(
+                content_type_id=clave[0], object_id=clave[1], tipo_evento_id=clave[2], rango_personas=clave[3],
+                temporada=clave[4], primera_fecha=fila['fecha'], ultima_fecha=fila['fecha'],
+            )
+            nuevos_segmentos.append(segmento)
+        sumar(segmento, DemandaArticulo(
+            eventos=1, unidades=fila['unidades'], unidades_cuadrado=fila['unidades'] ** 2,
+            personas=fila['personas'], primera_fecha=fila['fecha'], ultima_fecha=fila['fecha'],
+            ultimo_historial_id=fila['ultimo'],
+        ))
+
+    DemandaArticulo.objects.filter(pk__in=duplicados).delete()
+    DemandaArticulo.objects.bulk_create(nuevos_segmentos, batch_size=500)
+    DemandaArticulo.objects.bulk_update(
+        [segmento for segmento in segmentos.values() if segmento.pk is not None],
+        ['eventos', 'unidades', 'unidades_cuadrado', 'personas', 'primera_fecha', 'ultima_fecha',
+         'ultimo_historial_id'],
+        batch_size=500,
+    )
+    return len(nuevos)
+
+
+def existentes(articulos):
+    """Segmentos ya guardados de los artículos dados ({(content_type_id, object_id)}), por bloques."""
+    por_categoria = defaultdict(list)
+    for content_type_id, object_id in articulos:
+        por_categoria[content_type_id].append(object_id)
+    for content_type_id, object_ids in por_categoria.items():
+        for inicio in range(0, len(object_ids), 500):
+            yield from DemandaArticulo.objects.filter(
+                content_type_id=content_type_id, object_id__in=object_ids[inicio:inicio + 500]
+            )
+
+
+def sumar(segmento, otro):
+    segmento.eventos += otro.eventos
+    segmento.unidades += otro.unidades
+    segmento.unidades_cuadrado += otro.unidades_cuadrado
+    segmento.personas += otro.personas
+    segmento.primera_fecha = min(segmento.primera_fecha, otro.primera_fecha)
+    segmento.ultima_fecha = max(segmento.ultima_fecha, otro.ultima_fecha)
+    segmento.ultimo_historial_id = max(segmento.ultimo_historial_id, otro.ultimo_historial_id)
+
+
+def mezcla_reservada(hoy):
+    """
+    Eventos y degustaciones abiertos que empiezan en el periodo de
+    reabastecimiento, contados por segmento: {(tipo_evento_id, rango_personas): n}.
+    """
+    hasta = hoy + timedelta(days=settings.REORDER_LEAD_DAYS)
+    mezcla = defaultdict(int)
+    eventos = Evento.objects.filter(estado__in=ABIERTOS, fecha_inicio__range=(hoy, hasta))
+    for tipo_evento_id, personas in eventos.values_list('tipo_evento_id', 'cantidad_personas'):
+        mezcla[(tipo_evento_id, DemandaArticulo.rango_de(personas))] += 1
+    # El historial de las degustaciones no tiene tipo de evento
+    degustaciones = Degustacion.objects.filter(estado__in=ABIERTOS, fecha_degustacion__range=(hoy, hasta))
+    for personas in degustaciones.values_list('cantidad_personas', flat=True):
+        mezcla[(None, DemandaArticulo.rango_de(personas))] += 1
+    return mezcla
+
+
+def punto_de_reorden(segmentos, hoy, mezcla=None):
+    """
+    Calcula el punto y la cantidad de reorden de un artículo a partir de sus
+    segmentos (dicts con los campos de DemandaArticulo) y de la mezcla de
+    eventos reservados (ver mezcla_reservada).
+    """
+    plazo = settings.REORDER_LEAD_DAYS
+    temporada = temporada_de(hoy + timedelta(days=plazo))
+    desde = min(segmento['primera_fecha'] for segmento in segmentos)
+    de_temporada = [segmento for segmento in segmentos if segmento['temporada'] == temporada and segmento['eventos']]
+    eventos = sum(segmento['eventos'] for segmento in de_temporada)
+
+    if eventos:
+        # Eventos por día en los días de esa temporada cubiertos por el historial (al menos una semana)
+        frecuencia = eventos / max(dias_de_temporada(desde, hoy, temporada), 7)
+        pesos = [(mezcla or {}).get((segmento['tipo_evento_id'], segmento['rango_personas']), 0)
+                 for segmento in de_temporada]
+        if not any(pesos):
+            pesos = [segmento['eventos'] for segmento in de_temporada]
+        total = sum(pesos)
+        media = sum(peso * segmento['unidades'] / segmento['eventos']
+                    for peso, segmento in zip(pesos, de_temporada)) / total
+        segundo_momento = sum(peso * segmento['unidades_cuadrado'] / segmento['eventos']
+                              for peso, segmento in zip(pesos, de_temporada)) / total
+    else:
+        frecuencia = media = segundo_momento = 0
+
+    esperados = frecuencia * plazo
+    punto = esperados * media + settings.REORDER_SERVICE_Z * math.sqrt(esperados * segundo_momento)
+    return {
+        # Un artículo agotado siempre debe aparecer como bajo stock
+        'punto_reorden': max(1, math.ceil(punto)),
+        'cantidad_reorden': math.ceil(frecuencia * settings.REORDER_CYCLE_DAYS * media),
+        'demanda_semanal': round(frecuencia * 7 * media, 3),
+        'temporada': temporada,
+        'eventos_observados': sum(segmento['eventos'] for segmento in segmentos),
+    }
+
+
+@transaction.atomic
+def recalcular(hoy=None):
+    """Recalcula PuntoReorden de todos los artículos con demanda; devuelve cuántos."""
+    hoy = hoy or timezone.localdate()
+    por_articulo = defaultdict(list)
+    for segmento in DemandaArticulo.objects.values(
+        'content_type_id', 'object_id', 'tipo_evento_id', 'rango_personas', 'temporada', 'eventos', 'unidades',
+        'unidades_cuadrado', 'primera_fecha'
+    ).iterator():
+        por_articulo[(segmento['content_type_id'], segmento['object_id'])].append(segmento)
+
+    ahora = timezone.now()
+    mezcla = mezcla_reservada(hoy)
+    puntos = [
+        PuntoReorden(content_type_id=content_type_id, object_id=object_id, calculado_en=ahora,
+                     **punto_de_reorden(segmentos, hoy, mezcla))
+        for (content_type_id, object_id), segmentos in por_articulo.items()
+    ]
+    PuntoReorden.objects.bulk_create(
+        puntos, batch_size=500, update_conflicts=True, unique_fields=['content_type', 'object_id'],
+        update_fields=['punto_reorden', 'cantidad_reorden', 'demanda_semanal', 'temporada', 'eventos_observados',
+                       'calculado_en'],
+    )
+    # bulk_create no dispara post_save: el reporte de bajo stock depende de estos valores
+    cache.invalidar_al_confirmar(cache.INVENTARIO, cache.tabla(DemandaArticulo), cache.tabla(PuntoReorden))
+    return len(puntos)
+
+
+def actualizar(hoy=None):
+    """
+    Suma el historial nuevo y recalcula los puntos de reorden.
+
+    Returns:
+        dict: {'acumulados': n, 'articulos': n}.
+    """
+    return {'acumulados': acumular(), 'articulos': recalcular(hoy)}
@@ -0,0 +1,177 @@
+"""
+Proyección diaria del stock disponible de cada artículo.
+
+El stock se descuenta al reservar, así que `cantidad` no dice cuándo vuelven
+las unidades ni cuándo se usan. La proyección parte de las existencias de cada
+artículo que no están en mantenimiento (`existencias`, el total propio) y le
+resta, día por día, lo que está en uso: una línea de mobiliario cuenta desde
+la fecha de inicio de su evento hasta la fecha en que termina (inicio +
+EVENT_DURATION_HOURS / DEGUSTACION_DURATION_HOURS), que es cuando
+transicionar_eventos devuelve las unidades.
+
+El cálculo es una suma acumulada sobre una matriz artículos x días de
+variaciones (+unidades al empezar, -unidades al día siguiente de terminar).
+Con NumPy es una operación vectorizada; sin NumPy se usa
+itertools.accumulate fila por fila.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+
+from .models import (
+    Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge, Periquera, Carpa, PistaTarima, Extra,
+    EventoMobiliario, DegustacionMobiliario
+)
+from .transiciones import ABIERTOS
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependencia opcional
+    np = None
+
+
+MODELOS = [Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge, Periquera, Carpa, PistaTarima, Extra]
+
+
+def motor():
+    return 'numpy' if np is not None else 'python'
+
+
+def articulos(seleccion):
+    """seleccion: [(modelo, pks)]; pks None incluye todos los artículos del modelo."""
+    filas = []
+    for model, pks in seleccion:
+        content_type_id = ContentType.objects.get_for_model(model).id
+        queryset = model.objects.order_by('pk')
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        for pk, producto, bodega, cantidad, mantenimiento, existencias in queryset.values_list(
+            'pk', 'producto', 'bodega__nombre', 'cantidad', 'cantidad_en_mantenimiento', 'existencias'
+        ):
+            filas.append({
+                'model': model._meta.model_name, 'content_type_id': content_type_id, 'id': pk, 'producto': producto,
+                'bodega_nombre': bodega, 'cantidad': cantidad, 'cantidad_en_mantenimiento': mantenimiento,
+                'existencias': existencias,
+            })
+    return filas
+
+
+def reservas_abiertas(content_type_ids, object_ids=None):
+    """
+    Líneas de mobiliario de eventos y degustaciones abiertos, como tuplas
+    (content_type_id, object_id, unidades, inicio, fin, origen, id del evento).
+    """
+    fuentes = [
+        (EventoMobiliario, 'evento', 'fecha_inicio', 'hora_inicio', settings.EVENT_DURATION_HOURS),
+        (DegustacionMobiliario, 'degustacion', 'fecha_degustacion', 'hora_degustacion', settings.DEGUSTACION_DURATION_HOURS),
+    ]
+    for lineas, origen, fecha, hora, horas in fuentes:
+        filas = lineas.objects.filter(content_type_id__in=content_type_ids, **{f'{origen}__estado__in': ABIERTOS})
+        if object_ids is not None:
+            filas = filas.filter(object_id__in=object_ids)
+        filas = filas.values_list(
+            'content_type_id', 'object_id', 'cantidad', f'{origen}__{fecha}', f'{origen}__{hora}', f'{origen}_id'
+        )
+        for content_type_id, object_id, cantidad, dia, hora_inicio, evento_id in filas.iterator():
+            fin = (datetime.combine(dia, hora_inicio) + timedelta(hours=horas)).date()
+            yield content_type_id, object_id, cantidad, dia, fin, origen, evento_id
+
+
+def proyectar(modelos=None, item_id=None, inicio=None, horizonte=90, minimo=0):
+    """
+    Calcula la proyección de los artículos pedidos.
+
+    Args:
+        modelos (list): Categorías a incluir (por defecto las 11).
+        item_id (int): Limita la proyección a un artículo de la categoría.
+        inicio (date): Primer día de la proyección (hoy).
+        horizonte (int): Número de días proyectados.
+        minimo (int): Un día con menos unidades disponibles se marca como faltante.
+
+    Returns:
+        list: Un dict por artículo con su serie diaria ('projection') y el
+        resumen de faltantes.
+    """
+    seleccion = [(model, [item_id] if item_id is not None else None) for model in modelos or MODELOS]
+    resultado = []
+    for articulo in disponibles(seleccion, inicio, horizonte):
+        serie = articulo['projection']
+        dia_minimo = min(range(horizonte), key=serie.__getitem__)
+        faltantes = [dia for dia, valor in enumerate(serie) if valor < minimo]
+        articulo.pop('content_type_id')
+        resultado.append({
+            **articulo,
+            'min_projected': serie[dia_minimo],
+            'min_date': inicio + timedelta(days=dia_minimo),
+            'first_shortage': inicio + timedelta(days=faltantes[0]) if faltantes else None,
+            'shortage_days': len(faltantes),
+        })
+    return resultado
+
+
+def disponibles(seleccion, inicio, horizonte):
+    """
+    Serie diaria de unidades disponibles de los artículos seleccionados.
+
+    Args:
+        seleccion (list): [(modelo, pks)]; pks None incluye todo el modelo.
+        inicio (date): Primer día de la serie.
+        horizonte (int): Número de días.
+
+    Returns:
+        list: Los artículos (dicts con model, content_type_id, id, producto,
+        cantidad...) con 'reservado' y 'projection'.
+    """
+    seleccionados = articulos(seleccion)
+    if not seleccionados:
+        return []
+    fila_de = {(a['content_type_id'], a['id']): i for i, a in enumerate(seleccionados)}
+    object_ids = None
+    if all(pks is not None for _, pks in seleccion):
+        object_ids = {a['id'] for a in seleccionados}
+
+    filas, desde, hasta, unidades = [], [], [], []
+    reservado = defaultdict(int)
+    for content_type_id, object_id, cantidad, dia, fin, *_ in reservas_abiertas(
+        {a['content_type_id'] for a in seleccionados}, object_ids
+    ):
+        fila = fila_de.get((content_type_id, object_id))
+        if fila is None:
+            continue
+        reservado[fila] += cantidad
+        # Un evento vencido que aún no se cierra sigue ocupando sus unidades hoy
+        filas.append(fila)
+        desde.append(min(max((dia - inicio).days, 0), horizonte))
+        hasta.append(min(max((fin - inicio).days + 1, 1), horizonte))
+        unidades.append(cantidad)
+
+    base = [a['existencias'] - a['cantidad_en_mantenimiento'] for a in seleccionados]
+    series = _series_numpy if np is not None else _series_python
+    for i, serie in enumerate(series(len(seleccionados), horizonte, base, filas, desde, hasta, unidades)):
+        seleccionados[i]['reservado'] = reservado[i]
+        seleccionados[i]['projection'] = serie
+    return seleccionados
+
+
+def _series_numpy(n, horizonte, base, filas, desde, hasta, unidades):
+    variaciones = np.zeros((n, horizonte + 1), dtype=np.int64)
+    filas = np.asarray(filas, dtype=np.int64)
+    unidades = np.asarray(unidades, dtype=np.int64)
+    np.add.at(variaciones, (filas, np.asarray(desde, dtype=np.int64)), unidades)
+    np.add.at(variaciones, (filas, np.asarray(hasta, dtype=np.int64)), -unidades)
+    en_uso = np.cumsum(variaciones[:, :horizonte], axis=1)
+    return (np.asarray(base, dtype=np.int64)[:, None] - en_uso).tolist()
+
+
+def _series_python(n, horizonte, base, filas, desde, hasta, unidades):
+    variaciones = [[0] * (horizonte + 1) for _ in range(n)]
+    for fila, d, h, u in zip(filas, desde, hasta, unidades):
+        variaciones[fila][d] += u
+        variaciones[fila][h] -= u
+    return [
+        [total - en_uso for en_uso in accumulate(variaciones[fila][:horizonte])]
+        for fila, total in enumerate(base)
+    ]
@@ -0,0 +1,174 @@
+"""
+Búsqueda global del inventario sobre un índice FTS5 de SQLite.
+
+La tabla virtual `inventory_busqueda` guarda una fila por artículo de las 11
+categorías (producto, descripción, categoría y bodega). El tokenizador
+unicode61 con remove_diacritics ignora los acentos y la consulta se normaliza
+con unidecode, así que "manteleria" encuentra "Mantelería". Los signals de
+inventory.signals mantienen el índice al día en cada save()/delete(); las
+cargas masivas (bulk_create, restauración de respaldos) deben llamar a
+reconstruir().
+"""
+import re
+
+import unidecode
+from django.db import connection
+
+from .models import (
+    Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge, Periquera, Carpa, PistaTarima, Extra
+)
+
+
+TABLA = 'inventory_busqueda'
+
+# El orden es parte del formato del índice: rowid = id del artículo * 16 + posición del modelo
+MODELOS = [Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge, Periquera, Carpa, PistaTarima, Extra]
+
+# Peso de cada columna indexada en el ranking bm25
+PESOS = {'producto': 10.0, 'descripcion': 2.0, 'categoria': 1.0, 'bodega': 1.0}
+
+
+def disponible():
+    return connection.vendor == 'sqlite'
+
+
+def crear_tabla(cursor):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA} USING fts5("
+        "producto, descripcion, categoria, bodega, modelo UNINDEXED, item_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+def _posicion(model):
+    nombre = model._meta.model_name
+    return next(i for i, m in enumerate(MODELOS) if m._meta.model_name == nombre)
+
+
+def _rowid(model, item_id):
+    return item_id * 16 + _posicion(model)
+
+
+def _fila(model, item, bodega_nombre):
+    return (
+        _rowid(model, item.pk), item.producto, item.descripcion or '', str(model._meta.verbose_name),
+        bodega_nombre or '', model._meta.model_name, item.pk,
+    )
+
+
+def _insertar(cursor, filas):
+    cursor.executemany(
+        f'INSERT INTO {TABLA} (rowid, producto, descripcion, categoria, bodega, modelo, item_id) '
+        'VALUES (%s, %s, %s, %s, %s, %s, %s)',
+        filas
+    )
+
+
+def indexar(item):
+    """Agrega o reemplaza un artículo en el índice."""
+    if not disponible():
+        return
+    model = type(item)
+    bodega_nombre = item.bodega.nombre if item.bodega_id else ''
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA} WHERE rowid = %s', [_rowid(model, item.pk)])
+        _insertar(cursor, [_fila(model, item, bodega_nombre)])
+
+
+def eliminar(model, item_id):
+    if not disponible():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA} WHERE rowid = %s', [_rowid(model, item_id)])
+
+
+def reindexar_bodega(bodega):
+    """Actualiza el nombre de bodega de todos sus artículos (tras renombrarla)."""
+    if not disponible():
+        return
+    with connection.cursor() as cursor:
+        for model in MODELOS:
+            items = list(model.objects.filter(bodega=bodega))
+            cursor.executemany(
+                f'DELETE FROM {TABLA} WHERE rowid = %s', [(_rowid(model, item.pk),) for item in items]
+            )
+            _insertar(cursor, [_fila(model, item, bodega.nombre) for item in items])
+
+
+def reconstruir(modelos=None, using=None):
+    """
+    Vacía y vuelve a llenar el índice con todos los artículos.
+
+    Args:
+        modelos (list): Clases de las 11 categorías en el orden de MODELOS (por
+            defecto las actuales; las migraciones pasan sus modelos históricos).
+        using (BaseDatabaseWrapper): Conexión a usar (por defecto la principal).
+
+    Returns:
+        int: Número de artículos indexados.
+    """
+    conexion = using or connection
+    if conexion.vendor != 'sqlite':
+        return 0
+    modelos = modelos or MODELOS
+    total = 0
+    with conexion.cursor() as cursor:
+        crear_tabla(cursor)
+        cursor.execute(f'DELETE FROM {TABLA}')
+        for posicion, model in enumerate(modelos):
+            filas = [
+                (item_id * 16 + posicion, producto, descripcion or '', str(model._meta.verbose_name),
+                 bodega or '', model._meta.model_name, item_id)
+                for item_id, producto, descripcion, bodega in model._default_manager.using(conexion.alias).values_list(
+                    'id', 'producto', 'descripcion', 'bodega__nombre'
+                ).iterator()
+            ]
+            _insertar(cursor, filas)
+            total += len(filas)
+    return total
+
+
+def expresion(texto):
+    """
+    Convierte el texto del usuario en una expresión MATCH segura: cada palabra
+    normalizada se busca como prefijo y todas deben aparecer.
+    """
+    palabras = re.findall(r'\w+', unidecode.unidecode(texto).lower())
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def buscar(texto, limite=20, desplazamiento=0):
+    """
+    Busca en las 11 categorías a la vez y ordena por relevancia (bm25).
+
+    Returns:
+        tuple: (total de coincidencias, lista de resultados de la página).
+    """
+    consulta = expresion(texto)
+    if not consulta:
+        return 0, []
+    pesos = ', '.join(str(peso) for peso in PESOS.values())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            # bm25() no puede convivir con una función de ventana en el mismo SELECT
+            f'SELECT *, count(*) OVER () AS total FROM ('
+            f'SELECT modelo, item_id, producto, descripcion, categoria, bodega, bm25({TABLA}, {pesos}) AS rank '
+            f'FROM {TABLA} WHERE {TABLA} MATCH %s'
+            f') ORDER BY rank LIMIT %s OFFSET %s',
+            [consulta, limite, desplazamiento]
+        )
+        filas = cursor.fetchall()
+        if not filas:
+            if not desplazamiento:
+                return 0, []
+            # Página fuera de rango: el total se cuenta aparte
+            cursor.execute(f'SELECT count(*) FROM {TABLA} WHERE {TABLA} MATCH %s', [consulta])
+            return cursor.fetchone()[0], []
+    resultados = [
+        {
+            'modelo': modelo, 'id': item_id, 'producto': producto, 'descripcion': descripcion,
+            'categoria': categoria, 'bodega_nombre': bodega, 'rank': round(-rank, 4),
+        }
+        for modelo, item_id, producto, descripcion, categoria, bodega, rank, _ in filas
+    ]
+    return filas[0][-1], resultados
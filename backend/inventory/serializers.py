@@ -1,29 +1,123 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import (
     TipoEvento, Bodega, Cliente, Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge, 
-    Periquera, Carpa, PistaTarima, Extra, Evento, EventoMobiliario, Degustacion, DegustacionMobiliario, Product, Notification
+    Periquera, Carpa, PistaTarima, Extra, Evento, EventoMobiliario, Degustacion, DegustacionMobiliario, Product, Notification,
+    Kit, KitLinea
 )
 from django.contrib.contenttypes.models import ContentType
 
-class TipoEventoSerializer(serializers.ModelSerializer):
+
+def parametro_lista(request, nombre):
+    """Lee un parámetro separado por comas (?fields=a,b). Devuelve None si no viene."""
+    if request is None or nombre not in request.query_params:
+        return None
+    return {valor.strip() for valor in request.query_params[nombre].split(',') if valor.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Permite pedir solo algunos campos (?fields=id,producto) y expandir relaciones
+    (?expand=bodega) en las peticiones GET. Solo aplica al serializer raíz de la
+    respuesta, no a los anidados.
+
+    `expandable_fields` relaciona cada campo expandible con el serializer que lo
+    representa, como {'bodega': 'BodegaSerializer'} (nombre de una clase de
+    este módulo) o {'bodega': (BodegaSerializer, {'source': 'bodega'})}.
+    """
+    expandable_fields = {}
+
+    def _es_raiz(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method != 'GET' or not self._es_raiz():
+            return fields
+
+        for nombre in (parametro_lista(request, 'expand') or set()) & set(self.expandable_fields):
+            serializer_class, kwargs = self.expandable_fields[nombre], {}
+            if isinstance(serializer_class, tuple):
+                serializer_class, kwargs = serializer_class
+            if isinstance(serializer_class, str):
+                serializer_class = globals()[serializer_class]
+            fields[nombre] = serializer_class(read_only=True, **kwargs)
+
+        solicitados = parametro_lista(request, 'fields')
+        if solicitados:
+            for nombre in set(fields) - solicitados:
+                fields.pop(nombre)
+        return fields
+
+
+class TipoEventoSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = TipoEvento
         fields = ['id', 'nombre', 'descripcion']
 
-class BodegaSerializer(serializers.ModelSerializer):
+class BodegaSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Bodega
         fields = ['id', 'nombre', 'ubicacion', 'descripcion']
 
-class InventarioItemSerializer(serializers.ModelSerializer):
+class InventarioItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     bodega_nombre = serializers.CharField(source='bodega.nombre', read_only=True)
+    expandable_fields = {'bodega': 'BodegaSerializer'}
 
     class Meta:
-        fields = ['id', 'producto', 'descripcion', 'cantidad', 'cantidad_en_mantenimiento', 'bodega', 'bodega_nombre', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at', 'bodega_nombre']
+        fields = ['id', 'producto', 'descripcion', 'cantidad', 'cantidad_en_mantenimiento', 'existencias', 'bodega', 'bodega_nombre', 'version', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at', 'bodega_nombre', 'version']
+        extra_kwargs = {'existencias': {'required': False}}
+
+    def validate(self, attrs):
+        """
+        Las existencias solo cambian si la petición las trae: editar `cantidad`
+        o `cantidad_en_mantenimiento` no las toca. Si llegan existencias
+        distintas, el disponible se mueve en la misma diferencia (menos lo que
+        cambie el mantenimiento), como un conteo físico, y entonces no se
+        acepta además una `cantidad` distinta. Ningún cambio por esta vía puede
+        dejar `cantidad` negativa; eso solo lo hace la acción `existencias`.
+        """
+        item = self.instance
+        anterior = {
+            campo: getattr(item, campo) if item is not None else 0
+            for campo in ('cantidad', 'cantidad_en_mantenimiento', 'existencias')
+        }
+        nuevo = {campo: attrs.get(campo, valor) for campo, valor in anterior.items()}
+        if item is None and 'existencias' not in attrs:
+            nuevo['existencias'] = nuevo['cantidad'] + nuevo['cantidad_en_mantenimiento']
+
+        if item is None:
+            if 'existencias' in attrs and nuevo['existencias'] < nuevo['cantidad'] + nuevo['cantidad_en_mantenimiento']:
+                raise serializers.ValidationError(
+                    {'existencias': 'Las existencias no pueden ser menores que la cantidad más lo que está en mantenimiento.'}
+                )
+        elif nuevo['existencias'] != anterior['existencias']:
+            if nuevo['cantidad'] != anterior['cantidad']:
+                raise serializers.ValidationError(
+                    {'cantidad': 'Envía la cantidad o las existencias, no ambas: la cantidad se calcula de las existencias.'}
+                )
+            nuevo['cantidad'] = (
+                anterior['cantidad'] + nuevo['existencias'] - anterior['existencias']
+                - nuevo['cantidad_en_mantenimiento'] + anterior['cantidad_en_mantenimiento']
+            )
+            attrs['cantidad'] = nuevo['cantidad']
+
+        for campo in ('cantidad', 'cantidad_en_mantenimiento'):
+            if nuevo[campo] != anterior[campo] and nuevo[campo] < 0:
+                raise serializers.ValidationError({campo: 'No puede quedar en negativo.'})
+        if nuevo['existencias'] < nuevo['cantidad_en_mantenimiento']:
+            raise serializers.ValidationError(
+                {'existencias': 'Las existencias no pueden ser menores que las unidades en mantenimiento.'}
+            )
+        return attrs
+
+
+class ClienteSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'tipo_evento': 'TipoEventoSerializer'}
 
-
-class ClienteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cliente
         fields = ['id', 'nombre', 'apellido', 'tipo_evento', 'cantidad_aprox', 'numero', 'comentarios']
@@ -74,14 +168,21 @@ class ExtraSerializer(InventarioItemSerializer):
 
 
 class EventoMobiliarioSerializer(serializers.ModelSerializer):
-    # Campo para obtener el nombre del producto del mobiliario (solo lectura)
-    producto_nombre = serializers.CharField(source='content_object.producto', read_only=True)
+    # Nombre del producto tomado de la copia guardada al reservar (solo lectura)
+    producto_nombre = serializers.CharField(source='producto', read_only=True)
     # Campo para identificar el tipo de modelo de mobiliario (ej. 'silla', 'mesa')
-    content_type_name = serializers.CharField(source='content_type.model', read_only=True)
+    content_type_name = serializers.SerializerMethodField()
 
     class Meta:
         model = EventoMobiliario
-        fields = ['id', 'cantidad', 'content_type', 'object_id', 'producto_nombre', 'content_type_name']
+        fields = [
+            'id', 'cantidad', 'content_type', 'object_id', 'producto_nombre', 'content_type_name',
+            'categoria', 'descripcion', 'bodega', 'bodega_nombre'
+        ]
+
+    def get_content_type_name(self, obj):
+        # ContentType guarda sus filas en caché: no hace falta unir con su tabla
+        return ContentType.objects.get_for_id(obj.content_type_id).model
 
 
 class MobiliarioField(serializers.Field):
@@ -94,34 +195,57 @@ class MobiliarioField(serializers.Field):
         return data
 
 
-class EventoSerializer(serializers.ModelSerializer):
+class EventoSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Serializer anidado para mostrar el mobiliario asignado (solo lectura)
     mobiliario_asignado = EventoMobiliarioSerializer(many=True, read_only=True)
     # Campo para recibir la lista de mobiliario en la creación/actualización (solo escritura)
     mobiliario = MobiliarioField(write_only=True, required=False)
+    # Kit de mobiliario a reservar al crear el evento, escalado por cantidad_personas (solo escritura)
+    kit = serializers.PrimaryKeyRelatedField(queryset=Kit.objects.all(), write_only=True, required=False)
     # Campo para mostrar el nombre del tipo de evento (solo lectura)
     tipo_evento_nombre = serializers.CharField(source='tipo_evento.nombre', read_only=True)
+    expandable_fields = {'tipo_evento': 'TipoEventoSerializer'}
 
     class Meta:
         model = Evento
         fields = [
             'id', 'nombre', 'tipo_evento', 'tipo_evento_nombre', 'cantidad_personas', 'responsable', 
-            'lugar', 'estado', 'fecha_inicio', 'hora_inicio', 'mobiliario_asignado', 'mobiliario',
+            'lugar', 'estado', 'fecha_inicio', 'hora_inicio', 'mobiliario_asignado', 'mobiliario', 'kit',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
 
-class DegustacionMobiliarioSerializer(serializers.ModelSerializer):
-    producto_nombre = serializers.CharField(source='content_object.producto', read_only=True)
-    content_type_name = serializers.CharField(source='content_type.model', read_only=True)
+class EventoListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Representación ligera para el listado de eventos: solo campos escalares y
+    los totales del mobiliario, que llegan anotados desde la consulta
+    (total_lineas, total_unidades). El detalle usa EventoSerializer.
+    """
+    tipo_evento_nombre = serializers.CharField(source='tipo_evento.nombre', read_only=True)
+    total_lineas = serializers.IntegerField(read_only=True)
+    total_unidades = serializers.IntegerField(read_only=True)
+    expandable_fields = {
+        'tipo_evento': 'TipoEventoSerializer',
+        'mobiliario_asignado': ('EventoMobiliarioSerializer', {'many': True}),
+    }
 
     class Meta:
+        model = Evento
+        fields = [
+            'id', 'nombre', 'tipo_evento', 'tipo_evento_nombre', 'cantidad_personas', 'responsable',
+            'lugar', 'estado', 'fecha_inicio', 'hora_inicio', 'total_lineas', 'total_unidades',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class DegustacionMobiliarioSerializer(EventoMobiliarioSerializer):
+    class Meta(EventoMobiliarioSerializer.Meta):
         model = DegustacionMobiliario
-        fields = ['id', 'cantidad', 'content_type', 'object_id', 'producto_nombre', 'content_type_name']
 
 
-class DegustacionSerializer(serializers.ModelSerializer):
+class DegustacionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     mobiliario_asignado = DegustacionMobiliarioSerializer(many=True, read_only=True)
     mobiliario = MobiliarioField(write_only=True, required=False)
 
@@ -135,13 +259,31 @@ class DegustacionSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class DegustacionListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Representación ligera para el listado de degustaciones (ver EventoListSerializer)."""
+    total_lineas = serializers.IntegerField(read_only=True)
+    total_unidades = serializers.IntegerField(read_only=True)
+    expandable_fields = {
+        'mobiliario_asignado': ('DegustacionMobiliarioSerializer', {'many': True}),
+    }
+
+    class Meta:
+        model = Degustacion
+        fields = [
+            'id', 'nombre', 'cantidad_personas', 'responsable', 'alimentos', 'estado',
+            'fecha_degustacion', 'hora_degustacion', 'fecha_evento', 'total_lineas', 'total_unidades',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = ('id', 'name', 'description', 'colors', 'image')
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ['id', 'message', 'created_at', 'is_read']
@@ -152,4 +294,103 @@ class CalendarActivitySerializer(serializers.Serializer):
     start = serializers.DateTimeField()
     end = serializers.DateTimeField()
     type = serializers.CharField()
-    details = serializers.DictField()
\ No newline at end of file
+    details = serializers.DictField()
+
+class LineaMobiliarioSerializer(serializers.Serializer):
+    """Línea de mobiliario con el formato que envía el frontend al reservar."""
+    content_type_id = serializers.IntegerField()
+    object_id = serializers.IntegerField(min_value=1)
+    cantidad = serializers.IntegerField(min_value=1)
+
+    def validate_content_type_id(self, value):
+        if value not in tipos_de_mobiliario():
+            raise serializers.ValidationError('No es una categoría de mobiliario.')
+        return value
+
+
+def tipos_de_mobiliario():
+    """{content_type_id: modelo} de las 11 categorías de inventario."""
+    modelos = [Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge, Periquera, Carpa, PistaTarima, Extra]
+    return {content_type.id: model for model, content_type in ContentType.objects.get_for_models(*modelos).items()}
+
+
+class KitLineaSerializer(serializers.ModelSerializer):
+    content_type_id = serializers.IntegerField()
+    producto = serializers.SerializerMethodField()
+
+    class Meta:
+        model = KitLinea
+        fields = ['id', 'content_type_id', 'object_id', 'cantidad', 'por_personas', 'producto']
+
+    def get_producto(self, obj):
+        return obj.content_object.producto if obj.content_object is not None else None
+
+    def validate_content_type_id(self, value):
+        if value not in tipos_de_mobiliario():
+            raise serializers.ValidationError('No es una categoría de mobiliario.')
+        return value
+
+
+class KitSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    lineas = KitLineaSerializer(many=True)
+    tipo_evento_nombre = serializers.CharField(source='tipo_evento.nombre', read_only=True)
+
+    class Meta:
+        model = Kit
+        fields = [
+            'id', 'nombre', 'descripcion', 'tipo_evento', 'tipo_evento_nombre', 'lineas', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+    def validate_lineas(self, lineas):
+        # Una consulta por categoría para comprobar que los artículos existen
+        por_categoria = {}
+        for linea in lineas:
+            por_categoria.setdefault(linea['content_type_id'], set()).add(linea['object_id'])
+        modelos = tipos_de_mobiliario()
+        for content_type_id, object_ids in por_categoria.items():
+            faltantes = object_ids - set(
+                modelos[content_type_id].objects.filter(pk__in=object_ids).values_list('pk', flat=True)
+            )
+            if faltantes:
+                raise serializers.ValidationError(
+                    f"El item de mobiliario con id {min(faltantes)} no existe."
+                )
+        return lineas
+
+    @transaction.atomic
+    def create(self, validated_data):
+        lineas = validated_data.pop('lineas')
+        kit = super().create(validated_data)
+        KitLinea.objects.bulk_create([KitLinea(kit=kit, **linea) for linea in lineas])
+        return kit
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        lineas = validated_data.pop('lineas', None)
+        kit = super().update(instance, validated_data)
+        if lineas is not None:
+            kit.lineas.all().delete()
+            KitLinea.objects.bulk_create([KitLinea(kit=kit, **linea) for linea in lineas])
+        return kit
+
+
+class CandidatoSerializer(serializers.Serializer):
+    fecha_inicio = serializers.DateField()
+    hora_inicio = serializers.TimeField()
+    # Por defecto, EVENT_DURATION_HOURS
+    duracion_horas = serializers.FloatField(min_value=0, required=False)
+    # Por defecto, el mobiliario común de la consulta
+    mobiliario = LineaMobiliarioSerializer(many=True, required=False)
+
+
+class FactibilidadSerializer(serializers.Serializer):
+    MAX_CANDIDATOS = 20
+
+    candidatos = CandidatoSerializer(many=True, allow_empty=False, max_length=MAX_CANDIDATOS)
+    mobiliario = LineaMobiliarioSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        if any('mobiliario' not in candidato for candidato in attrs['candidatos']) and not attrs.get('mobiliario'):
+            raise serializers.ValidationError('Cada candidato necesita mobiliario propio o el mobiliario común.')
+        return attrs
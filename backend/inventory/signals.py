@@ -0,0 +1,103 @@
+"""
+Mantiene el índice de búsqueda (inventory.search) sincronizado con los
+artículos de inventario y con el nombre de las bodegas, vacía el caché de
+autocompletado cuando cambian los datos que sugiere, invalida las respuestas
+cacheadas del inventario (inventory.cache) e incrementa la versión de cada
+tabla que usan los ETag de inventory.conditional.
+"""
+from django.apps import apps
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import autocomplete, cache, search
+from .models import Bodega, Cliente, Degustacion, Evento, Notification, Product, stock_ajustado
+
+
+def indexar_articulo(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.indexar(instance)
+
+
+def eliminar_articulo(sender, instance, **kwargs):
+    search.eliminar(sender, instance.pk)
+
+
+for model in search.MODELOS:
+    post_save.connect(indexar_articulo, sender=model, dispatch_uid=f'busqueda_guardar_{model._meta.model_name}')
+    post_delete.connect(eliminar_articulo, sender=model, dispatch_uid=f'busqueda_eliminar_{model._meta.model_name}')
+
+
+@receiver(post_save, sender=Bodega, dispatch_uid='busqueda_bodega')
+def reindexar_bodega(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        search.reindexar_bodega(instance)
+
+
+@receiver(post_save, sender=Bodega, dispatch_uid='version_bodega')
+def versionar_articulos_de_bodega(sender, instance, created, raw=False, **kwargs):
+    # El nombre de la bodega es parte de la representación (y del ETag) de sus artículos
+    if not created and not raw:
+        for model in search.MODELOS:
+            model.objects.filter(bodega=instance).update(version=F('version') + 1)
+
+
+# Columnas de los artículos que cambian qué se sugiere para un prefijo
+CAMPOS_AUTOCOMPLETADO = {'producto', 'producto_normalizado', 'bodega', 'bodega_id'}
+
+
+def limpiar_autocompletado(sender, update_fields=None, **kwargs):
+    # Un save() que solo toca existencias (update_fields sin nombre ni bodega) no cambia las sugerencias
+    if update_fields is not None and sender in search.MODELOS and not CAMPOS_AUTOCOMPLETADO & set(update_fields):
+        return
+    autocomplete.CACHE.clear()
+
+
+for model in [Cliente, Product, *search.MODELOS]:
+    post_save.connect(limpiar_autocompletado, sender=model, dispatch_uid=f'autocompletado_guardar_{model._meta.model_name}')
+    post_delete.connect(limpiar_autocompletado, sender=model, dispatch_uid=f'autocompletado_eliminar_{model._meta.model_name}')
+
+
+def invalidar_inventario(sender, **kwargs):
+    cache.invalidar_al_confirmar(cache.INVENTARIO)
+
+
+for model in [Bodega, *search.MODELOS]:
+    post_save.connect(invalidar_inventario, sender=model, dispatch_uid=f'cache_guardar_{model._meta.model_name}')
+    post_delete.connect(invalidar_inventario, sender=model, dispatch_uid=f'cache_eliminar_{model._meta.model_name}')
+
+
+def invalidar_eventos(sender, **kwargs):
+    cache.invalidar_al_confirmar(cache.EVENTOS)
+
+
+post_save.connect(invalidar_eventos, sender=Evento, dispatch_uid='cache_guardar_evento')
+post_delete.connect(invalidar_eventos, sender=Evento, dispatch_uid='cache_eliminar_evento')
+# Las fechas de las degustaciones cuentan para la proyección de stock y el índice de reservas
+post_save.connect(invalidar_eventos, sender=Degustacion, dispatch_uid='cache_guardar_degustacion')
+post_delete.connect(invalidar_eventos, sender=Degustacion, dispatch_uid='cache_eliminar_degustacion')
+
+
+def invalidar_mantenimiento(sender, **kwargs):
+    # Los movimientos de mantenimiento quedan registrados como notificaciones
+    cache.invalidar_al_confirmar(cache.MANTENIMIENTO)
+
+
+post_save.connect(invalidar_mantenimiento, sender=Notification, dispatch_uid='cache_guardar_notificacion')
+post_delete.connect(invalidar_mantenimiento, sender=Notification, dispatch_uid='cache_eliminar_notificacion')
+
+
+def invalidar_tabla(sender, **kwargs):
+    cache.invalidar_al_confirmar(cache.tabla(sender))
+
+
+for model in apps.get_app_config('inventory').get_models():
+    post_save.connect(invalidar_tabla, sender=model, dispatch_uid=f'tabla_guardar_{model._meta.model_name}')
+    post_delete.connect(invalidar_tabla, sender=model, dispatch_uid=f'tabla_eliminar_{model._meta.model_name}')
+
+
+@receiver(stock_ajustado, dispatch_uid='stock_ajustado')
+def invalidar_stock(sender, **kwargs):
+    # ajustar_stock() usa update(): post_save no se dispara. Solo cambian existencias,
+    # así que el autocompletado se conserva
+    cache.invalidar_al_confirmar(cache.INVENTARIO, cache.tabla(sender))
@@ -0,0 +1,278 @@
+"""
+Generación de datos sintéticos realistas para pruebas de rendimiento.
+
+Los datos se insertan con bulk_create, por lo que no se disparan los
+hooks de save() (notificaciones ni correos). Las existencias se calculan
+de forma consistente: la cantidad disponible de cada artículo ya tiene
+descontadas las unidades asignadas a eventos y degustaciones pendientes, y
+el mobiliario de los eventos pasados queda en HistorialMobiliario.
+"""
+import random
+from datetime import date, time, timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from . import search
+from .models import (
+    TipoEvento, Bodega, Cliente, Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge,
+    Periquera, Carpa, PistaTarima, Extra, Evento, EventoMobiliario, Degustacion, DegustacionMobiliario,
+    HistorialMobiliario, Notification, normalizar
+)
+
+
+INVENTORY_MODELS = [
+    Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge, Periquera, Carpa, PistaTarima, Extra
+]
+
+PRODUCTOS = {
+    Manteleria: ['Mantel redondo', 'Mantel rectangular', 'Camino de mesa', 'Servilleta de tela', 'Cubremantel'],
+    Cubierto: ['Tenedor trinchero', 'Cuchillo de mesa', 'Cuchara sopera', 'Tenedor de postre', 'Cucharita cafetera'],
+    Loza: ['Plato base', 'Plato trinche', 'Plato sopero', 'Plato de postre', 'Taza con plato'],
+    Cristaleria: ['Copa de vino', 'Copa de agua', 'Vaso jaibolero', 'Copa flauta', 'Vaso tequilero'],
+    Silla: ['Silla Tiffany', 'Silla Crossback', 'Silla plegable', 'Silla acojinada', 'Silla Chiavari'],
+    Mesa: ['Mesa redonda', 'Mesa rectangular', 'Mesa imperial', 'Mesa de madera', 'Mesa de cristal'],
+    SalaLounge: ['Sala lounge blanca', 'Sala lounge vintage', 'Puff redondo', 'Sillón individual', 'Mesa de centro'],
+    Periquera: ['Periquera alta', 'Periquera con cubierta', 'Banco alto', 'Periquera de madera', 'Periquera iluminada'],
+    Carpa: ['Carpa 10x10', 'Carpa 6x12', 'Carpa árabe', 'Carpa transparente', 'Toldo lateral'],
+    PistaTarima: ['Pista iluminada', 'Pista de madera', 'Tarima 1x1', 'Tarima de escenario', 'Pista blanca'],
+    Extra: ['Calentador', 'Fuente de chocolate', 'Arco floral', 'Candelabro', 'Letras gigantes'],
+}
+
+ACABADOS = ['blanco', 'negro', 'dorado', 'plata', 'natural', 'marfil', 'champaña', 'rosa', 'azul', 'vino']
+
+TIPOS_EVENTO = ['Boda', 'XV Años', 'Bautizo', 'Primera Comunión', 'Corporativo', 'Cumpleaños', 'Graduación']
+
+LUGARES = ['Jardín Los Pinos', 'Salón Real', 'Hacienda San José', 'Terraza del Lago', 'Quinta Las Flores']
+
+RESPONSABLES = ['Ana López', 'Carlos Pérez', 'María Hernández', 'Jorge Ramírez', 'Lucía Torres']
+
+NOMBRES = ['Sofía', 'Mateo', 'Valentina', 'Santiago', 'Regina', 'Diego', 'Camila', 'Emiliano']
+
+APELLIDOS = ['García', 'Martínez', 'Rodríguez', 'Sánchez', 'Flores', 'Gómez', 'Díaz', 'Cruz']
+
+
+def _bulk_create(model, objs, batch_size=1000):
+    return model.objects.bulk_create(objs, batch_size=batch_size)
+
+
+def copia_de(articulo):
+    """Datos del artículo que cada línea de mobiliario guarda al reservar (bulk_create no llama a save())."""
+    obj, bodega = articulo['obj'], articulo['bodega']
+    return {
+        'categoria': str(articulo['model']._meta.verbose_name),
+        'producto': obj.producto,
+        'descripcion': obj.descripcion,
+        'bodega': bodega,
+        'bodega_nombre': bodega.nombre if bodega else '',
+    }
+
+
+@transaction.atomic
+def generar_datos(bodegas=5, items=2000, eventos=20000, degustaciones=2000, clientes=500,
+                  notificaciones=5000, lineas_por_evento=(2, 8), semilla=0, hoy=None):
+    """
+    Puebla la base de datos con datos sintéticos.
+
+    Args:
+        bodegas (int): Número de bodegas.
+        items (int): Artículos de inventario (al menos 1), repartidos entre las 11 categorías.
+        eventos (int): Eventos; los pasados quedan finalizados y los futuros con mobiliario asignado.
+        degustaciones (int): Degustaciones, con la misma regla que los eventos.
+        clientes (int): Clientes.
+        notificaciones (int): Notificaciones, incluidas entradas y salidas de mantenimiento.
+        lineas_por_evento (tuple): Rango (mínimo, máximo) de líneas de mobiliario por evento pendiente.
+        semilla (int): Semilla del generador aleatorio, para obtener datos reproducibles.
+        hoy (date): Fecha de referencia para separar eventos pasados y futuros.
+
+    Returns:
+        dict: Número de registros creados por tipo.
+    """
+    if items < 1:
+        raise ValueError('Se necesita al menos un artículo para repartir asignaciones y notificaciones.')
+    rng = random.Random(semilla)
+    hoy = hoy or date.today()
+
+    tipos = [TipoEvento.objects.get_or_create(nombre=nombre)[0] for nombre in TIPOS_EVENTO]
+
+    inicio_bodegas = Bodega.objects.count()
+    bodegas_creadas = _bulk_create(Bodega, [
+        Bodega(nombre=f'Bodega sintética {inicio_bodegas + i + 1}', ubicacion=f'Zona {i + 1}')
+        for i in range(bodegas)
+    ])
+    bodegas_disponibles = bodegas_creadas or list(Bodega.objects.all()) or [None]
+
+    nombres_clientes = [(rng.choice(NOMBRES), rng.choice(APELLIDOS)) for _ in range(clientes)]
+    _bulk_create(Cliente, [
+        Cliente(
+            nombre=nombre,
+            apellido=apellido,
+            nombre_normalizado=normalizar(nombre),
+            apellido_normalizado=normalizar(apellido),
+            tipo_evento=rng.choice(tipos),
+            cantidad_aprox=rng.randint(30, 500),
+            numero=f'55{rng.randint(10000000, 99999999)}',
+        )
+        for nombre, apellido in nombres_clientes
+    ])
+
+    # 1. Artículos: se generan en memoria para poder descontar las asignaciones
+    articulos = []
+    for i in range(items):
+        model = INVENTORY_MODELS[i % len(INVENTORY_MODELS)]
+        total = rng.randint(50, 2000)
+        articulos.append({
+            'model': model,
+            'producto': f'{rng.choice(PRODUCTOS[model])} {rng.choice(ACABADOS)} {i + 1}',
+            'total': total,
+            'disponible': total,
+            'mantenimiento': rng.choice([0, 0, 0, rng.randint(1, 20)]),
+            'bodega': rng.choice(bodegas_disponibles),
+        })
+
+    def asignar_lineas(minimo, maximo):
+        lineas = {}
+        for _ in range(rng.randint(minimo, maximo)):
+            articulo = rng.choice(articulos)
+            cantidad = rng.randint(1, 40)
+            if articulo['disponible'] - cantidad < articulo['mantenimiento'] or id(articulo) in lineas:
+                continue
+            articulo['disponible'] -= cantidad
+            lineas[id(articulo)] = (articulo, cantidad)
+        return list(lineas.values())
+
+    def lineas_historicas(minimo, maximo):
+        # El mobiliario de eventos cerrados ya regresó a bodega: no descuenta existencias
+        elegidos = rng.sample(articulos, min(len(articulos), rng.randint(minimo, maximo)))
+        return [(articulo, rng.randint(1, 40)) for articulo in elegidos]
+
+    def fecha_aleatoria():
+        return hoy + timedelta(days=rng.randint(-730, 365))
+
+    # 2. Eventos y degustaciones: los pendientes se quedan con mobiliario asignado
+    eventos_spec = []
+    historial_spec = []
+    for i in range(eventos):
+        fecha = fecha_aleatoria()
+        pendiente = fecha >= hoy
+        evento = Evento(
+            nombre=f'{rng.choice(TIPOS_EVENTO)} {rng.choice(APELLIDOS)} {i + 1}',
+            tipo_evento=rng.choice(tipos),
+            cantidad_personas=rng.randint(20, 600),
+            responsable=rng.choice(RESPONSABLES),
+            lugar=rng.choice(LUGARES),
+            estado='Por iniciar' if pendiente else rng.choice(['Finalizado', 'Finalizado', 'Cancelado']),
+            fecha_inicio=fecha,
+            hora_inicio=time(rng.randint(9, 21), rng.choice([0, 30])),
+        )
+        eventos_spec.append((evento, asignar_lineas(*lineas_por_evento) if pendiente else []))
+        if not pendiente:
+            historial_spec.append((evento, lineas_historicas(*lineas_por_evento)))
+
+    degustaciones_spec = []
+    for i in range(degustaciones):
+        fecha = fecha_aleatoria()
+        pendiente = fecha >= hoy
+        degustacion = Degustacion(
+            nombre=f'Degustación {rng.choice(APELLIDOS)} {i + 1}',
+            cantidad_personas=rng.randint(2, 12),
+            responsable=rng.choice(RESPONSABLES),
+            alimentos='Menú de tres tiempos',
+            estado='Por iniciar' if pendiente else 'Finalizado',
+            fecha_degustacion=fecha,
+            hora_degustacion=time(rng.randint(10, 19), 0),
+            fecha_evento=fecha + timedelta(days=rng.randint(15, 120)),
+        )
+        degustaciones_spec.append((degustacion, asignar_lineas(1, 2) if pendiente else []))
+
+    # 3. Inserción de artículos con sus existencias finales
+    for model in INVENTORY_MODELS:
+        propios = [a for a in articulos if a['model'] is model]
+        creados = _bulk_create(model, [
+            model(
+                producto=a['producto'],
+                producto_normalizado=normalizar(a['producto']),
+                descripcion=f"{a['producto']} para banquetes",
+                cantidad=a['disponible'] - a['mantenimiento'],
+                cantidad_en_mantenimiento=a['mantenimiento'],
+                existencias=a['total'],
+                bodega=a['bodega'],
+            )
+            for a in propios
+        ])
+        for articulo, obj in zip(propios, creados):
+            articulo['obj'] = obj
+
+    content_types = ContentType.objects.get_for_models(*INVENTORY_MODELS)
+
+    _bulk_create(Evento, [evento for evento, _ in eventos_spec])
+    _bulk_create(EventoMobiliario, [
+        EventoMobiliario(
+            evento=evento,
+            content_type=content_types[articulo['model']],
+            object_id=articulo['obj'].pk,
+            cantidad=cantidad,
+            **copia_de(articulo),
+        )
+        for evento, lineas in eventos_spec
+        for articulo, cantidad in lineas
+    ])
+
+    _bulk_create(Degustacion, [degustacion for degustacion, _ in degustaciones_spec])
+    _bulk_create(DegustacionMobiliario, [
+        DegustacionMobiliario(
+            degustacion=degustacion,
+            content_type=content_types[articulo['model']],
+            object_id=articulo['obj'].pk,
+            cantidad=cantidad,
+            **copia_de(articulo),
+        )
+        for degustacion, lineas in degustaciones_spec
+        for articulo, cantidad in lineas
+    ])
+
+    _bulk_create(HistorialMobiliario, [
+        HistorialMobiliario(
+            origen='evento',
+            evento=evento,
+            tipo_evento=evento.tipo_evento,
+            estado=evento.estado,
+            fecha=evento.fecha_inicio,
+            content_type=content_types[articulo['model']],
+            object_id=articulo['obj'].pk,
+            cantidad=cantidad,
+            **copia_de(articulo),
+        )
+        for evento, lineas in historial_spec
+        for articulo, cantidad in lineas
+    ])
+
+    # 4. Notificaciones, con el formato que interpreta el reporte de mantenimiento
+    mensajes = []
+    for _ in range(notificaciones):
+        articulo = rng.choice(articulos)
+        plantilla = rng.random()
+        if plantilla < 0.3:
+            mensajes.append(f"Han ingresado al mantenimiento {rng.randint(1, 10)} {articulo['producto']}.")
+        elif plantilla < 0.5:
+            mensajes.append(f"Han salido del mantenimiento {rng.randint(1, 10)} {articulo['producto']}.")
+        else:
+            mensajes.append(f"¡Alerta de bajo stock! El artículo '{articulo['producto']}' tiene actualmente {rng.randint(0, 9)} unidades.")
+    _bulk_create(Notification, [
+        Notification(message=mensaje, is_read=rng.random() < 0.7) for mensaje in mensajes
+    ])
+
+    # bulk_create no dispara los signals: el índice de búsqueda se regenera completo
+    search.reconstruir()
+
+    return {
+        'bodegas': len(bodegas_creadas),
+        'clientes': clientes,
+        'items': items,
+        'eventos': eventos,
+        'asignaciones_evento': sum(len(lineas) for _, lineas in eventos_spec),
+        'historial': sum(len(lineas) for _, lineas in historial_spec),
+        'degustaciones': degustaciones,
+        'asignaciones_degustacion': sum(len(lineas) for _, lineas in degustaciones_spec),
+        'notificaciones': notificaciones,
+    }
@@ -0,0 +1,1470 @@
+import gzip
+import json
+import random
+import tempfile
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import CommandError, call_command
+from django.core.cache import cache as django_cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import ResolverMatch
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import (
+    TipoEvento, Bodega, Cliente, Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge,
+    Periquera, Carpa, PistaTarima, Extra, Evento, EventoMobiliario, Degustacion, DegustacionMobiliario,
+    Product, Notification, HistorialMobiliario, SolicitudIdempotente, DemandaArticulo, PuntoReorden, Kit
+)
+from backend import profiling
+from backend.metrics import DB_QUERIES, HTTP_REQUEST_SECONDS, Registry
+from backend.middleware import nombre_de_vista
+from backend.renderers import FastJSONRenderer
+from backend.testing import QueryBudgetMixin, tabla_de
+from backend.views import MetricsView
+from . import autocomplete, cache, conflictos, pronostico, transiciones
+from .synthetic import INVENTORY_MODELS, generar_datos
+from .views import InventoryUsageReportView
+
+
+INVENTORY_ENDPOINTS = [
+    ('mantelerias', Manteleria), ('cubiertos', Cubierto), ('lozas', Loza), ('cristalerias', Cristaleria),
+    ('sillas', Silla), ('mesas', Mesa), ('salas-lounge', SalaLounge), ('periqueras', Periquera),
+    ('carpas', Carpa), ('pistas-tarimas', PistaTarima), ('extras', Extra),
+]
+
+
+class Sembrador:
+    """Crea filas con todas sus relaciones pobladas para que cualquier acceso perezoso se note."""
+
+    def __init__(self):
+        self.contador = 0
+
+    def siguiente(self):
+        self.contador += 1
+        return self.contador
+
+    def bodegas(self, n):
+        return [Bodega.objects.create(nombre=f'Bodega {self.siguiente()}', ubicacion='Centro') for _ in range(n)]
+
+    def tipos_evento(self, n):
+        return [TipoEvento.objects.create(nombre=f'Tipo {self.siguiente()}') for _ in range(n)]
+
+    def articulos(self, model, n, **campos):
+        campos.setdefault('cantidad', 5)
+        return [
+            model.objects.create(producto=f'{model.__name__} {self.siguiente()}', bodega=bodega, **campos)
+            for bodega in self.bodegas(n)
+        ]
+
+    def eventos(self, n):
+        sillas = self.articulos(Silla, n, cantidad=100)
+        mesas = self.articulos(Mesa, n, cantidad=100)
+        silla_ct = ContentType.objects.get_for_model(Silla)
+        mesa_ct = ContentType.objects.get_for_model(Mesa)
+        for tipo, silla, mesa in zip(self.tipos_evento(n), sillas, mesas):
+            evento = Evento.objects.create(
+                nombre=f'Evento {self.siguiente()}', tipo_evento=tipo, cantidad_personas=50,
+                responsable='Ana', lugar='Salón', fecha_inicio=date(2030, 1, self.contador % 28 + 1),
+                hora_inicio=time(18, 0),
+            )
+            EventoMobiliario.objects.create(evento=evento, content_type=silla_ct, object_id=silla.id, cantidad=2)
+            EventoMobiliario.objects.create(evento=evento, content_type=mesa_ct, object_id=mesa.id, cantidad=1)
+
+    def evento_reservado(self, fecha, hora, mobiliario, **campos):
+        """Evento abierto con `mobiliario` ({artículo: unidades}) reservado y descontado del stock."""
+        campos.setdefault('nombre', f'Evento {self.siguiente()}')
+        evento = Evento.objects.create(
+            cantidad_personas=50, responsable='Ana', lugar='Salón', fecha_inicio=fecha, hora_inicio=hora, **campos
+        )
+        for item, cantidad in mobiliario.items():
+            type(item).ajustar_stock(item.pk, cantidad=-cantidad)
+            EventoMobiliario.objects.create(evento=evento, content_object=item, cantidad=cantidad)
+        return evento
+
+    def degustaciones(self, n):
+        sillas = self.articulos(Silla, n, cantidad=100)
+        mesas = self.articulos(Mesa, n, cantidad=100)
+        silla_ct = ContentType.objects.get_for_model(Silla)
+        mesa_ct = ContentType.objects.get_for_model(Mesa)
+        for silla, mesa in zip(sillas, mesas):
+            degustacion = Degustacion.objects.create(
+                nombre=f'Degustación {self.siguiente()}', cantidad_personas=4, responsable='Ana',
+                alimentos='Menú', fecha_degustacion=date(2030, 1, 1), hora_degustacion=time(12, 0),
+                fecha_evento=date(2030, 2, 1),
+            )
+            DegustacionMobiliario.objects.create(degustacion=degustacion, content_type=silla_ct, object_id=silla.id, cantidad=2)
+            DegustacionMobiliario.objects.create(degustacion=degustacion, content_type=mesa_ct, object_id=mesa.id, cantidad=1)
+
+    def clientes(self, n):
+        for tipo in self.tipos_evento(n):
+            Cliente.objects.create(nombre='Sofía', apellido=f'García {self.siguiente()}', tipo_evento=tipo,
+                                   cantidad_aprox=100, numero='5512345678')
+
+    def productos(self, n):
+        for _ in range(n):
+            Product.objects.create(name=f'Producto {self.siguiente()}', colors='blanco,negro')
+
+    def notificaciones(self, n):
+        for _ in range(n):
+            Notification.objects.create(message=f'Notificación {self.siguiente()}')
+
+    def mantenimiento(self, n):
+        for model in (Silla, Mesa):
+            for item in self.articulos(model, n, cantidad=5, cantidad_en_mantenimiento=2):
+                Notification.objects.create(message=f'Han ingresado al mantenimiento 2 {item.producto}.')
+            for item in self.articulos(model, n, cantidad=5):
+                Notification.objects.create(message=f'Han salido del mantenimiento 1 {item.producto}.')
+
+
+class InventarioTestCase(APITestCase):
+    """Base de las pruebas de la API: un usuario autenticado y un Sembrador."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('pruebas', password='x')
+        self.client.force_authenticate(self.user)
+        self.sembrador = Sembrador()
+
+
+class QueryBudgetTests(QueryBudgetMixin, InventarioTestCase):
+    def test_inventory_item_lists(self):
+        for ruta, model in INVENTORY_ENDPOINTS:
+            with self.subTest(ruta=ruta):
+                self.assertConsultasConstantes(
+                    f'/api/inventory/{ruta}/', lambda n, model=model: self.sembrador.articulos(model, n)
+                )
+
+    def test_evento_list(self):
+        self.assertConsultasConstantes('/api/inventory/eventos/', self.sembrador.eventos)
+
+    def test_degustacion_list(self):
+        self.assertConsultasConstantes('/api/inventory/degustaciones/', self.sembrador.degustaciones)
+
+    def test_reference_data_lists(self):
+        casos = [
+            ('/api/inventory/tipos-evento/', self.sembrador.tipos_evento),
+            ('/api/inventory/bodegas/', self.sembrador.bodegas),
+            ('/api/inventory/clientes/', self.sembrador.clientes),
+            ('/api/inventory/products/', self.sembrador.productos),
+            ('/api/inventory/notifications/', self.sembrador.notificaciones),
+            ('/api/inventory/content-types/', lambda n: None),
+        ]
+        for url, sembrar in casos:
+            with self.subTest(url=url):
+                self.assertConsultasConstantes(url, sembrar)
+
+    def test_calendar(self):
+        def sembrar(n):
+            self.sembrador.eventos(n)
+            self.sembrador.degustaciones(n)
+        self.assertConsultasConstantes('/api/inventory/calendar/', sembrar)
+
+    def test_low_stock_report(self):
+        def sembrar(n):
+            for _, model in INVENTORY_ENDPOINTS:
+                self.sembrador.articulos(model, n, cantidad=3)
+        self.assertConsultasConstantes('/api/inventory/items/bajo-stock/', sembrar)
+
+    def test_warehouse_report(self):
+        def sembrar(n):
+            for _, model in INVENTORY_ENDPOINTS:
+                self.sembrador.articulos(model, n)
+        self.assertConsultasConstantes('/api/inventory/items/warehouse-report/', sembrar)
+
+    def test_maintenance_report(self):
+        self.assertConsultasConstantes('/api/inventory/items/maintenance-report/', self.sembrador.mantenimiento)
+
+    def test_usage_report_by_date_range(self):
+        # La vista no tiene ruta en el URLconf: se llama directo
+        self.assertConsultasConstantes(
+            '/api/inventory/reports/?start_date=2030-01-01&end_date=2030-12-31', self.sembrador.eventos,
+            vista=InventoryUsageReportView.as_view(),
+        )
+
+    def test_event_analysis_report(self):
+        for periodo in ('monthly', 'quarterly', 'yearly'):
+            with self.subTest(periodo=periodo):
+                self.assertConsultasConstantes(
+                    f'/api/inventory/items/event-analysis/?period={periodo}', self.sembrador.eventos
+                )
+
+
+class PaginationAndFieldsTests(InventarioTestCase):
+    def test_list_without_params_returns_plain_array(self):
+        self.sembrador.articulos(Silla, 3)
+        response = self.client.get('/api/inventory/sillas/')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 3)
+
+    def test_cursor_pagination_walks_all_rows_once(self):
+        self.sembrador.articulos(Silla, 5)
+        vistos = []
+        url = '/api/inventory/sillas/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            vistos += [fila['id'] for fila in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(vistos, sorted(Silla.objects.values_list('id', flat=True), reverse=True))
+
+    def test_sparse_fieldsets_and_expand(self):
+        self.sembrador.articulos(Silla, 1)
+        fila = self.client.get('/api/inventory/sillas/?fields=id,producto').data[0]
+        self.assertEqual(set(fila), {'id', 'producto'})
+        fila = self.client.get('/api/inventory/sillas/?fields=id,bodega&expand=bodega').data[0]
+        self.assertEqual(fila['bodega']['nombre'], Silla.objects.get().bodega.nombre)
+
+    def test_fields_without_allocations_skips_prefetch(self):
+        self.sembrador.eventos(3)
+        with CaptureQueriesContext(connection) as contexto:
+            self.client.get('/api/inventory/eventos/?fields=id,nombre&expand=mobiliario_asignado')
+        self.assertFalse(any('"inventory_eventomobiliario"."content_type_id" IN' in q['sql']
+                             or 'FROM "inventory_eventomobiliario"' in q['sql'] for q in contexto.captured_queries))
+
+
+class ListRepresentationTests(InventarioTestCase):
+    def test_evento_list_is_one_query_with_aggregates(self):
+        self.sembrador.eventos(3)
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get('/api/inventory/eventos/')
+        consultas = [q['sql'] for q in contexto.captured_queries if 'auth_user' not in q['sql']]
+        # La primera es la de agregados del ETag (ConditionalGetMixin)
+        self.assertEqual(len(consultas), 2, consultas)
+        fila = response.data[0]
+        self.assertNotIn('mobiliario_asignado', fila)
+        self.assertEqual((fila['total_lineas'], fila['total_unidades']), (2, 3))
+
+    def test_degustacion_list_aggregates(self):
+        self.sembrador.degustaciones(2)
+        fila = self.client.get('/api/inventory/degustaciones/').data[0]
+        self.assertEqual((fila['total_lineas'], fila['total_unidades']), (2, 3))
+
+    def test_detail_keeps_allocation_tree(self):
+        self.sembrador.eventos(1)
+        evento = Evento.objects.get()
+        fila = self.client.get(f'/api/inventory/eventos/{evento.id}/').data
+        self.assertEqual(len(fila['mobiliario_asignado']), 2)
+        fila = self.client.get('/api/inventory/eventos/?expand=mobiliario_asignado').data[0]
+        self.assertEqual(len(fila['mobiliario_asignado']), 2)
+
+
+class AllocationSnapshotTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sembrador.eventos(1)
+        self.evento = Evento.objects.get()
+
+    def test_allocation_copies_item_data(self):
+        linea = self.evento.mobiliario_asignado.get(content_type=ContentType.objects.get_for_model(Silla))
+        silla = Silla.objects.get(pk=linea.object_id)
+        self.assertEqual(
+            (linea.categoria, linea.producto, linea.bodega_id, linea.bodega_nombre),
+            (str(Silla._meta.verbose_name), silla.producto, silla.bodega_id, silla.bodega.nombre),
+        )
+
+    def test_detail_does_not_touch_inventory_tables(self):
+        self.client.get(f'/api/inventory/eventos/{self.evento.id}/')
+        with CaptureQueriesContext(connection) as contexto:
+            self.client.get(f'/api/inventory/eventos/{self.evento.id}/')
+        tablas = {tabla_de(q['sql']) for q in contexto.captured_queries}
+        self.assertFalse(tablas & {'inventory_silla', 'inventory_mesa'}, tablas)
+
+    def test_reports_survive_deleted_items(self):
+        productos = set(self.evento.mobiliario_asignado.values_list('producto', flat=True))
+        Silla.objects.all().delete()
+        Mesa.objects.all().delete()
+        fila = self.client.get(f'/api/inventory/eventos/{self.evento.id}/').data
+        self.assertEqual({linea['producto_nombre'] for linea in fila['mobiliario_asignado']}, productos)
+        vista = InventoryUsageReportView()
+        for generar in (vista.generate_pdf, vista.generate_excel):
+            self.assertEqual(generar(self.evento).status_code, 200)
+
+
+class UsageAnalyticsTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sembrador.eventos(3)
+
+    def finalizar(self, evento, estado='Finalizado'):
+        evento.estado = estado
+        evento.save()
+
+    def test_closing_an_event_archives_its_allocations(self):
+        evento = Evento.objects.first()
+        lineas = list(evento.mobiliario_asignado.values_list('producto', 'cantidad'))
+        self.finalizar(evento)
+        self.assertFalse(evento.mobiliario_asignado.exists())
+        historial = HistorialMobiliario.objects.filter(evento=evento)
+        self.assertCountEqual(historial.values_list('producto', 'cantidad'), lineas)
+        self.assertEqual({(h.estado, h.fecha, h.tipo_evento_id) for h in historial},
+                         {('Finalizado', evento.fecha_inicio, evento.tipo_evento_id)})
+
+    def test_usage_grouped_by_category_and_period(self):
+        eventos = list(Evento.objects.all())
+        self.finalizar(eventos[0])
+        self.finalizar(eventos[1])
+        self.finalizar(eventos[2], 'Cancelado')
+        response = self.client.get('/api/inventory/items/usage-analytics/?group_by=category')
+        self.assertEqual(response.status_code, 200)
+        totales = {fila['categoria']: fila['total_unidades'] for fila in response.data['results']}
+        self.assertEqual(totales, {str(Silla._meta.verbose_name): 4, str(Mesa._meta.verbose_name): 2})
+        self.assertEqual(response.data['total_unidades'], 6)
+
+        response = self.client.get('/api/inventory/items/usage-analytics/?group_by=tipo_evento,period&estado=all')
+        self.assertEqual(sum(fila['eventos'] for fila in response.data['results']), 3)
+
+    def test_usage_by_item_is_a_single_grouped_query(self):
+        for evento in Evento.objects.all():
+            self.finalizar(evento)
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get('/api/inventory/items/usage-analytics/?group_by=item,bodega&limit=2')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(len([q for q in contexto.captured_queries if 'historialmobiliario' in q['sql']]), 2)
+
+    def test_invalid_group_by(self):
+        response = self.client.get('/api/inventory/items/usage-analytics/?group_by=color')
+        self.assertEqual(response.status_code, 400)
+
+
+class InventorySearchTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bodega = Bodega.objects.create(nombre='Bodega Norte')
+        self.mantel = Manteleria.objects.create(producto='Mantel redondo', descripcion='Mantelería de lino', bodega=self.bodega)
+        self.silla = Silla.objects.create(producto='Silla Tiffany', descripcion='Para mantel largo', bodega=self.bodega)
+        Mesa.objects.create(producto='Mesa imperial', bodega=self.bodega)
+
+    def buscar(self, texto, **params):
+        return self.client.get('/api/inventory/items/search/', {'q': texto, **params}).data
+
+    def test_accent_insensitive_and_ranked_across_categories(self):
+        data = self.buscar('mantel')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([(r['modelo'], r['id']) for r in data['results']],
+                         [('manteleria', self.mantel.id), ('silla', self.silla.id)])
+        self.assertEqual(self.buscar('manteleria')['results'][0]['id'], self.mantel.id)
+        self.assertEqual(self.buscar('MANTELERÍA')['results'][0]['id'], self.mantel.id)
+
+    def test_index_follows_saves_deletes_and_bodega_renames(self):
+        self.silla.producto = 'Silla Chiavari'
+        self.silla.save()
+        self.assertEqual(self.buscar('tiffany')['count'], 0)
+        self.assertEqual(self.buscar('chiavari')['count'], 1)
+        self.bodega.nombre = 'Almacén Sur'
+        self.bodega.save()
+        self.assertEqual(self.buscar('almacen')['count'], 3)
+        self.mantel.delete()
+        self.assertEqual(self.buscar('redondo')['count'], 0)
+
+    def test_pagination(self):
+        primera = self.buscar('norte', page_size=2)
+        segunda = self.buscar('norte', page_size=2, page=2)
+        self.assertEqual((primera['count'], len(primera['results']), len(segunda['results'])), (3, 2, 1))
+        self.assertEqual(self.buscar('norte', page_size=2, page=5)['count'], 3)
+        self.assertEqual(self.buscar('"*)(')['count'], 0)
+
+
+class AutocompleteTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        autocomplete.CACHE.clear()
+        self.mantel = Manteleria.objects.create(producto='Mantelería fina', cantidad=8)
+        self.silla = Silla.objects.create(producto='Silla Tiffany', cantidad=30)
+        Silla.objects.create(producto='Sillón lounge', cantidad=4)
+        self.cliente = Cliente.objects.create(nombre='Sofía', apellido='Gómez', cantidad_aprox=80, numero='5512345678')
+        Product.objects.create(name='Centro de mesa')
+
+    def sugerir(self, q, **params):
+        return self.client.get('/api/inventory/autocomplete/', {'q': q, **params}).data
+
+    def test_prefix_matches_are_accent_insensitive(self):
+        data = self.sugerir('SIL', tipo='inventario')
+        self.assertEqual([fila['producto'] for fila in data['inventario']], ['Silla Tiffany', 'Sillón lounge'])
+        self.assertEqual(self.sugerir('manteleria', tipo='inventario')['inventario'][0]['modelo'], 'manteleria')
+        data = self.sugerir('gom')
+        self.assertEqual([c['id'] for c in data['clientes']], [self.cliente.id])
+        self.assertEqual(self.sugerir('5512', tipo='clientes')['clientes'][0]['id'], self.cliente.id)
+        self.assertEqual(self.sugerir('sofia go', tipo='clientes')['clientes'][0]['id'], self.cliente.id)
+        self.assertEqual(self.sugerir('centro', tipo='productos')['productos'][0]['name'], 'Centro de mesa')
+        self.assertEqual(len(self.sugerir('s', tipo='inventario', limit=1)['inventario']), 1)
+
+    def test_lookups_use_the_indexes(self):
+        sql, params = Product.objects.filter(**autocomplete.rango('normalized_name', 'cen')).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(fila) for fila in cursor.fetchall())
+        self.assertIn('INDEX', plan)
+
+    def test_hot_prefixes_are_cached_until_a_write(self):
+        self.sugerir('sil', tipo='inventario')
+        with CaptureQueriesContext(connection) as contexto:
+            self.sugerir('sil', tipo='inventario')
+        self.assertFalse([q for q in contexto.captured_queries if 'inventory_silla' in q['sql']])
+        self.silla.producto = 'Silla Chiavari'
+        self.silla.save()
+        self.assertEqual(self.sugerir('sil', tipo='inventario')['inventario'][0]['producto'], 'Silla Chiavari')
+
+    def test_stock_moves_keep_the_cache(self):
+        self.sugerir('sil', tipo='inventario')
+        Silla.ajustar_stock(self.silla.pk, -2)
+        self.silla.refresh_from_db()
+        self.silla.cantidad = 20
+        self.silla.save()
+        self.assertEqual(len(autocomplete.CACHE), 1)
+        self.silla.bodega = Bodega.objects.create(nombre='Norte')
+        self.silla.save()
+        self.assertEqual(len(autocomplete.CACHE), 0)
+
+    def test_one_query_with_the_prefix_bounds(self):
+        with CaptureQueriesContext(connection) as contexto:
+            self.sugerir('sill', tipo='inventario')
+        consulta, = [q['sql'] for q in contexto.captured_queries if 'inventory_silla' in q['sql']]
+        self.assertEqual(consulta.count('UNION ALL'), 10)
+        self.assertEqual(consulta.count("'sill'"), 11)
+
+    def test_invalid_tipo(self):
+        self.assertEqual(self.client.get('/api/inventory/autocomplete/?q=a&tipo=bodegas').status_code, 400)
+
+
+class InventoryOverviewTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        django_cache.clear()
+        self.sembrador = Sembrador()
+
+    def test_overview_uses_a_fixed_number_of_queries(self):
+        for _, model in INVENTORY_ENDPOINTS:
+            self.sembrador.articulos(model, 2, cantidad=10)
+        with CaptureQueriesContext(connection) as contexto:
+            data = self.client.get('/api/inventory/items/overview/?items=1').data
+        consultas = [q for q in contexto.captured_queries if 'auth_user' not in q['sql']]
+        self.assertEqual(len(consultas), 1 + len(INVENTORY_ENDPOINTS))
+        self.assertEqual(data['totales'], {'items': 22, 'cantidad': 220, 'cantidad_en_mantenimiento': 0, 'bajo_stock': 22})
+        self.assertTrue(all(len(categoria['articulos']) == 1 for categoria in data['categorias']))
+
+    def test_cached_until_an_inventory_write(self):
+        silla = self.sembrador.articulos(Silla, 1, cantidad=100)[0]
+        self.client.get('/api/inventory/items/overview/')
+        with CaptureQueriesContext(connection) as contexto:
+            self.client.get('/api/inventory/items/overview/')
+        self.assertFalse([q for q in contexto.captured_queries if 'inventory_silla' in q['sql']])
+
+        silla.cantidad = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            silla.save()
+        sillas = next(c for c in self.client.get('/api/inventory/items/overview/').data['categorias'] if c['modelo'] == 'silla')
+        self.assertEqual((sillas['cantidad'], sillas['bajo_stock']), (5, 1))
+
+
+class BatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lotes', password='x')
+        # Las sub-peticiones se autentican con el mismo token que el lote
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        Sembrador().bodegas(2)
+
+    def test_sub_requests_run_with_the_batch_user(self):
+        response = self.client.post('/api/batch/', {'requests': [
+            {'id': 'bodegas', 'url': '/api/inventory/bodegas/?fields=id'},
+            '/api/inventory/tipos-evento/',
+            '/api/inventory/no-existe/',
+            '/metrics',
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        bodegas, tipos, inexistente, externa = response.data['responses']
+        self.assertEqual((bodegas['id'], bodegas['status'], len(bodegas['body'])), ('bodegas', 200, 2))
+        self.assertEqual(set(bodegas['body'][0]), {'id'})
+        self.assertEqual((tipos['id'], tipos['status'], tipos['body']), (1, 200, []))
+        self.assertEqual(inexistente['status'], 404)
+        self.assertEqual(externa['status'], 400)
+
+    def test_requires_authentication_and_a_bounded_list(self):
+        with self.settings(BATCH_MAX_REQUESTS=2):
+            response = self.client.post('/api/batch/', {'requests': ['/api/inventory/bodegas/'] * 3}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.client.credentials()
+        response = self.client.post('/api/batch/', {'requests': ['/api/inventory/bodegas/']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_conditional_headers_are_not_forwarded(self):
+        etag = self.client.get('/api/inventory/bodegas/')['ETag']
+        response = self.client.post('/api/batch/', {'requests': ['/api/inventory/bodegas/']}, format='json',
+                                    HTTP_IF_NONE_MATCH=etag)
+        bodegas, = response.data['responses']
+        self.assertEqual((bodegas['status'], len(bodegas['body'])), (200, 2))
+
+    def test_an_unexpected_error_fails_only_its_entry(self):
+        with mock.patch('inventory.views.TipoEventoViewSet.list', side_effect=RuntimeError('falla')), \
+                self.assertLogs('backend.batch', 'ERROR'):
+            response = self.client.post('/api/batch/', {'requests': [
+                '/api/inventory/tipos-evento/', '/api/inventory/bodegas/',
+            ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        tipos, bodegas = response.data['responses']
+        self.assertEqual((tipos['status'], bodegas['status']), (500, 200))
+
+
+class ConditionalGetTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bodega = Bodega.objects.create(nombre='Central')
+        self.silla = Silla.objects.create(producto='Tiffany', cantidad=40, bodega=self.bodega)
+
+    def test_list_answers_304_without_serializing(self):
+        response = self.client.get('/api/inventory/sillas/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/inventory/sillas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(consultas), 1)
+        # Otra query string es otra representación
+        self.assertNotEqual(self.client.get('/api/inventory/sillas/?fields=id')['ETag'], etag)
+
+    def test_writes_and_dependencies_change_the_etag(self):
+        etag = self.client.get('/api/inventory/sillas/')['ETag']
+        self.silla.cantidad = 35
+        with self.captureOnCommitCallbacks(execute=True):
+            self.silla.save()
+        response = self.client.get('/api/inventory/sillas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.bodega.nombre = 'Norte'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bodega.save()
+        self.assertEqual(self.client.get('/api/inventory/sillas/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_retrieve_sends_last_modified(self):
+        response = self.client.get(f'/api/inventory/sillas/{self.silla.pk}/')
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(
+            f'/api/inventory/sillas/{self.silla.pk}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get('/api/inventory/sillas/999/').status_code, 404)
+
+    def test_validators_follow_get_queryset(self):
+        solo_tiffany = mock.patch('inventory.views.SillaViewSet.get_queryset',
+                                  lambda viewset: Silla.objects.filter(producto='Tiffany'))
+        with solo_tiffany:
+            etag = self.client.get('/api/inventory/sillas/')['ETag']
+        # Una fila fuera del queryset de la vista no cambia su representación
+        Silla.objects.bulk_create([Silla(producto='Chiavari', cantidad=10, bodega=self.bodega)])
+        with solo_tiffany:
+            self.assertEqual(self.client.get('/api/inventory/sillas/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(self.client.get('/api/inventory/sillas/')['ETag'], etag)
+
+    def test_bulk_update_actions_invalidate_by_hand(self):
+        Notification.objects.create(message='Stock bajo')
+        etag = self.client.get('/api/inventory/notifications/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/inventory/notifications/mark_all_as_read/')
+        response = self.client.get('/api/inventory/notifications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data[0]['is_read'])
+
+
+class ReportCacheTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        django_cache.clear()
+        self.bodega = Bodega.objects.create(nombre='Central')
+        self.mesa = Mesa.objects.create(producto='Redonda', cantidad=10, bodega=self.bodega)
+
+    def consultas_de(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in contexto.captured_queries if 'auth_user' not in q['sql']]
+
+    def test_hits_skip_the_database_until_a_write(self):
+        for url in ['/api/inventory/items/bajo-stock/', '/api/inventory/items/warehouse-report/',
+                    '/api/inventory/items/maintenance-report/', '/api/inventory/items/event-analysis/']:
+            primera, _ = self.consultas_de(url)
+            segunda, consultas = self.consultas_de(url)
+            self.assertEqual(consultas, [], url)
+            self.assertEqual(primera.data, segunda.data, url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/inventory/mesas/{self.mesa.pk}/mantenimiento/', {'cantidad': 4}, format='json')
+        response, _ = self.consultas_de('/api/inventory/items/maintenance-report/')
+        self.assertEqual(response.data[0]['cantidad_en_mantenimiento'], 4)
+        response, _ = self.consultas_de('/api/inventory/items/bajo-stock/')
+        self.assertEqual(response.data[0]['cantidad_actual'], 6)
+
+    def test_versions_change_only_when_the_write_commits(self):
+        Evento.objects.create(
+            nombre='Boda', cantidad_personas=80, responsable='Ana', lugar='Jardín',
+            fecha_inicio=date(2024, 5, 4), hora_inicio=time(18, 0)
+        )
+        espacios = [cache.INVENTARIO, cache.EVENTOS, cache.MANTENIMIENTO, cache.tabla(Mesa)]
+        antes = [cache.version(espacio) for espacio in espacios]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.post(f'/api/inventory/mesas/{self.mesa.pk}/mantenimiento/', {'cantidad': 4}, format='json')
+            self.assertEqual(transiciones.procesar()['evento']['finalizados'], 1)
+            # Un reporte calculado antes del commit se guarda con las versiones anteriores
+            self.assertEqual([cache.version(espacio) for espacio in espacios], antes)
+            self.client.get('/api/inventory/items/maintenance-report/')
+        self.assertTrue(callbacks)
+        self.assertTrue(all(cache.version(espacio) != anterior for espacio, anterior in zip(espacios, antes)))
+        response, consultas = self.consultas_de('/api/inventory/items/maintenance-report/')
+        self.assertTrue(consultas)
+        self.assertEqual(response.data[0]['cantidad_en_mantenimiento'], 4)
+
+    def test_parameters_are_part_of_the_key(self):
+        tipo = TipoEvento.objects.create(nombre='Boda')
+        Evento.objects.create(
+            nombre='Boda', tipo_evento=tipo, cantidad_personas=80, responsable='Ana', lugar='Jardín',
+            fecha_inicio=date(2024, 5, 4), hora_inicio=time(18, 0)
+        )
+        anual = self.client.get('/api/inventory/items/event-analysis/?period=yearly').data
+        mensual = self.client.get('/api/inventory/items/event-analysis/?period=monthly').data
+        self.assertEqual((anual['periods'][0]['period'], mensual['periods'][0]['period']), ('2024', 'Mayo 2024'))
+
+    def test_stale_while_revalidate_serves_the_old_entry_once(self):
+        url = '/api/inventory/items/bajo-stock/'
+        pendientes = []
+        with self.settings(REPORT_CACHE_STALE_SECONDS=60), \
+                mock.patch('inventory.cache.en_segundo_plano', pendientes.append):
+            self.client.get(url)
+            self.mesa.cantidad = 3
+            with self.captureOnCommitCallbacks(execute=True):
+                self.mesa.save()
+            self.assertEqual(self.client.get(url).data[0]['cantidad_actual'], 10)
+            self.client.get(url)
+            self.assertEqual(len(pendientes), 1)
+            with mock.patch('inventory.cache.connections'):
+                pendientes[0]()
+            self.assertEqual(self.client.get(url).data[0]['cantidad_actual'], 3)
+
+
+class FastJSONAndCompressionTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        bodega = Bodega.objects.create(nombre='Central')
+        Silla.objects.bulk_create(
+            [Silla(producto=f'Silla {i}', cantidad=i, bodega=bodega, descripcion='Ñandú ' * 5) for i in range(40)]
+        )
+
+    def test_fast_renderer_matches_the_standard_one(self):
+        datos = {'texto': 'Mantelería', 'decimal': Decimal('1.50'), 'fecha': date(2024, 5, 4), 1: None,
+                 'momento': timezone.make_aware(datetime(2024, 5, 4, 18, 0))}
+        self.assertEqual(
+            json.loads(FastJSONRenderer().render(datos)), json.loads(JSONRenderer().render(datos))
+        )
+        response = self.client.post('/api/inventory/tipos-evento/', '{"nombre": "Bodá"}', content_type='application/json')
+        self.assertEqual(response.data['nombre'], 'Bodá')
+        response = self.client.post('/api/inventory/tipos-evento/', '{"nombre": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_large_responses_are_gzipped_when_accepted(self):
+        plano = self.client.get('/api/inventory/sillas/')
+        self.assertNotIn('Content-Encoding', plano)
+        self.assertIn('Accept-Encoding', plano['Vary'])
+        comprimido = self.client.get('/api/inventory/sillas/', HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+        self.assertEqual(comprimido['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(comprimido.content), plano.content)
+        self.assertEqual(int(comprimido['Content-Length']), len(comprimido.content))
+        # Por debajo del umbral no vale la pena
+        pequeño = self.client.get('/api/inventory/bodegas/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', pequeño)
+        negado = self.client.get('/api/inventory/sillas/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', negado)
+
+
+class ChangeTrackingTests(APITestCase):
+    def setUp(self):
+        self.bodega = Bodega.objects.create(nombre='Central')
+        Silla.objects.create(producto='Tiffany', cantidad=12, bodega=self.bodega)
+
+    def test_save_writes_only_changed_columns_without_reading_first(self):
+        silla = Silla.objects.get()
+        silla.cantidad = 11
+        with CaptureQueriesContext(connection) as contexto:
+            silla.save()
+        consultas = [q['sql'] for q in contexto.captured_queries if 'inventory_silla' in q['sql']]
+        self.assertEqual(len(consultas), 1)
+        self.assertTrue(consultas[0].startswith('UPDATE'))
+        self.assertIn('"cantidad"', consultas[0])
+        self.assertNotIn('"producto"', consultas[0])
+        self.assertEqual(silla.campos_modificados(), [])
+
+        with CaptureQueriesContext(connection) as contexto:
+            silla.save()
+        self.assertEqual(len(contexto.captured_queries), 0)
+
+    def test_low_stock_alert_uses_the_loaded_value(self):
+        silla = Silla.objects.get()
+        silla.cantidad = 9
+        silla.save()
+        self.assertEqual(Notification.objects.filter(message__contains='bajo stock').count(), 1)
+        # Una segunda bajada ya no cruza el umbral
+        silla.cantidad = 8
+        silla.save()
+        self.assertEqual(Notification.objects.filter(message__contains='bajo stock').count(), 1)
+        # Si la columna no se leyó (campo diferido) se consulta la fila
+        diferida = Silla.objects.only('id', 'producto').get()
+        self.assertEqual(diferida.valor_anterior('cantidad'), 8)
+
+    def test_state_transition_is_detected_in_memory(self):
+        tipo = TipoEvento.objects.create(nombre='Boda')
+        evento = Evento.objects.create(
+            nombre='Boda', tipo_evento=tipo, cantidad_personas=80, responsable='Ana', lugar='Jardín',
+            fecha_inicio=date(2024, 5, 4), hora_inicio=time(18, 0)
+        )
+        silla = Silla.objects.get()
+        EventoMobiliario.objects.create(evento=evento, content_object=silla, cantidad=2)
+        evento = Evento.objects.get()
+        evento.estado = 'Finalizado'
+        with CaptureQueriesContext(connection) as contexto:
+            evento.save()
+        self.assertFalse(any(
+            q['sql'].startswith('SELECT') and 'FROM "inventory_evento"' in q['sql'] for q in contexto.captured_queries
+        ))
+        self.assertEqual(Silla.objects.get().cantidad, 14)
+        self.assertEqual(HistorialMobiliario.objects.get().estado, 'Finalizado')
+
+
+class OptimisticConcurrencyTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bodega = Bodega.objects.create(nombre='Central')
+        self.mesa = Mesa.objects.create(producto='Redonda', cantidad=12, bodega=self.bodega)
+        self.url = f'/api/inventory/mesas/{self.mesa.pk}/'
+
+    def test_stock_adjustments_are_conditional_updates(self):
+        self.assertFalse(Mesa.ajustar_stock(self.mesa.pk, cantidad=-13))
+        self.assertTrue(Mesa.ajustar_stock(self.mesa.pk, cantidad=-3))
+        mesa = Mesa.objects.get()
+        self.assertEqual((mesa.cantidad, mesa.version), (9, 1))
+        # Cruzar el umbral dispara la alerta igual que save()
+        self.assertTrue(Notification.objects.filter(message__contains='bajo stock').exists())
+
+        response = self.client.post(f'{self.url}mantenimiento/', {'cantidad': 10}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(f'{self.url}mantenimiento/', {'cantidad': 4}, format='json')
+        self.assertEqual(response.status_code, 200)
+        mesa = Mesa.objects.get()
+        self.assertEqual((mesa.cantidad, mesa.cantidad_en_mantenimiento, mesa.version), (5, 4, 2))
+
+    def test_if_match_rejects_stale_writes(self):
+        response = self.client.get(self.url)
+        self.assertEqual((response['ETag'], response.data['version']), ('"0"', 0))
+
+        datos = {'producto': 'Redonda 1.5 m', 'cantidad': 12, 'bodega': self.bodega.pk}
+        response = self.client.put(self.url, datos, format='json', HTTP_IF_MATCH='"0"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"1"')
+
+        # Un segundo editor con la versión que leyó antes
+        response = self.client.patch(self.url, {'cantidad': 1}, format='json', HTTP_IF_MATCH='"0"')
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Mesa.objects.get().cantidad, 12)
+
+        # Un movimiento de stock también cambia la versión
+        Mesa.ajustar_stock(self.mesa.pk, cantidad=-2)
+        response = self.client.patch(self.url, {'descripcion': 'x'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 412)
+        # Sin If-Match se sigue aceptando
+        self.assertEqual(self.client.patch(self.url, {'descripcion': 'x'}, format='json').status_code, 200)
+
+    def test_renaming_a_bodega_changes_its_items_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.bodega.nombre = 'Norte'
+        self.bodega.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['bodega_nombre']), (200, 'Norte'))
+
+
+class IdempotencyTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.silla = Silla.objects.create(producto='Tiffany', cantidad=50, bodega=Bodega.objects.create(nombre='Central'))
+        self.datos = {
+            'nombre': 'Boda', 'tipo_evento': None, 'cantidad_personas': 80, 'responsable': 'Ana', 'lugar': 'Jardín',
+            'fecha_inicio': '2030-05-04', 'hora_inicio': '18:00',
+            'mobiliario': [{'content_type_id': ContentType.objects.get_for_model(Silla).id,
+                            'object_id': self.silla.pk, 'cantidad': 20}],
+        }
+
+    def crear(self, clave, datos=None):
+        return self.client.post('/api/inventory/eventos/', datos or self.datos, format='json', HTTP_IDEMPOTENCY_KEY=clave)
+
+    def test_retries_replay_the_first_response(self):
+        primera = self.crear('clave-1')
+        self.assertEqual(primera.status_code, 201)
+        segunda = self.crear('clave-1')
+        self.assertEqual((segunda.status_code, segunda.data), (201, primera.data))
+        self.assertEqual(segunda['Idempotent-Replayed'], 'true')
+        self.assertEqual(Evento.objects.count(), 1)
+        self.assertEqual(Silla.objects.get().cantidad, 30)
+        # Otra clave es otra alta
+        self.assertEqual(self.crear('clave-2').status_code, 201)
+        self.assertEqual(Silla.objects.get().cantidad, 10)
+
+    def test_key_reused_with_another_body_or_user(self):
+        self.crear('clave-1')
+        self.assertEqual(self.crear('clave-1', {**self.datos, 'nombre': 'Otra'}).status_code, 422)
+        self.client.force_authenticate(User.objects.create_user('otro', password='x'))
+        self.assertEqual(self.crear('clave-1').status_code, 201)
+        self.assertEqual(Evento.objects.count(), 2)
+
+    def test_failed_attempts_are_not_stored_and_keys_expire(self):
+        response = self.crear('clave-1', {**self.datos, 'cantidad_personas': 'muchas'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(SolicitudIdempotente.objects.exists())
+        self.assertEqual(self.crear('clave-1').status_code, 201)
+
+        SolicitudIdempotente.objects.update(expira_en=timezone.now())
+        self.assertEqual(SolicitudIdempotente.purgar(), 1)
+        self.assertEqual(self.crear('clave-1').status_code, 201)
+        self.assertEqual(Evento.objects.count(), 2)
+
+
+class ScheduledTransitionsTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.silla = Silla.objects.create(producto='Tiffany', cantidad=100, bodega=Bodega.objects.create(nombre='Central'))
+        self.mesa = Mesa.objects.create(producto='Redonda', cantidad=100)
+        self.ahora = timezone.make_aware(datetime(2030, 5, 4, 20, 0), transiciones.zona())
+
+    def evento(self, fecha, hora, **campos):
+        return self.sembrador.evento_reservado(fecha, hora, {self.silla: 5, self.mesa: 5}, **campos)
+
+    def test_events_move_by_date_time_and_duration(self):
+        pasado = self.evento(date(2030, 5, 3), time(10, 0))
+        en_curso = self.evento(date(2030, 5, 4), time(18, 0))
+        futuro = self.evento(date(2030, 5, 4), time(21, 0))
+        cancelado = self.evento(date(2030, 5, 1), time(10, 0))
+        Evento.objects.filter(pk=cancelado.pk).update(estado='Cancelado')
+
+        resumen = transiciones.procesar(ahora=self.ahora)
+        self.assertEqual(resumen['evento'], {'en_proceso': 1, 'finalizados': 1})
+        estados = dict(Evento.objects.values_list('pk', 'estado'))
+        self.assertEqual(
+            [estados[e.pk] for e in (pasado, en_curso, futuro, cancelado)],
+            ['Finalizado', 'En proceso', 'Por iniciar', 'Cancelado']
+        )
+        # Solo el evento finalizado devuelve su mobiliario; los cerrados no se tocan
+        self.assertEqual(Silla.objects.get().cantidad, 100 - 15)
+        self.assertFalse(pasado.mobiliario_asignado.exists())
+        self.assertEqual(HistorialMobiliario.objects.filter(evento=pasado).count(), 2)
+        self.assertTrue(Notification.objects.filter(message__contains="ha terminado").exists())
+        self.assertEqual(transiciones.procesar(ahora=self.ahora)['evento'], {'en_proceso': 0, 'finalizados': 0})
+
+    @override_settings(TIME_ZONE='Asia/Tokyo', EVENT_TIME_ZONE='America/Mexico_City', EVENT_DURATION_HOURS=8)
+    def test_start_times_are_read_in_the_event_time_zone(self):
+        # 20:00 en Ciudad de México (UTC-6) son las 02:00 UTC y las 11:00 en Tokio del día siguiente
+        ahora = datetime(2030, 5, 5, 2, 0, tzinfo=ZoneInfo('UTC'))
+        en_curso = self.evento(date(2030, 5, 4), time(18, 0))
+        futuro = self.evento(date(2030, 5, 4), time(21, 0))
+        pasado = self.evento(date(2030, 5, 4), time(11, 0))
+        self.assertEqual(transiciones.procesar(ahora=ahora)['evento'], {'en_proceso': 1, 'finalizados': 1})
+        estados = dict(Evento.objects.values_list('pk', 'estado'))
+        self.assertEqual([estados[e.pk] for e in (en_curso, futuro, pasado)], ['En proceso', 'Por iniciar', 'Finalizado'])
+        with mock.patch('django.utils.timezone.now', return_value=ahora):
+            self.assertEqual(transiciones.hoy(), date(2030, 5, 4))
+
+    def test_events_closed_by_the_api_meanwhile_are_skipped(self):
+        pasado = self.evento(date(2030, 5, 3), time(10, 0))
+        otro = self.evento(date(2030, 5, 3), time(12, 0))
+        reclamar = transiciones.reclamar
+
+        def cerrar_antes(programa, candidatos, ahora):
+            # La API finaliza el evento después de que se leyeron los vencidos
+            evento = Evento.objects.get(pk=pasado.pk)
+            evento.estado = 'Finalizado'
+            evento.save()
+            return reclamar(programa, candidatos, ahora)
+
+        with mock.patch('inventory.transiciones.reclamar', cerrar_antes):
+            self.assertEqual(transiciones.procesar(ahora=self.ahora)['evento']['finalizados'], 1)
+        self.assertEqual(Evento.objects.get(pk=otro.pk).estado, 'Finalizado')
+        self.assertEqual((Silla.objects.get().cantidad, Mesa.objects.get().cantidad), (100, 100))
+        self.assertEqual(HistorialMobiliario.objects.filter(evento=pasado).count(), 2)
+        terminado = Notification.objects.filter(message__contains=f"'{pasado.nombre}'", message__endswith='ha terminado.')
+        self.assertEqual(terminado.count(), 1)
+
+    def test_batches_use_a_constant_number_of_queries(self):
+        def consultas(n):
+            for dia in range(n):
+                self.evento(date(2030, 4, 1 + dia), time(12, 0))
+            with CaptureQueriesContext(connection) as contexto:
+                transiciones.procesar(ahora=self.ahora, lote=50)
+            return len(contexto.captured_queries)
+
+        self.assertEqual(consultas(2), consultas(8))
+        self.assertEqual(Silla.objects.get().cantidad, 100)
+        self.assertEqual(Mesa.objects.get().cantidad, 100)
+
+
+@override_settings(EVENT_DURATION_HOURS=8, DEGUSTACION_DURATION_HOURS=2)
+class StockProjectionTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hoy = transiciones.hoy()
+        self.silla = Silla.objects.create(producto='Tiffany', cantidad=100)
+        self.mesa = Mesa.objects.create(producto='Redonda', cantidad=20)
+        # Evento nocturno: ocupa su día y el siguiente
+        self.sembrador.evento_reservado(self.hoy + timedelta(days=2), time(20, 0), {self.silla: 60})
+        degustacion = Degustacion.objects.create(
+            nombre='Prueba', cantidad_personas=4, responsable='Ana', alimentos='Menú',
+            fecha_degustacion=self.hoy + timedelta(days=5), hora_degustacion=time(10, 0),
+            fecha_evento=self.hoy + timedelta(days=30),
+        )
+        Silla.ajustar_stock(self.silla.pk, cantidad=-30)
+        DegustacionMobiliario.objects.create(degustacion=degustacion, content_object=self.silla, cantidad=30)
+
+    def test_projection_follows_allocations_and_flags_shortages(self):
+        response = self.client.get('/api/inventory/items/projection/', {'horizon': 8, 'minimum': 50})
+        self.assertEqual(response.status_code, 200)
+        items = {item['model']: item for item in response.data['items']}
+        silla = items['silla']
+        self.assertEqual(silla['cantidad'], 10)
+        self.assertEqual(silla['reservado'], 90)
+        self.assertEqual(silla['projection'], [100, 100, 40, 40, 100, 70, 100, 100])
+        self.assertEqual(silla['min_projected'], 40)
+        self.assertEqual(silla['first_shortage'], self.hoy + timedelta(days=2))
+        self.assertEqual(silla['shortage_days'], 2)
+        self.assertEqual(items['mesa']['projection'], [20] * 8)
+        self.assertEqual(response.data['items_with_shortage'], 2)
+
+    def test_filters_and_validation(self):
+        response = self.client.get(
+            '/api/inventory/items/projection/', {'category': 'sillas', 'id': self.silla.pk, 'horizon': 3}
+        )
+        self.assertEqual([item['id'] for item in response.data['items']], [self.silla.pk])
+        self.assertEqual(len(response.data['items'][0]['projection']), 3)
+
+        response = self.client.get('/api/inventory/items/projection/', {'shortages_only': 'true', 'minimum': 50})
+        self.assertEqual([item['model'] for item in response.data['items']], ['silla', 'mesa'])
+        response = self.client.get('/api/inventory/items/projection/', {'shortages_only': 'true', 'minimum': 30})
+        self.assertEqual([item['model'] for item in response.data['items']], ['mesa'])
+
+        for params in ({'horizon': 0}, {'horizon': 'x'}, {'category': 'naves'}, {'id': self.silla.pk}):
+            self.assertEqual(self.client.get('/api/inventory/items/projection/', params).status_code, 400)
+        self.assertEqual(
+            self.client.get('/api/inventory/items/projection/', {'category': 'sillas', 'id': 999}).status_code, 404
+        )
+
+    def test_cache_follows_event_changes(self):
+        self.client.get('/api/inventory/items/projection/')
+        Evento.objects.get().delete()
+        response = self.client.get('/api/inventory/items/projection/', {'category': 'sillas', 'horizon': 4})
+        self.assertEqual(response.data['items'][0]['projection'], [100, 100, 100, 100])
+
+
+@override_settings(REORDER_LEAD_DAYS=14, REORDER_CYCLE_DAYS=30, REORDER_SERVICE_Z=1.65)
+class DemandForecastTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.boda = TipoEvento.objects.create(nombre='Boda')
+        self.silla = Silla.objects.create(producto='Tiffany', cantidad=1000)
+        self.mesa = Mesa.objects.create(producto='Redonda', cantidad=20)
+        self.hoy = date(2030, 6, 1)
+        for dia in (date(2029, 4, 10), date(2029, 5, 2), date(2029, 5, 20), date(2029, 6, 14)):
+            self.archivar(dia, 100)
+        self.archivar(date(2029, 5, 25), 300, estado='Cancelado')
+
+    def archivar(self, fecha, unidades, estado='Finalizado'):
+        evento = Evento.objects.create(
+            nombre=f'Boda {fecha}', cantidad_personas=120, responsable='Ana', lugar='Salón', tipo_evento=self.boda,
+            fecha_inicio=fecha, hora_inicio=time(18, 0), estado=estado
+        )
+        # Dos líneas del mismo artículo cuentan como un solo uso
+        for parte in (unidades - unidades // 2, unidades // 2):
+            HistorialMobiliario.objects.create(
+                content_object=self.silla, cantidad=parte, origen='evento', evento=evento,
+                tipo_evento=self.boda, estado=estado, fecha=fecha
+            )
+
+    def test_upcoming_bookings_weight_the_segments(self):
+        corporativo = TipoEvento.objects.create(nombre='Corporativo')
+        for dia in (date(2029, 4, 12), date(2029, 5, 3), date(2029, 5, 21), date(2029, 6, 15)):
+            evento = Evento.objects.create(
+                nombre=f'Junta {dia}', cantidad_personas=30, responsable='Ana', lugar='Salón', tipo_evento=corporativo,
+                fecha_inicio=dia, hora_inicio=time(9, 0), estado='Finalizado'
+            )
+            HistorialMobiliario.objects.create(
+                content_object=self.silla, cantidad=10, origen='evento', evento=evento, tipo_evento=corporativo,
+                estado='Finalizado', fecha=dia
+            )
+        # Sin reservas se promedia el historial: 8 eventos, 55 sillas cada uno
+        pronostico.actualizar(hoy=self.hoy)
+        self.assertEqual(PuntoReorden.objects.get().cantidad_reorden, 92)
+        # Con solo juntas reservadas pesan las juntas (10 sillas); con bodas, las bodas (100)
+        Evento.objects.create(nombre='Junta', cantidad_personas=40, responsable='Ana', lugar='Salón',
+                              tipo_evento=corporativo, fecha_inicio=self.hoy + timedelta(days=3), hora_inicio=time(9, 0))
+        self.assertEqual(pronostico.mezcla_reservada(self.hoy), {(corporativo.pk, 0): 1})
+        pronostico.recalcular(hoy=self.hoy)
+        self.assertEqual(PuntoReorden.objects.get().cantidad_reorden, 17)
+        Evento.objects.create(nombre='Boda', cantidad_personas=150, responsable='Ana', lugar='Jardín',
+                              tipo_evento=self.boda, fecha_inicio=self.hoy + timedelta(days=5), hora_inicio=time(18, 0))
+        Evento.objects.create(nombre='Boda', cantidad_personas=180, responsable='Ana', lugar='Jardín',
+                              tipo_evento=self.boda, fecha_inicio=self.hoy + timedelta(days=6), hora_inicio=time(18, 0))
+        pronostico.recalcular(hoy=self.hoy)
+        # 2 bodas y 1 junta: (2 * 100 + 10) / 3 = 70 sillas por evento
+        self.assertEqual(PuntoReorden.objects.get().cantidad_reorden, 117)
+
+    def test_reorder_point_from_seasonal_demand(self):
+        self.assertEqual(pronostico.actualizar(hoy=self.hoy), {'acumulados': 4, 'articulos': 1})
+        segmento = DemandaArticulo.objects.get()
+        self.assertEqual(
+            (segmento.tipo_evento, segmento.rango_personas, segmento.temporada, segmento.eventos, segmento.unidades),
+            (self.boda, 2, 2, 4, 400)
+        )
+        punto = PuntoReorden.objects.get()
+        # 4 eventos en 144 días del segundo trimestre cubiertos por el historial, 100 sillas cada uno
+        self.assertEqual((punto.punto_reorden, punto.cantidad_reorden, punto.temporada), (142, 84, 2))
+
+    def test_only_new_history_is_accumulated(self):
+        pronostico.actualizar(hoy=self.hoy)
+        self.assertEqual(pronostico.actualizar(hoy=self.hoy)['acumulados'], 0)
+        self.archivar(date(2030, 5, 5), 60)
+        self.assertEqual(pronostico.actualizar(hoy=self.hoy)['acumulados'], 1)
+        segmento = DemandaArticulo.objects.get()
+        self.assertEqual((segmento.eventos, segmento.unidades, segmento.unidades_cuadrado), (5, 460, 4 * 10000 + 3600))
+
+    def test_low_stock_report_and_alerts_use_the_forecast(self):
+        pronostico.actualizar(hoy=self.hoy)
+        Silla.objects.filter(pk=self.silla.pk).update(cantidad=150)
+        response = self.client.get('/api/inventory/items/bajo-stock/')
+        self.assertEqual([(item['tipo'], item['stock_minimo']) for item in response.data], [('mesa', 25)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Silla.ajustar_stock(self.silla.pk, cantidad=-10)
+        self.assertTrue(Notification.objects.filter(message__contains="'Tiffany'").exists())
+        response = self.client.get('/api/inventory/items/bajo-stock/')
+        silla = next(item for item in response.data if item['tipo'] == 'silla')
+        self.assertEqual(
+            (silla['cantidad_actual'], silla['stock_minimo'], silla['cantidad_reorden'], silla['pronosticado']),
+            (140, 142, 84, True)
+        )
+
+
+@override_settings(EVENT_DURATION_HOURS=8, DEGUSTACION_DURATION_HOURS=2)
+class FeasibilityCheckTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hoy = transiciones.hoy()
+        self.silla = Silla.objects.create(producto='Tiffany', cantidad=100)
+        self.silla_ct = ContentType.objects.get_for_model(Silla).id
+        self.sembrador.evento_reservado(self.hoy + timedelta(days=2), time(20, 0), {self.silla: 60})
+
+    def candidato(self, dias, **campos):
+        return {'fecha_inicio': str(self.hoy + timedelta(days=dias)), 'hora_inicio': '18:00', **campos}
+
+    def linea(self, cantidad, object_id=None, content_type_id=None):
+        return {
+            'content_type_id': content_type_id or self.silla_ct, 'object_id': object_id or self.silla.pk,
+            'cantidad': cantidad,
+        }
+
+    def test_candidates_are_checked_against_their_days_without_writing(self):
+        cuerpo = {
+            'candidatos': [
+                self.candidato(3),
+                self.candidato(6),
+                self.candidato(6, mobiliario=[self.linea(20), self.linea(10), self.linea(1, object_id=999)]),
+            ],
+            'mobiliario': [self.linea(50)],
+        }
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.post('/api/inventory/items/feasibility/', cuerpo, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(q['sql'].lstrip().upper().startswith('SELECT') for q in contexto.captured_queries))
+
+        ocupado, libre, propio = response.data['candidates']
+        self.assertEqual(
+            [(l['disponible'], l['faltante'], l['reservable']) for l in ocupado['lineas']], [(40, 10, False)]
+        )
+        self.assertEqual((ocupado['feasible'], ocupado['fecha_fin']), (False, self.hoy + timedelta(days=4)))
+        self.assertEqual((libre['feasible'], libre['bookable']), (True, False))
+        # Las líneas repetidas de un artículo se suman
+        self.assertEqual([(l['cantidad'], l['faltante']) for l in propio['lineas']], [(30, 0), (1, 1)])
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_invalid_requests(self):
+        url = '/api/inventory/items/feasibility/'
+        evento_ct = ContentType.objects.get_for_model(Evento).id
+        invalidos = [
+            {'candidatos': [self.candidato(-1)], 'mobiliario': [self.linea(1)]},
+            {'candidatos': [self.candidato(1)]},
+            {'candidatos': [], 'mobiliario': [self.linea(1)]},
+            {'candidatos': [self.candidato(1)], 'mobiliario': [self.linea(1, content_type_id=evento_ct)]},
+            {'candidatos': [self.candidato(800)], 'mobiliario': [self.linea(1)]},
+        ]
+        for cuerpo in invalidos:
+            self.assertEqual(self.client.post(url, cuerpo, format='json').status_code, 400, cuerpo)
+
+
+@override_settings(EVENT_DURATION_HOURS=8)
+class ReservationConflictTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hoy = transiciones.hoy()
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post('/api/inventory/sillas/', {'producto': 'Tiffany', 'cantidad': 80}, format='json')
+            self.silla = Silla.objects.get(pk=respuesta.data['id'])
+            self.eventos = [
+                self.evento(1, 30), self.evento(1, 30), self.evento(5, 20),
+            ]
+            # Conteo físico por debajo de lo reservado: solo quedan 55 de las 80 sillas
+            respuesta = self.client.post(
+                f'/api/inventory/sillas/{self.silla.pk}/existencias/', {'existencias': 55}, format='json'
+            )
+        self.assertEqual(respuesta.status_code, 200)
+
+    def evento(self, dias, cantidad):
+        respuesta = self.client.post('/api/inventory/eventos/', {
+            'nombre': f'Evento {dias}', 'cantidad_personas': 50, 'responsable': 'Ana', 'lugar': 'Salón',
+            'fecha_inicio': str(self.hoy + timedelta(days=dias)), 'hora_inicio': '10:00',
+            'mobiliario': [{'content_type_id': ContentType.objects.get_for_model(Silla).id,
+                            'object_id': self.silla.pk, 'cantidad': cantidad}],
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        return Evento.objects.get(pk=respuesta.data['id'])
+
+    def test_count_moves_available_stock(self):
+        self.silla.refresh_from_db()
+        self.assertEqual((self.silla.existencias, self.silla.cantidad), (55, -25))
+        # Con disponible negativo no se puede reservar más
+        self.assertEqual(self.client.post('/api/inventory/eventos/', {
+            'nombre': 'Extra', 'cantidad_personas': 10, 'responsable': 'Ana', 'lugar': 'Salón',
+            'fecha_inicio': str(self.hoy + timedelta(days=20)), 'hora_inicio': '10:00',
+            'mobiliario': [{'content_type_id': ContentType.objects.get_for_model(Silla).id,
+                            'object_id': self.silla.pk, 'cantidad': 1}],
+        }, format='json').status_code, 400)
+        url = f'/api/inventory/sillas/{self.silla.pk}/existencias/'
+        for invalido in (-1, '55', True):
+            self.assertEqual(self.client.post(url, {'existencias': invalido}, format='json').status_code, 400)
+
+        # Un conteo mayor repone el disponible; mantenimiento no cambia las existencias
+        self.assertEqual(self.client.post(url, {'existencias': 90}, format='json').status_code, 200)
+        mantenimiento = f'/api/inventory/sillas/{self.silla.pk}/mantenimiento/'
+        self.assertEqual(self.client.post(mantenimiento, {'cantidad': 4}, format='json').status_code, 200)
+        self.assertEqual(self.client.post(url, {'existencias': 3}, format='json').status_code, 400)
+        datos = self.client.get(f'/api/inventory/sillas/{self.silla.pk}/').data
+        self.assertEqual((datos['existencias'], datos['cantidad'], datos['cantidad_en_mantenimiento']), (90, 6, 4))
+        # Editar el disponible a mano no toca las existencias; traerlas en la petición mueve el disponible
+        detalle = f'/api/inventory/sillas/{self.silla.pk}/'
+        self.assertEqual(self.client.patch(detalle, {'cantidad': 10}, format='json').data['existencias'], 90)
+        self.assertEqual(self.client.patch(detalle, {'existencias': 80}, format='json').data['cantidad'], 0)
+        for cuerpo in ({'existencias': 70}, {'cantidad': -1}, {'cantidad': 5, 'existencias': 85},
+                       {'cantidad_en_mantenimiento': 81}):
+            self.assertEqual(self.client.patch(detalle, cuerpo, format='json').status_code, 400, cuerpo)
+        self.assertEqual(self.client.get(detalle).data['cantidad'], 0)
+        self.assertEqual(self.client.get('/api/inventory/items/conflicts/').data['total'], 0)
+
+    def test_window_maximum_matches_a_scan(self):
+        rng = random.Random(7)
+        reservas = []
+        for _ in range(200):
+            desde = rng.randint(0, 300)
+            reservas.append((desde, desde + rng.randint(0, 10), rng.randint(1, 50), 'evento', 1))
+        uso = conflictos.UsoDiario(reservas)
+        por_dia = Counter()
+        for desde, hasta, unidades, *_ in reservas:
+            for dia in range(desde, hasta + 1):
+                por_dia[dia] += unidades
+        for _ in range(300):
+            desde = rng.randint(-5, 320)
+            hasta = desde + rng.randint(0, 40)
+            self.assertEqual(uso.maximo(desde, hasta), max(por_dia[dia] for dia in range(desde, hasta + 1)))
+
+    def test_endpoint_lists_overbooked_days(self):
+        response = self.client.get('/api/inventory/items/conflicts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 1)
+        conflicto = response.data['conflicts'][0]
+        self.assertEqual(
+            (conflicto['id'], conflicto['fecha'], conflicto['reservado'], conflicto['capacidad'], conflicto['exceso']),
+            (self.silla.pk, self.hoy + timedelta(days=1), 60, 55, 5)
+        )
+        self.assertEqual({r['id'] for r in conflicto['reservas']}, {e.pk for e in self.eventos[:2]})
+
+        self.assertEqual(self.client.get('/api/inventory/items/conflicts/', {'category': 'mesas'}).data['total'], 0)
+        desde = str(self.hoy + timedelta(days=2))
+        self.assertEqual(self.client.get('/api/inventory/items/conflicts/', {'start_date': desde}).data['total'], 0)
+        self.assertEqual(self.client.get('/api/inventory/items/conflicts/', {'end_date': 'ayer'}).status_code, 400)
+
+        # Cancelar uno de los eventos resuelve el conflicto
+        cancelado = Evento.objects.get(pk=self.eventos[0].pk)
+        cancelado.estado = 'Cancelado'
+        with self.captureOnCommitCallbacks(execute=True):
+            cancelado.save()
+        self.assertEqual(self.client.get('/api/inventory/items/conflicts/').data['total'], 0)
+
+    def test_nightly_command_notifies(self):
+        call_command('detectar_conflictos', stdout=StringIO())
+        self.assertTrue(Notification.objects.filter(message__startswith='¡Sobreventa de mobiliario!').exists())
+
+
+class KitTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mesa = Mesa.objects.create(producto='Redonda', cantidad=50)
+        self.silla = Silla.objects.create(producto='Tiffany', cantidad=500)
+        self.pista = PistaTarima.objects.create(producto='Pista LED', cantidad=5)
+        self.ct = {model: ContentType.objects.get_for_model(model).id for model in (Mesa, Silla, PistaTarima)}
+        response = self.client.post('/api/inventory/kits/', {
+            'nombre': 'Boda clásica',
+            'lineas': [
+                {'content_type_id': self.ct[Mesa], 'object_id': self.mesa.pk, 'cantidad': 1, 'por_personas': 10},
+                {'content_type_id': self.ct[Silla], 'object_id': self.silla.pk, 'cantidad': 10, 'por_personas': 10},
+                {'content_type_id': self.ct[PistaTarima], 'object_id': self.pista.pk, 'cantidad': 1},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.kit = Kit.objects.get(pk=response.data['id'])
+
+    def crear_evento(self, **campos):
+        return self.client.post('/api/inventory/eventos/', {
+            'nombre': 'Boda', 'cantidad_personas': 95, 'responsable': 'Ana', 'lugar': 'Salón',
+            'fecha_inicio': '2030-05-04', 'hora_inicio': '18:00', **campos
+        }, format='json')
+
+    def asignado(self, evento_id):
+        return {
+            (linea.content_type_id, linea.object_id): linea.cantidad
+            for linea in EventoMobiliario.objects.filter(evento_id=evento_id)
+        }
+
+    def test_kit_is_scaled_by_guests(self):
+        response = self.client.get(f'/api/inventory/kits/{self.kit.pk}/expandir/', {'cantidad_personas': 95})
+        self.assertEqual(
+            [(linea['producto'], linea['cantidad']) for linea in response.data['mobiliario']],
+            [('Redonda', 10), ('Tiffany', 100), ('Pista LED', 1)]
+        )
+        self.assertEqual(
+            self.client.get(f'/api/inventory/kits/{self.kit.pk}/expandir/', {'cantidad_personas': 0}).status_code, 400
+        )
+        invalido = self.client.post('/api/inventory/kits/', {'nombre': 'Otro', 'lineas': [
+            {'content_type_id': self.ct[Mesa], 'object_id': 999, 'cantidad': 1},
+        ]}, format='json')
+        self.assertEqual(invalido.status_code, 400)
+
+    def test_event_reserves_kit_and_manual_lines_in_one_batch(self):
+        extra = {'content_type_id': self.ct[Silla], 'object_id': self.silla.pk, 'cantidad': 5}
+        response = self.crear_evento(kit=self.kit.pk, mobiliario=[extra])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.asignado(response.data['id']), {
+            (self.ct[Mesa], self.mesa.pk): 10,
+            (self.ct[Silla], self.silla.pk): 105,
+            (self.ct[PistaTarima], self.pista.pk): 1,
+        })
+        self.assertEqual(Silla.objects.get().cantidad, 395)
+        linea = EventoMobiliario.objects.get(object_id=self.silla.pk, content_type_id=self.ct[Silla])
+        self.assertEqual(linea.producto, 'Tiffany')
+
+    def test_batch_queries_do_not_grow_with_lines(self):
+        sillas = [Silla.objects.create(producto=f'Silla {i}', cantidad=100) for i in range(12)]
+
+        def consultas(n):
+            mobiliario = [
+                {'content_type_id': self.ct[Silla], 'object_id': silla.pk, 'cantidad': 1} for silla in sillas[:n]
+            ]
+            with CaptureQueriesContext(connection) as contexto:
+                self.assertEqual(self.crear_evento(mobiliario=mobiliario).status_code, 201)
+            return len(contexto.captured_queries)
+
+        self.assertEqual(consultas(2), consultas(12))
+
+    def test_shortage_rolls_back(self):
+        response = self.crear_evento(kit=self.kit.pk, cantidad_personas=600)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Redonda', response.data['error'])
+        self.assertFalse(Evento.objects.exists())
+        self.assertEqual(Silla.objects.get().cantidad, 500)
+
+    def test_clone_allocations(self):
+        origen = self.crear_evento(kit=self.kit.pk).data['id']
+        destino = self.crear_evento(cantidad_personas=190).data['id']
+        response = self.client.post(
+            f'/api/inventory/eventos/{destino}/clonar-mobiliario/', {'evento_origen': origen, 'escalar': True},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data['mobiliario_asignado']), 3)
+        self.assertEqual(self.asignado(destino), {
+            (self.ct[Mesa], self.mesa.pk): 20,
+            (self.ct[Silla], self.silla.pk): 200,
+            (self.ct[PistaTarima], self.pista.pk): 2,
+        })
+        self.assertEqual(Silla.objects.get().cantidad, 500 - 100 - 200)
+
+        # Un evento ya terminado se clona desde su historial
+        terminado = Evento.objects.get(pk=origen)
+        terminado.estado = 'Finalizado'
+        terminado.save()
+        otro = self.crear_evento().data['id']
+        response = self.client.post(
+            f'/api/inventory/eventos/{otro}/clonar-mobiliario/', {'evento_origen': origen}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.asignado(otro)[(self.ct[Silla], self.silla.pk)], 100)
+
+        for cuerpo in ({'evento_origen': otro}, {'evento_origen': 'x'}, {}):
+            response = self.client.post(f'/api/inventory/eventos/{otro}/clonar-mobiliario/', cuerpo, format='json')
+            self.assertEqual(response.status_code, 400)
+
+
+class MetricsTests(APITestCase):
+    def test_exposition_format(self):
+        registro = Registry()
+        contador = registro.counter('pruebas_total', 'Pruebas.', ('vista',))
+        contador.inc(vista='a"b')
+        contador.inc(2, vista='a"b')
+        medidor = registro.gauge('en_cola', 'Tareas en cola.')
+        medidor.set(1.5)
+        histograma = registro.histogram('duracion_seconds', 'Duración.', buckets=(0.1, 1))
+        histograma.observe(0.05)
+        histograma.observe(0.5)
+        self.assertEqual(registro.render(), '\n'.join([
+            '# HELP pruebas_total Pruebas.',
+            '# TYPE pruebas_total counter',
+            'pruebas_total{vista="a\\"b"} 3',
+            '# HELP en_cola Tareas en cola.',
+            '# TYPE en_cola gauge',
+            'en_cola 1.5',
+            '# HELP duracion_seconds Duración.',
+            '# TYPE duracion_seconds histogram',
+            'duracion_seconds_bucket{le="0.1"} 1',
+            'duracion_seconds_bucket{le="1"} 2',
+            'duracion_seconds_bucket{le="+Inf"} 2',
+            'duracion_seconds_sum 0.55',
+            'duracion_seconds_count 2',
+        ]) + '\n')
+        with self.assertRaises(ValueError):
+            contador.inc(otra='x')
+        # Con una función el valor se calcula al momento del scrape
+        medidor.set_function(lambda: 4)
+        self.assertEqual(medidor.render().splitlines()[-1], 'en_cola 4')
+
+    def test_token_or_authenticated_user(self):
+        with self.settings(METRICS_TOKEN='secreto'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_X_METRICS_TOKEN='otro').status_code, 401)
+            response = self.client.get('/metrics', HTTP_X_METRICS_TOKEN='secreto')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+            self.assertIn('# TYPE http_request_duration_seconds histogram', response.content.decode())
+        # Sin token configurado solo entra un usuario autenticado
+        self.assertEqual(self.client.get('/metrics', HTTP_X_METRICS_TOKEN='').status_code, 401)
+        self.client.force_authenticate(User.objects.create_user('metricas', password='x'))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_middleware_labels(self):
+        self.client.force_authenticate(User.objects.create_user('etiquetas', password='x'))
+        def conteos():
+            return {clave: valor for sufijo, clave, _, valor in HTTP_REQUEST_SECONDS.samples() if sufijo == '_count'}
+
+        antes = conteos()
+        self.client.get('/api/inventory/bodegas/')
+        self.client.get('/no-existe/')
+        despues = conteos()
+        for clave in [('bodega-list', 'GET', '200'), ('sin_resolver', 'GET', '404')]:
+            self.assertEqual(despues[clave] - antes.get(clave, 0), 1, clave)
+        self.assertIn(('bodega-list',), {clave for _, clave, _, _ in DB_QUERIES.samples()})
+
+    def test_unnamed_routes_use_the_view_path(self):
+        request = mock.Mock(resolver_match=ResolverMatch(MetricsView.as_view(), (), {}))
+        self.assertEqual(nombre_de_vista(request), 'backend.views.MetricsView')
+        request.resolver_match = ResolverMatch(nombre_de_vista, (), {})
+        self.assertEqual(nombre_de_vista(request), 'backend.middleware.nombre_de_vista')
+
+
+class SyntheticDataTests(APITestCase):
+    def test_small_run_without_warehouses(self):
+        salida = StringIO()
+        call_command('generar_datos_sinteticos', bodegas=0, items=22, eventos=40, degustaciones=6, clientes=3,
+                     notificaciones=10, semilla=1, stdout=salida)
+        self.assertIn('Datos sintéticos generados.', salida.getvalue())
+        self.assertEqual(Bodega.objects.count(), 0)
+        self.assertEqual(sum(model.objects.count() for model in INVENTORY_MODELS), 22)
+        self.assertEqual((Evento.objects.count(), Degustacion.objects.count(), Cliente.objects.count()), (40, 6, 3))
+        self.assertTrue(EventoMobiliario.objects.exists())
+        self.assertFalse(EventoMobiliario.objects.exclude(bodega_nombre='').exists())
+        # Las asignaciones pendientes ya están descontadas y el historial solo tiene eventos cerrados
+        self.assertFalse(EventoMobiliario.objects.exclude(evento__estado='Por iniciar').exists())
+        self.assertFalse(HistorialMobiliario.objects.filter(estado='Por iniciar').exists())
+        for model in INVENTORY_MODELS:
+            self.assertFalse(model.objects.filter(cantidad__lt=0).exists(), model)
+
+    def test_items_must_be_positive(self):
+        with self.assertRaisesMessage(CommandError, '--items'):
+            call_command('generar_datos_sinteticos', items=0, eventos=1, stdout=StringIO())
+        self.assertFalse(Evento.objects.exists())
+
+    def test_lines_copy_the_warehouse_name(self):
+        generar_datos(bodegas=2, items=11, eventos=20, degustaciones=2, clientes=1, notificaciones=0, semilla=2)
+        nombres = set(Bodega.objects.values_list('nombre', flat=True))
+        self.assertTrue(set(EventoMobiliario.objects.values_list('bodega_nombre', flat=True)) <= nombres)
+
+
+class ProfilerTests(APITestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+        ajustes = self.settings(PROFILER_DIR=self.directorio, PROFILER_MAX_ENTRIES=2)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.staff = User.objects.create_user('perfiles', password='x', is_staff=True)
+        self.usuario = User.objects.create_user('normal', password='x')
+
+    def perfilar(self, user=None, url='/api/inventory/bodegas/'):
+        cabeceras = {'HTTP_X_PROFILE': '1'}
+        if user is not None:
+            cabeceras['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+        return self.client.get(url, **cabeceras)
+
+    def test_only_staff_get_a_profile(self):
+        self.assertNotIn('X-Profile-Id', self.perfilar())
+        response = self.perfilar(self.usuario)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(list(self.directorio.iterdir()), [])
+
+        response = self.perfilar(self.staff)
+        perfil_id = response['X-Profile-Id']
+        self.assertTrue(profiling.ID_PATTERN.match(perfil_id))
+        self.assertTrue(response['X-Profile-URL'].endswith(f'/api/profiles/{perfil_id}/'))
+        self.client.force_authenticate(self.staff)
+        perfil = self.client.get(f'/api/profiles/{perfil_id}/').data
+        self.assertEqual((perfil['vista'], perfil['usuario'], perfil['estado']), ('bodega-list', 'perfiles', 200))
+        self.assertIn('cumulative', perfil['estadisticas'])
+        self.assertEqual([p['id'] for p in self.client.get('/api/profiles/').data], [perfil_id])
+        # Los perfiles solo los ve el staff
+        self.client.force_authenticate(self.usuario)
+        self.assertEqual(self.client.get(f'/api/profiles/{perfil_id}/').status_code, 403)
+
+    def test_ids_outside_the_pattern_are_not_found(self):
+        self.client.force_authenticate(self.staff)
+        (self.directorio / 'otro.prof').write_bytes(b'')
+        for perfil_id in ['otro', '..%2Fsecreto', '20240101T000000000000-ZZZZZZZZ']:
+            self.assertEqual(self.client.get(f'/api/profiles/{perfil_id}/').status_code, 404, perfil_id)
+            self.assertEqual(self.client.get(f'/api/profiles/{perfil_id}/?raw=1').status_code, 404, perfil_id)
+
+    def test_ring_buffer_keeps_the_latest_entries(self):
+        ids = [self.perfilar(self.staff)['X-Profile-Id'] for _ in range(3)]
+        self.assertEqual(sorted(archivo.name for archivo in self.directorio.iterdir()), sorted(
+            f'{perfil_id}.{extension}' for perfil_id in ids[1:] for extension in ('json', 'prof')
+        ))
+        self.assertEqual([perfil['id'] for perfil in profiling.listar()], ids[:0:-1])
+        self.assertIsNone(profiling.cargar(ids[0]))
+
+    def test_listing_tolerates_a_concurrent_trim(self):
+        self.perfilar(self.staff)
+        with mock.patch.object(Path, 'read_text', side_effect=FileNotFoundError):
+            self.assertEqual(profiling.listar(), [])
@@ -0,0 +1,158 @@
+"""
+Cambios de estado automáticos de eventos y degustaciones.
+
+Un evento pasa a "En proceso" cuando llega su fecha y hora de inicio y a
+"Finalizado" cuando además transcurre su duración (EVENT_DURATION_HOURS,
+DEGUSTACION_DURATION_HOURS). Los vencidos se cierran por lotes y cada lote
+hace el mismo trabajo que Evento.save() al finalizar, pero por conjuntos:
+devuelve el stock con un UPDATE por categoría, archiva las líneas con un
+solo INSERT y las borra. Antes, el lote se reclama con un UPDATE condicionado
+a que cada evento siga abierto, para no devolver dos veces el mobiliario de
+uno que la API cerró mientras tanto.
+
+La fecha y la hora de inicio se guardan sin zona horaria: se interpretan en
+EVENT_TIME_ZONE, la zona del negocio.
+"""
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import cache
+from .models import (
+    Evento, EventoMobiliario, Degustacion, DegustacionMobiliario, HistorialMobiliario, Notification,
+    devolver_asignaciones
+)
+
+
+ABIERTOS = ['Por iniciar', 'En proceso']
+
+
+def zona():
+    return ZoneInfo(settings.EVENT_TIME_ZONE)
+
+
+def hoy():
+    """Fecha actual en la zona horaria de los eventos."""
+    return timezone.localdate(timezone=zona())
+
+
+class Programa:
+    """Cómo se calendariza y se cierra un tipo de evento."""
+
+    def __init__(self, model, lineas, origen, fecha, hora, duracion, datos_historial, mensaje):
+        self.model = model
+        self.lineas = lineas
+        self.origen = origen
+        self.fecha = fecha
+        self.hora = hora
+        self.duracion = duracion
+        self.datos_historial = datos_historial
+        self.mensaje = mensaje
+
+    def hasta(self, momento):
+        """Condición: empieza en `momento` o antes (fecha y hora en EVENT_TIME_ZONE)."""
+        local = timezone.localtime(momento, zona())
+        return Q(**{f'{self.fecha}__lt': local.date()}) | Q(
+            **{self.fecha: local.date(), f'{self.hora}__lte': local.time()}
+        )
+
+    def vencidos(self, ahora):
+        horas = getattr(settings, self.duracion)
+        return self.model.objects.filter(estado__in=ABIERTOS).filter(self.hasta(ahora - timedelta(hours=horas)))
+
+
+PROGRAMAS = [
+    Programa(
+        Evento, EventoMobiliario, 'evento', 'fecha_inicio', 'hora_inicio', 'EVENT_DURATION_HOURS',
+        datos_historial=lambda evento: {
+            'evento_id': evento.id, 'tipo_evento_id': evento.tipo_evento_id, 'fecha': evento.fecha_inicio,
+        },
+        mensaje=lambda evento: f"El evento '{evento.nombre}' en '{evento.lugar}' ha terminado.",
+    ),
+    Programa(
+        Degustacion, DegustacionMobiliario, 'degustacion', 'fecha_degustacion', 'hora_degustacion',
+        'DEGUSTACION_DURATION_HOURS',
+        datos_historial=lambda degustacion: {'degustacion_id': degustacion.id, 'fecha': degustacion.fecha_degustacion},
+        mensaje=lambda degustacion: f"La degustación del evento '{degustacion.nombre}' ha finalizado.",
+    ),
+]
+
+
+def iniciar(programa, ahora):
+    """Pasa a "En proceso" los que ya empezaron (se llama después de cerrar los vencidos); devuelve cuántos."""
+    iniciados = (
+        programa.model.objects.filter(estado='Por iniciar').filter(programa.hasta(ahora))
+        .update(estado='En proceso', updated_at=ahora)
+    )
+    if iniciados:
+        invalidar(programa)
+    return iniciados
+
+
+def reclamar(programa, candidatos, ahora):
+    """
+    Pasa a "Finalizado" los candidatos que siguen abiertos y devuelve solo
+    esos. Un evento que la API cerró (Evento.save) después de leer los
+    vencidos ya devolvió su mobiliario: no se vuelve a procesar.
+    """
+    abiertos = set(
+        programa.model.objects.filter(pk__in=[obj.pk for obj in candidatos], estado__in=ABIERTOS)
+        .values_list('pk', flat=True)
+    )
+    programa.model.objects.filter(pk__in=abiertos, estado__in=ABIERTOS).update(estado='Finalizado', updated_at=ahora)
+    return [obj for obj in candidatos if obj.pk in abiertos]
+
+
+@transaction.atomic
+def finalizar_lote(programa, ahora, lote):
+    """Finaliza hasta `lote` eventos vencidos; devuelve cuántos."""
+    # select_for_update bloquea las filas hasta el commit donde la base de datos lo soporta
+    candidatos = list(
+        programa.vencidos(ahora).select_for_update().order_by(programa.fecha, programa.hora, 'pk')[:lote]
+    )
+    if not candidatos:
+        return 0
+
+    objetos = {obj.pk: obj for obj in reclamar(programa, candidatos, ahora)}
+    if objetos:
+        lineas = list(programa.lineas.objects.filter(**{f'{programa.origen}_id__in': list(objetos)}))
+        devolver_asignaciones(lineas)
+        HistorialMobiliario.archivar(
+            lineas, origen=programa.origen, estado='Finalizado',
+            datos_de=lambda linea: programa.datos_historial(objetos[getattr(linea, f'{programa.origen}_id')]),
+        )
+        programa.lineas.objects.filter(pk__in=[linea.pk for linea in lineas]).delete()
+        Notification.objects.bulk_create([Notification(message=programa.mensaje(obj)) for obj in objetos.values()])
+        invalidar(programa)
+    return len(objetos)
+
+
+def invalidar(programa):
+    # update() y bulk_create() no disparan los signals de post_save
+    cache.invalidar_al_confirmar(
+        cache.EVENTOS, cache.tabla(programa.model), cache.tabla(HistorialMobiliario), cache.tabla(Notification)
+    )
+
+
+def procesar(ahora=None, lote=200):
+    """
+    Aplica todas las transiciones pendientes.
+
+    Returns:
+        dict: {origen: {'en_proceso': n, 'finalizados': n}}.
+    """
+    ahora = ahora or timezone.now()
+    resumen = {}
+    for programa in PROGRAMAS:
+        finalizados = 0
+        while True:
+            procesados = finalizar_lote(programa, ahora, lote)
+            finalizados += procesados
+            if procesados < lote:
+                break
+        resumen[programa.origen] = {'en_proceso': iniciar(programa, ahora), 'finalizados': finalizados}
+    return resumen
@@ -5,7 +5,9 @@ from .views import (
     CristaleriaViewSet, SillaViewSet, MesaViewSet, SalaLoungeViewSet, PeriqueraViewSet, CarpaViewSet, 
     PistaTarimaViewSet, ExtraViewSet, EventoViewSet, ContentTypeViewSet, DegustacionViewSet, ProductViewSet, 
     CalendarDataAPIView, NotificationViewSet, InventoryUsageReportView, BackupCreateView, BackupRestoreView,
-    LowStockInventoryView, WarehouseInventoryReportView, MaintenanceReportView, EventAnalysisReportView
+    LowStockInventoryView, WarehouseInventoryReportView, MaintenanceReportView, EventAnalysisReportView,
+    UsageAnalyticsView, InventorySearchView, AutocompleteView, InventoryOverviewView, InventoryProjectionView,
+    FeasibilityCheckView, ReservationConflictsView, KitViewSet
 )
 
 router = DefaultRouter()
@@ -25,6 +27,7 @@ router.register(r'pistas-tarimas', PistaTarimaViewSet, basename='pista-tarima')
 router.register(r'extras', ExtraViewSet, basename='extra')
 router.register(r'eventos', EventoViewSet, basename='evento')
 router.register(r'degustaciones', DegustacionViewSet, basename='degustacion')
+router.register(r'kits', KitViewSet, basename='kit')
 router.register(r'content-types', ContentTypeViewSet, basename='content-type')
 router.register(r'products', ProductViewSet, basename='product')
 router.register(r'notifications', NotificationViewSet, basename='notification')
@@ -46,7 +49,28 @@ urlpatterns = [
     
     # 5. Event analysis report endpoint
     path('items/event-analysis/', EventAnalysisReportView.as_view(), name='event-analysis'),
+
+    # 6. Furniture usage analytics (allocation history)
+    path('items/usage-analytics/', UsageAnalyticsView.as_view(), name='usage-analytics'),
+
+    # 7. Global inventory search (FTS5 index)
+    path('items/search/', InventorySearchView.as_view(), name='inventory-search'),
+
+    # 8. Typeahead for clients, products and inventory items
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+
+    # 9. Inventory overview (one cached request for the 11 categories)
+    path('items/overview/', InventoryOverviewView.as_view(), name='inventory-overview'),
     
-    # 6. ROUTER (AL FINAL)
+    # 10. Projected available stock per day (open events and degustaciones)
+    path('items/projection/', InventoryProjectionView.as_view(), name='inventory-projection'),
+
+    # 11. Read-only feasibility check of candidate dates and furniture lists
+    path('items/feasibility/', FeasibilityCheckView.as_view(), name='feasibility-check'),
+
+    # 12. Overbooked (item, day) pairs among open reservations
+    path('items/conflicts/', ReservationConflictsView.as_view(), name='reservation-conflicts'),
+
+    # 13. ROUTER (AL FINAL)
     path('', include(router.urls)), 
 ]
\ No newline at end of file
@@ -1,22 +1,30 @@
+import math
 import os
+import re
 import shutil
+from collections import Counter
 from rest_framework import serializers, viewsets, filters, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.conf import settings
 from django.http import FileResponse, Http404, HttpResponse # Combinamos HttpResponse aquí
 from django.db import connection, transaction, models
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
 
 # Importaciones de Modelos y Serializadores (Se mantienen al final)
 from .models import (
     TipoEvento, Bodega, Cliente, Manteleria, Cubierto, Loza, Cristaleria, Silla, Mesa, SalaLounge, 
-    Periquera, Carpa, PistaTarima, Extra, Evento, EventoMobiliario, Degustacion, DegustacionMobiliario, Product, Notification
+    Periquera, Carpa, PistaTarima, Extra, Evento, EventoMobiliario, Degustacion, DegustacionMobiliario, Product, Notification,
+    HistorialMobiliario, PuntoReorden, Kit, StockInsuficiente, reservar_asignaciones
 )
 from .serializers import (
     TipoEventoSerializer, BodegaSerializer, ClienteSerializer, ManteleriaSerializer, CubiertoSerializer, 
     LozaSerializer, CristaleriaSerializer, SillaSerializer, MesaSerializer, SalaLoungeSerializer, 
     PeriqueraSerializer, CarpaSerializer, PistaTarimaSerializer, ExtraSerializer, EventoSerializer, DegustacionSerializer,
-    ProductSerializer, CalendarActivitySerializer, NotificationSerializer
+    EventoListSerializer, DegustacionListSerializer, ProductSerializer, CalendarActivitySerializer,
+    NotificationSerializer, FactibilidadSerializer, KitSerializer, parametro_lista
 )
 
 # 💡 Importación ÚNICA Y CORRECTA de datetime
@@ -36,6 +44,11 @@ from openpyxl.styles import Font, Alignment
 from django.contrib.contenttypes.models import ContentType
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
+from backend.metrics import REPORT_RENDER_SECONDS
+from . import autocomplete, cache, conflictos, proyeccion, search, transiciones
+from .conditional import ConditionalGetMixin, IfMatchMixin
+from .idempotency import idempotente
+from .transiciones import ABIERTOS
 
 # Importaciones de Modelos y Serializadores (Se mantienen al final)
 from .models import (
@@ -49,12 +62,12 @@ from .serializers import (
     ProductSerializer, CalendarActivitySerializer, NotificationSerializer
 )
 
-class TipoEventoViewSet(viewsets.ModelViewSet):
+class TipoEventoViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = TipoEvento.objects.all()
     serializer_class = TipoEventoSerializer
     permission_classes = [IsAuthenticated]
 
-class BodegaViewSet(viewsets.ModelViewSet):
+class BodegaViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Bodega.objects.all()
     serializer_class = BodegaSerializer
     permission_classes = [IsAuthenticated]
@@ -69,13 +82,10 @@ class MantenimientoMixin:
         if not isinstance(cantidad_a_mantenimiento, int) or cantidad_a_mantenimiento <= 0:
             return Response({'error': 'La cantidad debe ser un número positivo.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if cantidad_a_mantenimiento > item.cantidad:
+        # La existencia se comprueba en el mismo UPDATE que la descuenta
+        if not type(item).ajustar_stock(item.pk, cantidad=-cantidad_a_mantenimiento, mantenimiento=cantidad_a_mantenimiento):
             return Response({'error': 'No hay suficiente stock disponible para enviar a mantenimiento.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        item.cantidad -= cantidad_a_mantenimiento
-        item.cantidad_en_mantenimiento += cantidad_a_mantenimiento
-        item.save()
-
         # Crear notificación
         message = f"Han ingresado al mantenimiento {cantidad_a_mantenimiento} {item.producto}."
         Notification.objects.create(message=message)
@@ -91,156 +101,268 @@ class MantenimientoMixin:
         if not isinstance(cantidad_a_reintegrar, int) or cantidad_a_reintegrar <= 0:
             return Response({'error': 'La cantidad debe ser un número positivo.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if cantidad_a_reintegrar > item.cantidad_en_mantenimiento:
+        if not type(item).ajustar_stock(item.pk, cantidad=cantidad_a_reintegrar, mantenimiento=-cantidad_a_reintegrar):
             return Response({'error': 'La cantidad a reintegrar excede la que está en mantenimiento.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        item.cantidad_en_mantenimiento -= cantidad_a_reintegrar
-        item.cantidad += cantidad_a_reintegrar
-        item.save()
-
         # Crear notificación
         message = f"Han salido del mantenimiento {cantidad_a_reintegrar} {item.producto}."
         Notification.objects.create(message=message)
 
         return Response({'status': 'success', 'message': f'{cantidad_a_reintegrar} unidades reintegradas al stock.'}, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['post'])
+    @transaction.atomic
+    def existencias(self, request, pk=None):
+        item = self.get_object()
+        existencias = request.data.get('existencias')
+
+        if not isinstance(existencias, int) or isinstance(existencias, bool) or existencias < 0:
+            return Response({'error': 'Las existencias deben ser un número entero no negativo.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not type(item).contar_existencias(item.pk, existencias):
+            return Response({'error': 'Las existencias no pueden ser menores que las unidades en mantenimiento.'}, status=status.HTTP_400_BAD_REQUEST)
 
-class ClienteViewSet(viewsets.ModelViewSet):
+        # Crear notificación
+        message = f"Conteo físico de {item.producto}: {existencias} unidades (antes {item.existencias})."
+        Notification.objects.create(message=message)
+
+        return Response({'status': 'success', 'message': f'Existencias actualizadas a {existencias} unidades.'}, status=status.HTTP_200_OK)
+
+
+class ClienteViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (TipoEvento,)
 
-class ManteleriaViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = Manteleria.objects.all().order_by('-created_at')
+class ManteleriaViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = Manteleria.objects.select_related('bodega').order_by('-created_at')
     serializer_class = ManteleriaSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
-class CubiertoViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = Cubierto.objects.all().order_by('-created_at')
+class CubiertoViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = Cubierto.objects.select_related('bodega').order_by('-created_at')
     serializer_class = CubiertoSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
-class LozaViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = Loza.objects.all().order_by('-created_at')
+class LozaViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = Loza.objects.select_related('bodega').order_by('-created_at')
     serializer_class = LozaSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
-class CristaleriaViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = Cristaleria.objects.all().order_by('-created_at')
+class CristaleriaViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = Cristaleria.objects.select_related('bodega').order_by('-created_at')
     serializer_class = CristaleriaSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
-class SillaViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = Silla.objects.all().order_by('-created_at')
+class SillaViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = Silla.objects.select_related('bodega').order_by('-created_at')
     serializer_class = SillaSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
-class MesaViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = Mesa.objects.all().order_by('-created_at')
+class MesaViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = Mesa.objects.select_related('bodega').order_by('-created_at')
     serializer_class = MesaSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
-class SalaLoungeViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = SalaLounge.objects.all().order_by('-created_at')
+class SalaLoungeViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = SalaLounge.objects.select_related('bodega').order_by('-created_at')
     serializer_class = SalaLoungeSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
-class PeriqueraViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = Periquera.objects.all().order_by('-created_at')
+class PeriqueraViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = Periquera.objects.select_related('bodega').order_by('-created_at')
     serializer_class = PeriqueraSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
-class CarpaViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = Carpa.objects.all().order_by('-created_at')
+class CarpaViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = Carpa.objects.select_related('bodega').order_by('-created_at')
     serializer_class = CarpaSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
-class PistaTarimaViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = PistaTarima.objects.all().order_by('-created_at')
+class PistaTarimaViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = PistaTarima.objects.select_related('bodega').order_by('-created_at')
     serializer_class = PistaTarimaSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
-class ExtraViewSet(MantenimientoMixin, viewsets.ModelViewSet):
-    queryset = Extra.objects.all().order_by('-created_at')
+class ExtraViewSet(ConditionalGetMixin, IfMatchMixin, MantenimientoMixin, viewsets.ModelViewSet):
+    queryset = Extra.objects.select_related('bodega').order_by('-created_at')
     serializer_class = ExtraSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (Bodega,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['producto', 'descripcion']
 
 
 # --- Vistas para Eventos con lógica de negocio ---
 
-class EventoViewSet(viewsets.ModelViewSet):
-    queryset = Evento.objects.all().order_by('-created_at')
+def con_mobiliario(queryset, request, action):
+    """
+    Prepara el queryset de eventos/degustaciones según la acción. El listado
+    solo anota el número de líneas y de unidades de mobiliario (una consulta
+    sin importar cuántas asignaciones haya); el detalle precarga el árbol
+    completo de asignaciones.
+    """
+    if action == 'list':
+        queryset = queryset.annotate(
+            total_lineas=models.Count('mobiliario_asignado'),
+            total_unidades=Coalesce(models.Sum('mobiliario_asignado__cantidad'), 0),
+        )
+        incluir = 'mobiliario_asignado' in (parametro_lista(request, 'expand') or set())
+    else:
+        incluir = True
+    campos = parametro_lista(request, 'fields')
+    if incluir and (campos is None or 'mobiliario_asignado' in campos):
+        queryset = queryset.prefetch_related('mobiliario_asignado')
+    return queryset
+
+
+def validar_stock(unidades):
+    """
+    Comprueba con una consulta por categoría que los artículos
+    ({(content_type_id, object_id): unidades}) existen y tienen stock.
+
+    Returns:
+        str: El primer error encontrado, o None.
+    """
+    por_categoria = {}
+    for content_type_id, object_id in unidades:
+        por_categoria.setdefault(content_type_id, []).append(object_id)
+    existencias = {}
+    for content_type_id, object_ids in por_categoria.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        for pk, producto, cantidad in model.objects.filter(pk__in=object_ids).values_list('pk', 'producto', 'cantidad'):
+            existencias[(content_type_id, pk)] = (producto, cantidad)
+    for (content_type_id, object_id), cantidad in unidades.items():
+        if (content_type_id, object_id) not in existencias:
+            return f"El item de mobiliario con id {object_id} no existe."
+        producto, disponible = existencias[(content_type_id, object_id)]
+        if disponible < cantidad:
+            return f"No hay suficiente stock para {producto}. Disponible: {disponible}"
+    return None
+
+
+def reservar(linea_model, unidades, **padre):
+    """reservar_asignaciones() desde una vista: si falta stock se revierte la transacción con un 400."""
+    try:
+        reservar_asignaciones(linea_model, unidades, **padre)
+    except StockInsuficiente as exc:
+        # Otra reserva se llevó el stock desde la validación
+        raise serializers.ValidationError(str(exc))
+    # bulk_create no dispara post_save
+    cache.invalidar_al_confirmar(cache.EVENTOS, cache.tabla(linea_model))
+
+
+class EventoViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Evento.objects.select_related('tipo_evento').order_by('-created_at')
     serializer_class = EventoSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (EventoMobiliario, TipoEvento)
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return EventoListSerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
-        return super().get_queryset().prefetch_related('mobiliario_asignado__content_object')
+        return con_mobiliario(super().get_queryset(), self.request, self.action)
 
+    @idempotente
     @transaction.atomic
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         mobiliario_data = serializer.validated_data.pop('mobiliario', [])
+        kit = serializer.validated_data.pop('kit', None)
 
-        # 1. Validar stock
+        # Las líneas del kit y las capturadas a mano se suman por artículo
+        unidades = Counter()
+        if kit is not None:
+            unidades.update(kit.expandir(serializer.validated_data['cantidad_personas']))
         for item in mobiliario_data:
-            content_type = ContentType.objects.get_for_id(item['content_type_id'])
-            model_class = content_type.model_class()
-            try:
-                obj = model_class.objects.get(id=item['object_id'])
-                if obj.cantidad < item['cantidad']:
-                    return Response(
-                        {'error': f"No hay suficiente stock para {obj.producto}. Disponible: {obj.cantidad}"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            except model_class.DoesNotExist:
-                return Response(
-                    {'error': f"El item de mobiliario con id {item['object_id']} no existe."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            unidades[(item['content_type_id'], item['object_id'])] += item['cantidad']
 
-        # 2. Crear evento y reducir stock
+        # 1. Validar stock
+        error = validar_stock(unidades)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 2. Crear evento y reservar el mobiliario en bloque
         evento = serializer.save()
-        for item in mobiliario_data:
-            content_type = ContentType.objects.get_for_id(item['content_type_id'])
-            model_class = content_type.model_class()
-            obj = model_class.objects.get(id=item['object_id'])
-            obj.cantidad -= item['cantidad']
-            obj.save()
-
-            EventoMobiliario.objects.create(
-                evento=evento,
-                content_type=content_type,
-                object_id=obj.id,
-                cantidad=item['cantidad']
-            )
+        reservar(EventoMobiliario, unidades, evento=evento)
 
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(detail=True, methods=['post'], url_path='clonar-mobiliario')
+    @idempotente
+    @transaction.atomic
+    def clonar_mobiliario(self, request, pk=None):
+        """
+        Copia al evento las líneas de mobiliario de otro (evento_origen). Si el
+        origen ya terminó se copian las de su historial; con escalar=true las
+        cantidades se ajustan a la cantidad de personas de este evento.
+        """
+        evento = self.get_object()
+        if evento.estado not in ABIERTOS:
+            return Response(
+                {'error': 'Solo se puede asignar mobiliario a eventos por iniciar o en proceso.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            origen = Evento.objects.exclude(pk=evento.pk).get(pk=int(request.data.get('evento_origen')))
+        except (Evento.DoesNotExist, TypeError, ValueError):
+            return Response({'error': 'evento_origen debe ser otro evento existente.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        lineas = origen.mobiliario_asignado.all()
+        if not lineas.exists():
+            lineas = HistorialMobiliario.objects.filter(evento=origen)
+        factor = 1
+        if request.data.get('escalar') and origen.cantidad_personas:
+            factor = evento.cantidad_personas / origen.cantidad_personas
+        unidades = Counter()
+        for content_type_id, object_id, cantidad in lineas.values_list('content_type_id', 'object_id', 'cantidad'):
+            unidades[(content_type_id, object_id)] += math.ceil(cantidad * factor)
+        if not unidades:
+            return Response({'error': 'El evento de origen no tiene mobiliario.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        error = validar_stock(unidades)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        reservar(EventoMobiliario, unidades, evento=evento)
+        return Response(self.get_serializer(self.get_object()).data)
+
     @transaction.atomic
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -253,24 +375,21 @@ class EventoViewSet(viewsets.ModelViewSet):
         if mobiliario_data is not None:
             # 1. Devolver inventario antiguo
             for item_asignado in instance.mobiliario_asignado.all():
-                item_asignado.content_object.cantidad += item_asignado.cantidad
-                item_asignado.content_object.save()
+                item_asignado.content_type.model_class().ajustar_stock(
+                    item_asignado.object_id, cantidad=item_asignado.cantidad
+                )
             instance.mobiliario_asignado.all().delete()
 
             # 2. Validar y asignar nuevo inventario
             for item in mobiliario_data:
                 content_type = ContentType.objects.get_for_id(item['content_type_id'])
                 model_class = content_type.model_class()
-                obj = model_class.objects.get(id=item['object_id'])
-                if obj.cantidad < item['cantidad']:
+                obj = model_class.objects.select_related('bodega').get(id=item['object_id'])
+                if not model_class.ajustar_stock(obj.pk, cantidad=-item['cantidad']):
                     raise serializers.ValidationError(f"No hay suficiente stock para {obj.producto}. Disponible: {obj.cantidad}")
-                
-                obj.cantidad -= item['cantidad']
-                obj.save()
                 EventoMobiliario.objects.create(
                     evento=instance,
-                    content_type=content_type,
-                    object_id=obj.id,
+                    content_object=obj,
                     cantidad=item['cantidad']
                 )
 
@@ -279,7 +398,7 @@ class EventoViewSet(viewsets.ModelViewSet):
 
 
 # Vista para obtener los tipos de contenido de mobiliario
-class ContentTypeViewSet(viewsets.ReadOnlyModelViewSet):
+class ContentTypeViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = ContentType.objects.filter(
         app_label='inventory',
@@ -290,18 +409,26 @@ class ContentTypeViewSet(viewsets.ReadOnlyModelViewSet):
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
         # Devolver tanto el nombre del modelo (para la lógica) como el verbose_name (para mostrar)
-        data = [{'id': ct.id, 'model': ct.model, 'name': ct.model_class()._meta.verbose_name} for ct in queryset]
-        return Response(data)
+        return self.condicional(request, queryset, lambda: Response([
+            {'id': ct.id, 'model': ct.model, 'name': ct.model_class()._meta.verbose_name} for ct in queryset
+        ]))
 
 
-class DegustacionViewSet(viewsets.ModelViewSet):
+class DegustacionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Degustacion.objects.all().order_by('-created_at')
     serializer_class = DegustacionSerializer
     permission_classes = [IsAuthenticated]
+    conditional_dependencies = (DegustacionMobiliario,)
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return DegustacionListSerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
-        return super().get_queryset().prefetch_related('mobiliario_asignado__content_object')
+        return con_mobiliario(super().get_queryset(), self.request, self.action)
 
+    @idempotente
     @transaction.atomic
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -329,14 +456,14 @@ class DegustacionViewSet(viewsets.ModelViewSet):
         for item in mobiliario_data:
             content_type = ContentType.objects.get_for_id(item['content_type_id'])
             model_class = content_type.model_class()
-            obj = model_class.objects.get(id=item['object_id'])
-            obj.cantidad -= item['cantidad']
-            obj.save()
+            obj = model_class.objects.select_related('bodega').get(id=item['object_id'])
+            # Si otra reserva se llevó el stock desde la validación, se revierte todo
+            if not model_class.ajustar_stock(obj.pk, cantidad=-item['cantidad']):
+                raise serializers.ValidationError(f"No hay suficiente stock para {obj.producto}.")
 
             DegustacionMobiliario.objects.create(
                 degustacion=degustacion,
-                content_type=content_type,
-                object_id=obj.id,
+                content_object=obj,
                 cantidad=item['cantidad']
             )
 
@@ -353,23 +480,20 @@ class DegustacionViewSet(viewsets.ModelViewSet):
 
         if mobiliario_data is not None:
             for item_asignado in instance.mobiliario_asignado.all():
-                item_asignado.content_object.cantidad += item_asignado.cantidad
-                item_asignado.content_object.save()
+                item_asignado.content_type.model_class().ajustar_stock(
+                    item_asignado.object_id, cantidad=item_asignado.cantidad
+                )
             instance.mobiliario_asignado.all().delete()
 
             for item in mobiliario_data:
                 content_type = ContentType.objects.get_for_id(item['content_type_id'])
                 model_class = content_type.model_class()
-                obj = model_class.objects.get(id=item['object_id'])
-                if obj.cantidad < item['cantidad']:
+                obj = model_class.objects.select_related('bodega').get(id=item['object_id'])
+                if not model_class.ajustar_stock(obj.pk, cantidad=-item['cantidad']):
                     raise serializers.ValidationError(f"No hay suficiente stock para {obj.producto}. Disponible: {obj.cantidad}")
-                
-                obj.cantidad -= item['cantidad']
-                obj.save()
                 DegustacionMobiliario.objects.create(
                     degustacion=instance,
-                    content_type=content_type,
-                    object_id=obj.id,
+                    content_object=obj,
                     cantidad=item['cantidad']
                 )
 
@@ -377,7 +501,40 @@ class DegustacionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class KitViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Kit.objects.select_related('tipo_evento').prefetch_related('lineas__content_object').order_by('nombre')
+    serializer_class = KitSerializer
+    permission_classes = [IsAuthenticated]
+    # Las líneas solo cambian a través del kit, que se guarda con ellas (updated_at)
+    conditional_dependencies = (TipoEvento,)
+
+    @action(detail=True, methods=['get'])
+    def expandir(self, request, pk=None):
+        """
+        Líneas del kit escaladas para ?cantidad_personas=N, con el formato de
+        `mobiliario` al crear un evento y el stock disponible de cada artículo.
+        """
+        kit = self.get_object()
+        try:
+            personas = int(request.query_params.get('cantidad_personas', ''))
+            if personas <= 0:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'cantidad_personas debe ser un entero positivo.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        articulos = {(linea.content_type_id, linea.object_id): linea.content_object for linea in kit.lineas.all()}
+        mobiliario = []
+        for (content_type_id, object_id), cantidad in kit.expandir(personas).items():
+            articulo = articulos[(content_type_id, object_id)]
+            mobiliario.append({
+                'content_type_id': content_type_id, 'object_id': object_id, 'cantidad': cantidad,
+                'producto': articulo.producto if articulo is not None else None,
+                'disponible': articulo.cantidad if articulo is not None else 0,
+            })
+        return Response({'kit': kit.id, 'cantidad_personas': personas, 'mobiliario': mobiliario})
+
+
+class ProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
@@ -385,7 +542,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description', 'colors']
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Notification.objects.all().order_by('-created_at')
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
@@ -393,6 +550,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
         Notification.objects.filter(is_read=False).update(is_read=True)
+        # update() no dispara signals: se invalida a mano la versión de la tabla
+        cache.invalidar_al_confirmar(cache.tabla(Notification))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['post'])
@@ -405,7 +564,7 @@ class CalendarDataAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        eventos = Evento.objects.all()
+        eventos = Evento.objects.select_related('tipo_evento')
         degustaciones = Degustacion.objects.all()
 
         activities = []
@@ -452,12 +611,36 @@ from reportlab.lib import colors
 import openpyxl
 from openpyxl.styles import Font, Alignment
 
+# Existencia por debajo de la cual un artículo se considera con stock bajo en los reportes
+LOW_STOCK_THRESHOLD = 25
+
+
+def con_punto_reorden(model):
+    """
+    Anota a cada artículo su punto de reorden (stock_minimo), la cantidad de
+    reorden sugerida y si ambos vienen del pronóstico (PuntoReorden).
+    """
+    puntos = PuntoReorden.objects.filter(
+        content_type=ContentType.objects.get_for_model(model), object_id=models.OuterRef('pk')
+    )
+    punto = models.Subquery(puntos.values('punto_reorden')[:1])
+    return model.objects.annotate(
+        stock_minimo=Coalesce(punto, LOW_STOCK_THRESHOLD),
+        cantidad_reorden=models.Subquery(puntos.values('cantidad_reorden')[:1]),
+        pronosticado=models.Exists(puntos),
+    )
+
+
 class LowStockInventoryView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @REPORT_RENDER_SECONDS.timed(report='low_stock')
+    @cache.reporte_cacheado('low_stock', cache.INVENTARIO)
     def get(self, request, *args, **kwargs):
         """
-        Returns a list of all inventory items with stock below 25 units.
+        Returns a list of all inventory items with stock below their reorder
+        point. Items with a forecast (PuntoReorden, see pronosticar_demanda) use
+        its reorder point and quantity; the rest use LOW_STOCK_THRESHOLD.
         """
         # Define the inventory models to check
         inventory_models = [
@@ -468,8 +651,8 @@ class LowStockInventoryView(APIView):
         low_stock_items = []
 
         for model in inventory_models:
-            # Get all items with stock below 25
-            items = model.objects.filter(cantidad__lt=25).select_related('bodega')
+            # Get all items with stock below their threshold
+            items = con_punto_reorden(model).filter(cantidad__lt=models.F('stock_minimo')).select_related('bodega')
 
             for item in items:
                 low_stock_items.append({
@@ -478,7 +661,9 @@ class LowStockInventoryView(APIView):
                     'nombre': item.producto,
                     'descripcion': item.descripcion,
                     'cantidad_actual': item.cantidad,
-                    'stock_minimo': 25,  # Default minimum stock level
+                    'stock_minimo': item.stock_minimo,
+                    'cantidad_reorden': item.cantidad_reorden,
+                    'pronosticado': item.pronosticado,
                     'bodega_id': item.bodega.id if item.bodega else None,
                     'bodega_nombre': item.bodega.nombre if item.bodega else 'No especificada',
                     'tipo': model.__name__.lower()
@@ -493,6 +678,10 @@ class LowStockInventoryView(APIView):
 class MaintenanceReportView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @REPORT_RENDER_SECONDS.timed(report='maintenance')
+    @cache.reporte_cacheado(
+        'maintenance', cache.INVENTARIO, cache.MANTENIMIENTO, partes=lambda request: [timezone.localdate()]
+    )
     def get(self, request, *args, **kwargs):
         """
         Returns a list of all furniture items currently in maintenance or that 
@@ -507,7 +696,7 @@ class MaintenanceReportView(APIView):
         maintenance_items = []
         
         # Get date range for the last 30 days
-        end_date = datetime.now()
+        end_date = timezone.now()
         start_date = end_date - timedelta(days=30)
 
         # 1. Get items currently in maintenance
@@ -539,9 +728,11 @@ class MaintenanceReportView(APIView):
         ).order_by('-created_at')
 
         # Parse notifications to extract maintenance history
+        # Message format: "Han ingresado/salido del mantenimiento {cantidad} {producto}."
+        movimientos = []
         for notification in maintenance_notifications:
             message = notification.message
-            
+
             # Determine if it's entry or exit from maintenance
             if 'ingresado al mantenimiento' in message.lower():
                 estado = 'Ingresó a Mantenimiento'
@@ -549,47 +740,45 @@ class MaintenanceReportView(APIView):
                 estado = 'Salió de Mantenimiento'
             else:
                 continue
-            
-            # Try to extract quantity and product name from message
-            # Message format: "Han ingresado/salido del mantenimiento {cantidad} {producto}."
-            import re
+
             match = re.search(r'(\d+)\s+(.+?)\.$', message)
             if match:
-                cantidad = int(match.group(1))
-                producto = match.group(2).strip()
-                
-                # Find the model that matches this product
-                found_item = None
-                for model in inventory_models:
-                    try:
-                        item = model.objects.filter(producto=producto).first()
-                        if item:
-                            found_item = {
-                                'id': f"notif_{notification.id}",
-                                'categoria': model._meta.verbose_name_plural.title(),
-                                'nombre': producto,
-                                'descripcion': '',
-                                'cantidad_en_mantenimiento': cantidad,
-                                'cantidad_disponible': item.cantidad if item else 0,
-                                'bodega_id': item.bodega.id if item and item.bodega else None,
-                                'bodega_nombre': item.bodega.nombre if item and item.bodega else 'No especificada',
-                                'estado': estado,
-                                'fecha': notification.created_at.isoformat(),
-                                'tipo': model.__name__.lower()
-                            }
-                            break
-                    except Exception as e:
-                        continue
-                
-                if found_item:
-                    # Check if this item is not already in the list (avoid duplicates with current maintenance)
-                    is_duplicate = any(
-                        existing['nombre'] == found_item['nombre'] and 
-                        existing['estado'] == 'En Mantenimiento'
-                        for existing in maintenance_items
-                    )
-                    if not is_duplicate:
-                        maintenance_items.append(found_item)
+                movimientos.append((notification, estado, int(match.group(1)), match.group(2).strip()))
+
+        # Resolve every mentioned product with one query per category instead of one per
+        # notification. The first category (and lowest id) wins, as before.
+        productos_encontrados = {}
+        pendientes = {producto for _, _, _, producto in movimientos}
+        for model in inventory_models:
+            if not pendientes:
+                break
+            items = model.objects.filter(producto__in=pendientes).select_related('bodega').order_by('pk')
+            for item in items:
+                if item.producto in pendientes:
+                    productos_encontrados[item.producto] = (model, item)
+                    pendientes.discard(item.producto)
+
+        en_mantenimiento = {item['nombre'] for item in maintenance_items}
+        for notification, estado, cantidad, producto in movimientos:
+            if producto not in productos_encontrados:
+                continue
+            # Avoid duplicates with items currently in maintenance
+            if producto in en_mantenimiento:
+                continue
+            model, item = productos_encontrados[producto]
+            maintenance_items.append({
+                'id': f"notif_{notification.id}",
+                'categoria': model._meta.verbose_name_plural.title(),
+                'nombre': producto,
+                'descripcion': '',
+                'cantidad_en_mantenimiento': cantidad,
+                'cantidad_disponible': item.cantidad,
+                'bodega_id': item.bodega.id if item.bodega else None,
+                'bodega_nombre': item.bodega.nombre if item.bodega else 'No especificada',
+                'estado': estado,
+                'fecha': notification.created_at.isoformat(),
+                'tipo': model.__name__.lower()
+            })
 
         # Sort by date (most recent first) and then by category
         maintenance_items.sort(key=lambda x: (x.get('fecha', ''), x['categoria']), reverse=True)
@@ -600,6 +789,8 @@ class MaintenanceReportView(APIView):
 class EventAnalysisReportView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @REPORT_RENDER_SECONDS.timed(report='event_analysis')
+    @cache.reporte_cacheado('event_analysis', cache.EVENTOS)
     def get(self, request, *args, **kwargs):
         """
         Returns event analysis grouped by time periods (monthly, quarterly, yearly)
@@ -746,7 +937,7 @@ class InventoryUsageReportView(APIView):
         # 🎯 CASO 2: DESCARGAR UN REPORTE DE EVENTO ESPECÍFICO (reports/download/)
         if report_format and event_id:
             try:
-                evento = Evento.objects.get(pk=event_id)
+                evento = Evento.objects.select_related('tipo_evento').get(pk=event_id)
                 if report_format == 'pdf':
                     # Llama a tu función de generación de PDF
                     return self.generate_pdf(evento)
@@ -777,7 +968,9 @@ class InventoryUsageReportView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             # Si la conversión fue exitosa:
-            events = Evento.objects.filter(fecha_inicio__range=[start_date, end_date])
+            events = Evento.objects.filter(fecha_inicio__range=[start_date, end_date]).select_related(
+                'tipo_evento'
+            ).prefetch_related('mobiliario_asignado')
             
             # Serializa la respuesta para enviarla al frontend
             serializer = EventoSerializer(events, many=True)
@@ -790,6 +983,7 @@ class InventoryUsageReportView(APIView):
             "error": "Parámetros incorrectos. Se requiere 'start_date' y 'end_date' o 'format' y 'event_id'."
         }, status=status.HTTP_400_BAD_REQUEST)
 
+    @REPORT_RENDER_SECONDS.timed(report='event_usage_pdf')
     def generate_pdf(self, evento):
         # 1. PREPARAR EL NOMBRE DEL ARCHIVO SEGURO
         
@@ -834,8 +1028,8 @@ class InventoryUsageReportView(APIView):
         mobiliario_data = [['Producto', 'Descripción', 'Cantidad']]
         for item in evento.mobiliario_asignado.all():
             mobiliario_data.append([
-                item.content_object.producto,
-                item.content_object.descripcion,
+                item.producto,
+                item.descripcion,
                 item.cantidad
             ])
 
@@ -855,6 +1049,7 @@ class InventoryUsageReportView(APIView):
         doc.build(story)
         return response
 
+    @REPORT_RENDER_SECONDS.timed(report='event_usage_excel')
     def generate_excel(self, evento):
         response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
         response['Content-Disposition'] = f'attachment; filename="reporte_evento_{evento.nombre}.xlsx"'
@@ -895,8 +1090,8 @@ class InventoryUsageReportView(APIView):
 
         for item in evento.mobiliario_asignado.all():
             table_header_row += 1
-            ws.cell(row=table_header_row, column=1).value = item.content_object.producto
-            ws.cell(row=table_header_row, column=2).value = item.content_object.descripcion
+            ws.cell(row=table_header_row, column=1).value = item.producto
+            ws.cell(row=table_header_row, column=2).value = item.descripcion
             ws.cell(row=table_header_row, column=3).value = item.cantidad
 
         wb.save(response)
@@ -970,6 +1165,9 @@ class BackupRestoreView(APIView):
         try:
             # 5. Sobrescribir el archivo de base de datos con el archivo de respaldo
             shutil.copyfile(temp_file_path, db_path)
+
+            # El respaldo puede ser anterior a los últimos cambios: se regenera el índice de búsqueda
+            search.reconstruir()
             
             # 6. Responder éxito
             return Response({'status': 'Restauración completada exitosamente. Se recomienda recargar el sistema.'}, 
@@ -990,6 +1188,8 @@ class BackupRestoreView(APIView):
 class WarehouseInventoryReportView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @REPORT_RENDER_SECONDS.timed(report='warehouse')
+    @cache.reporte_cacheado('warehouse', cache.INVENTARIO)
     def get(self, request, *args, **kwargs):
         """
         Returns inventory data grouped by warehouse and category.
@@ -1017,9 +1217,14 @@ class WarehouseInventoryReportView(APIView):
         report_data = []
         total_inventory = 0
         
-        # Calculate total inventory across all warehouses
+        # One grouped query per category gives the totals for every warehouse at once
+        totales_por_bodega = {}
         for category_name, model in inventory_models:
-            total_inventory += model.objects.aggregate(total=models.Sum('cantidad'))['total'] or 0
+            for fila in model.objects.values('bodega').annotate(total=models.Sum('cantidad')).order_by():
+                total = fila['total'] or 0
+                total_inventory += total
+                if fila['bodega'] is not None:
+                    totales_por_bodega.setdefault(fila['bodega'], {})[category_name] = total
         
         # Process each warehouse
         for bodega in bodegas:
@@ -1034,12 +1239,11 @@ class WarehouseInventoryReportView(APIView):
             
             bodega_total = 0
             category_details = []
+            totales = totales_por_bodega.get(bodega.id, {})
             
             # Calculate inventory by category for this warehouse
             for category_name, model in inventory_models:
-                category_total = model.objects.filter(bodega=bodega).aggregate(
-                    total=models.Sum('cantidad')
-                )['total'] or 0
+                category_total = totales.get(category_name, 0)
                 
                 bodega_total += category_total
                 
@@ -1065,4 +1269,399 @@ class WarehouseInventoryReportView(APIView):
         return Response({
             'total_inventory': total_inventory,
             'warehouses': report_data
-        })
\ No newline at end of file
+        })
+
+class UsageAnalyticsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    # Columnas de agrupación y etiquetas que acompañan a cada dimensión
+    DIMENSIONS = {
+        'item': (['content_type', 'object_id'], {'nombre_producto': models.Max('producto'), 'nombre_categoria': models.Max('categoria')}),
+        'category': (['categoria'], {}),
+        'bodega': (['bodega'], {'nombre_bodega': models.Max('bodega_nombre')}),
+        'tipo_evento': (['tipo_evento'], {'nombre_tipo_evento': models.Max('tipo_evento__nombre')}),
+        'period': (['periodo'], {}),
+    }
+    PERIODS = {'monthly': 'month', 'quarterly': 'quarter', 'yearly': 'year'}
+    ESTADOS = ('Finalizado', 'Cancelado', 'all')
+
+    @REPORT_RENDER_SECONDS.timed(report='usage_analytics')
+    def get(self, request, *args, **kwargs):
+        """
+        Returns furniture usage from the allocation history, aggregated in the
+        database by any combination of item, category, bodega, tipo_evento and
+        period (?group_by=category,period&period=monthly).
+
+        Optional filters: start_date / end_date (YYYY-MM-DD), estado
+        (Finalizado by default, Cancelado or all), origen (evento or
+        degustacion) and limit.
+        """
+        group_by = [dim.strip() for dim in request.query_params.get('group_by', 'item').split(',') if dim.strip()]
+        invalid = [dim for dim in group_by if dim not in self.DIMENSIONS]
+        if not group_by or invalid:
+            return Response(
+                {'error': f"group_by inválido. Opciones: {', '.join(self.DIMENSIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        period_type = request.query_params.get('period', 'monthly')
+        if period_type not in self.PERIODS:
+            return Response({'error': 'period debe ser monthly, quarterly o yearly.'}, status=status.HTTP_400_BAD_REQUEST)
+        estado = request.query_params.get('estado', 'Finalizado')
+        if estado not in self.ESTADOS:
+            return Response({'error': 'estado debe ser Finalizado, Cancelado o all.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        historial = HistorialMobiliario.objects.all()
+        if estado != 'all':
+            historial = historial.filter(estado=estado)
+        origen = request.query_params.get('origen')
+        if origen:
+            historial = historial.filter(origen=origen)
+        try:
+            for param, lookup in (('start_date', 'fecha__gte'), ('end_date', 'fecha__lte')):
+                if request.query_params.get(param):
+                    historial = historial.filter(**{lookup: datetime.strptime(request.query_params[param], '%Y-%m-%d').date()})
+            limit = int(request.query_params['limit']) if request.query_params.get('limit') else None
+        except ValueError:
+            return Response(
+                {'error': 'Formato inválido. Usa AAAA-MM-DD para las fechas y un entero para limit.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if 'period' in group_by:
+            historial = historial.annotate(periodo=Trunc('fecha', self.PERIODS[period_type]))
+        columnas, etiquetas = [], {}
+        for dim in group_by:
+            columnas += self.DIMENSIONS[dim][0]
+            etiquetas.update(self.DIMENSIONS[dim][1])
+
+        filas = historial.values(*columnas).annotate(
+            total_unidades=models.Sum('cantidad'),
+            lineas=models.Count('id'),
+            eventos=models.Count('evento', distinct=True),
+            degustaciones=models.Count('degustacion', distinct=True),
+            **etiquetas
+        )
+        if group_by == ['period']:
+            filas = filas.order_by('periodo')
+        else:
+            filas = filas.order_by('-total_unidades', *columnas)
+        if limit is not None:
+            filas = filas[:max(0, limit)]
+
+        return Response({
+            'group_by': group_by,
+            'period_type': period_type if 'period' in group_by else None,
+            'estado': estado,
+            'total_unidades': historial.aggregate(total=models.Sum('cantidad'))['total'] or 0,
+            'results': list(filas),
+        })
+
+
+class InventorySearchView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_PAGE_SIZE = 100
+
+    def get(self, request, *args, **kwargs):
+        """
+        Accent-insensitive search across the 11 inventory categories
+        (?q=manteleria&page=1&page_size=20), ranked by relevance. Every word
+        is matched as a prefix against producto, descripcion, category and
+        bodega.
+        """
+        if not search.disponible():
+            return Response({'error': 'La búsqueda solo está configurada para SQLite.'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+        query = request.query_params.get('q', '').strip()
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = max(1, min(int(request.query_params.get('page_size', 20)), self.MAX_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'page y page_size deben ser enteros.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        count, results = search.buscar(query, limite=page_size, desplazamiento=(page - 1) * page_size)
+        return Response({
+            'query': query,
+            'count': count,
+            'page': page,
+            'page_size': page_size,
+            'results': results,
+        })
+
+
+class AutocompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_LIMIT = 50
+
+    def get(self, request, *args, **kwargs):
+        """
+        Prefix suggestions for the event and tasting forms
+        (?q=sil&tipo=inventario&limit=10). tipo accepts clientes, productos
+        and/or inventario separated by commas (all by default).
+        """
+        tipos = [tipo.strip() for tipo in request.query_params.get('tipo', ','.join(autocomplete.FUENTES)).split(',') if tipo.strip()]
+        if not tipos or any(tipo not in autocomplete.FUENTES for tipo in tipos):
+            return Response({'error': f"tipo inválido. Opciones: {', '.join(autocomplete.FUENTES)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), self.MAX_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit debe ser un entero.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(autocomplete.sugerencias(request.query_params.get('q', ''), tipos, limit))
+
+
+class InventoryOverviewView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_ITEMS = 500
+
+    # (ruta del endpoint de la categoría, modelo, serializer)
+    CATEGORIES = [
+        ('mantelerias', Manteleria, ManteleriaSerializer),
+        ('cubiertos', Cubierto, CubiertoSerializer),
+        ('lozas', Loza, LozaSerializer),
+        ('cristalerias', Cristaleria, CristaleriaSerializer),
+        ('sillas', Silla, SillaSerializer),
+        ('mesas', Mesa, MesaSerializer),
+        ('salas-lounge', SalaLounge, SalaLoungeSerializer),
+        ('periqueras', Periquera, PeriqueraSerializer),
+        ('carpas', Carpa, CarpaSerializer),
+        ('pistas-tarimas', PistaTarima, PistaTarimaSerializer),
+        ('extras', Extra, ExtraSerializer),
+    ]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Returns per-category item counts, stock totals, maintenance totals and
+        low-stock counts for the 11 inventory categories in one response.
+
+        With ?items=N each category also includes its N most recent items
+        (same shape as the category endpoints); ?items=all includes them all.
+        The response is cached until the next inventory write.
+        """
+        items = request.query_params.get('items', '0')
+        if items != 'all':
+            try:
+                items = max(0, min(int(items), self.MAX_ITEMS))
+            except ValueError:
+                return Response({'error': "items debe ser un entero o 'all'."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(cache.obtener(cache.INVENTARIO, ('overview', items), lambda: self.build(items)))
+
+    def build(self, items):
+        # Una sola consulta: UNION ALL de un agregado por categoría
+        consultas = [
+            con_punto_reorden(model).annotate(modelo=Value(model._meta.model_name, output_field=models.CharField()))
+            .values('modelo')
+            .annotate(
+                items=models.Count('id'),
+                bajo_stock=models.Count('id', filter=models.Q(cantidad__lt=models.F('stock_minimo'))),
+                total_cantidad=Coalesce(models.Sum('cantidad'), 0),
+                total_mantenimiento=Coalesce(models.Sum('cantidad_en_mantenimiento'), 0),
+            )
+            .order_by()
+            for _, model, _ in self.CATEGORIES
+        ]
+        agregados = {fila['modelo']: fila for fila in consultas[0].union(*consultas[1:], all=True)}
+
+        categorias = []
+        totales = {'items': 0, 'cantidad': 0, 'cantidad_en_mantenimiento': 0, 'bajo_stock': 0}
+        for ruta, model, serializer_class in self.CATEGORIES:
+            fila = agregados.get(model._meta.model_name, {})
+            categoria = {
+                'modelo': model._meta.model_name,
+                'categoria': str(model._meta.verbose_name_plural),
+                'endpoint': ruta,
+            }
+            categoria.update({
+                'items': fila.get('items', 0),
+                'cantidad': fila.get('total_cantidad', 0),
+                'cantidad_en_mantenimiento': fila.get('total_mantenimiento', 0),
+                'bajo_stock': fila.get('bajo_stock', 0),
+            })
+            for campo in totales:
+                totales[campo] += categoria[campo]
+            if items:
+                articulos = model.objects.select_related('bodega').order_by('-created_at')
+                if items != 'all':
+                    articulos = articulos[:items]
+                categoria['articulos'] = serializer_class(articulos, many=True).data
+            categorias.append(categoria)
+
+        return {
+            'low_stock_threshold': LOW_STOCK_THRESHOLD,
+            'totales': totales,
+            'categorias': categorias,
+        }
+
+
+class InventoryProjectionView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_HORIZON = 730
+
+    @REPORT_RENDER_SECONDS.timed(report='projection')
+    def get(self, request, *args, **kwargs):
+        """
+        Returns the projected available stock of each item per day, from today
+        over ?horizon=N days (90 by default, up to 730). Units allocated to open
+        events and degustaciones are counted as in use from their start date
+        until the day they end, and as available again afterwards.
+
+        Optional filters: category (endpoint name, e.g. sillas) and id (needs
+        category); minimum (LOW_STOCK_THRESHOLD by default) marks the days with
+        less available stock as shortages; shortages_only=true drops the items
+        that never go below it.
+        """
+        categorias = {ruta: model for ruta, model, _ in InventoryOverviewView.CATEGORIES}
+        categoria = request.query_params.get('category')
+        if categoria and categoria not in categorias:
+            return Response(
+                {'error': f"category inválida. Opciones: {', '.join(categorias)}."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            horizonte = int(request.query_params.get('horizon', 90))
+            minimo = int(request.query_params.get('minimum', LOW_STOCK_THRESHOLD))
+            item_id = int(request.query_params['id']) if request.query_params.get('id') else None
+        except ValueError:
+            return Response({'error': 'horizon, minimum e id deben ser enteros.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= horizonte <= self.MAX_HORIZON:
+            return Response(
+                {'error': f'horizon debe estar entre 1 y {self.MAX_HORIZON}.'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if item_id is not None and not categoria:
+            return Response({'error': 'id requiere category.'}, status=status.HTTP_400_BAD_REQUEST)
+        solo_faltantes = request.query_params.get('shortages_only', '').lower() in ('1', 'true')
+
+        inicio = transiciones.hoy()
+        modelos = [categorias[categoria]] if categoria else None
+        datos = cache.obtener_reporte(
+            'projection', (cache.INVENTARIO, cache.EVENTOS),
+            [inicio, categoria, item_id, horizonte, minimo, solo_faltantes],
+            lambda: self.build(modelos, item_id, inicio, horizonte, minimo, solo_faltantes),
+        )
+        if item_id is not None and not datos['items']:
+            raise Http404
+        return Response(datos)
+
+    def build(self, modelos, item_id, inicio, horizonte, minimo, solo_faltantes):
+        items = proyeccion.proyectar(modelos, item_id, inicio=inicio, horizonte=horizonte, minimo=minimo)
+        con_faltantes = sum(1 for item in items if item['shortage_days'])
+        if solo_faltantes:
+            items = [item for item in items if item['shortage_days']]
+        return {
+            'start_date': inicio,
+            'horizon': horizonte,
+            'minimum': minimo,
+            'engine': proyeccion.motor(),
+            'total_items': len(items),
+            'items_with_shortage': con_faltantes,
+            'items': items,
+        }
+
+
+class FeasibilityCheckView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @REPORT_RENDER_SECONDS.timed(report='feasibility')
+    def post(self, request, *args, **kwargs):
+        """
+        Checks, without writing or locking anything, whether several candidate
+        date windows could be served with a furniture list. The body has
+        `candidatos` (fecha_inicio, hora_inicio, optional duracion_horas and
+        mobiliario) and an optional common `mobiliario`; lines use the same
+        format as event creation (content_type_id, object_id, cantidad).
+
+        Each candidate is evaluated on its own against the reservation index
+        (the same daily availability as items/projection/): `faltante` is how
+        many units are missing in that window, and `reservable` says whether
+        the current stock would let the event be created now.
+        """
+        serializer = FactibilidadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+
+        hoy = transiciones.hoy()
+        ventanas = []
+        for candidato in datos['candidatos']:
+            inicio = datetime.combine(candidato['fecha_inicio'], candidato['hora_inicio'])
+            horas = candidato.get('duracion_horas', settings.EVENT_DURATION_HOURS)
+            ventanas.append((candidato['fecha_inicio'], (inicio + timedelta(hours=horas)).date()))
+        if min(desde for desde, _ in ventanas) < hoy:
+            return Response(
+                {'error': 'Las fechas candidatas no pueden ser anteriores a hoy.'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        horizonte = (max(hasta for _, hasta in ventanas) - hoy).days + 1
+        if horizonte > InventoryProjectionView.MAX_HORIZON:
+            return Response(
+                {'error': f'Las fechas candidatas deben estar dentro de {InventoryProjectionView.MAX_HORIZON} días.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        pedidos = []
+        for candidato in datos['candidatos']:
+            pedido = Counter()
+            for linea in candidato.get('mobiliario', datos.get('mobiliario', [])):
+                pedido[(linea['content_type_id'], linea['object_id'])] += linea['cantidad']
+            pedidos.append(pedido)
+
+        # Cada línea es una consulta logarítmica al índice de reservas
+        indice = conflictos.indice()
+        resultados = []
+        for candidato, (desde, hasta), pedido in zip(datos['candidatos'], ventanas, pedidos):
+            lineas = []
+            for (content_type_id, object_id), cantidad in pedido.items():
+                articulo = indice.articulos.get((content_type_id, object_id))
+                if articulo is None:
+                    lineas.append({
+                        'content_type_id': content_type_id, 'object_id': object_id, 'producto': None,
+                        'cantidad': cantidad, 'disponible': 0, 'stock_actual': 0, 'faltante': cantidad,
+                        'reservable': False, 'error': 'El artículo no existe.',
+                    })
+                    continue
+                disponible = indice.disponible((content_type_id, object_id), desde, hasta)
+                lineas.append({
+                    'content_type_id': content_type_id, 'object_id': object_id, 'producto': articulo['producto'],
+                    'cantidad': cantidad, 'disponible': disponible, 'stock_actual': articulo['cantidad'],
+                    'faltante': max(0, cantidad - disponible), 'reservable': articulo['cantidad'] >= cantidad,
+                })
+            resultados.append({
+                'fecha_inicio': desde,
+                'hora_inicio': candidato['hora_inicio'],
+                'fecha_fin': hasta,
+                'feasible': all(linea['faltante'] == 0 for linea in lineas),
+                'bookable': all(linea['reservable'] for linea in lineas),
+                'lineas': lineas,
+            })
+        return Response({'start_date': hoy, 'candidates': resultados})
+
+
+class ReservationConflictsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @REPORT_RENDER_SECONDS.timed(report='conflicts')
+    def get(self, request, *args, **kwargs):
+        """
+        Lists every (item, day) pair where the open events and degustaciones
+        active that day reserve more units than the item has (available +
+        reserved), with the reservations involved.
+
+        Optional filters: start_date / end_date (YYYY-MM-DD, from today by
+        default) and category (endpoint name, e.g. sillas).
+        """
+        categorias = {ruta: model for ruta, model, _ in InventoryOverviewView.CATEGORIES}
+        categoria = request.query_params.get('category')
+        if categoria and categoria not in categorias:
+            return Response(
+                {'error': f"category inválida. Opciones: {', '.join(categorias)}."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            fechas = {
+                param: datetime.strptime(request.query_params[param], '%Y-%m-%d').date()
+                if request.query_params.get(param) else None
+                for param in ('start_date', 'end_date')
+            }
+        except ValueError:
+            return Response(
+                {'error': 'Formato de fecha inválido. Usa AAAA-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        content_type_id = ContentType.objects.get_for_model(categorias[categoria]).id if categoria else None
+        resultado = conflictos.indice().conflictos(fechas['start_date'], fechas['end_date'], content_type_id)
+        return Response({'total': len(resultado), 'conflicts': resultado})
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Post, Profile
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from inventory.serializers import DynamicFieldsMixin
 
 class RegisterSerializer(serializers.ModelSerializer):
     class Meta:
@@ -22,7 +23,7 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['username'] = user.username
         return token
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Campo para leer el rol. Es de solo lectura.
     rol = serializers.CharField(source='profile.rol', read_only=True)
     # Campo para escribir el rol. No se mostrará en las respuestas de la API.
@@ -1,3 +1,27 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from backend.testing import QueryBudgetMixin
+from .models import Post, Profile
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('presupuesto', password='x')
+        Profile.objects.create(user=self.user, rol='admin')
+        self.client.force_authenticate(self.user)
+        self.contador = 0
+
+    def test_user_list(self):
+        def sembrar(n):
+            for _ in range(n):
+                self.contador += 1
+                user = User.objects.create_user(f'usuario{self.contador}', password='x')
+                Profile.objects.create(user=user, rol='Encargado')
+        self.assertConsultasConstantes('/api/users/', sembrar)
+
+    def test_post_list(self):
+        def sembrar(n):
+            for _ in range(n):
+                Post.objects.create(author=self.user, title='Aviso', content='Contenido')
+        self.assertConsultasConstantes('/api/posts/', sembrar)
@@ -1,14 +1,52 @@
 import api from '../api';
 
+// crypto.randomUUID solo existe en contextos seguros (HTTPS o localhost); servida por
+// HTTP en la red local se arma un UUID v4 con crypto.getRandomValues
+const nuevoUUID = () => {
+  if (typeof crypto.randomUUID === 'function') return crypto.randomUUID();
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  bytes[6] = (bytes[6] & 0x0f) | 0x40;
+  bytes[8] = (bytes[8] & 0x3f) | 0x80;
+  const hex = Array.from(bytes, (byte) => byte.toString(16).padStart(2, '0')).join('');
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+};
+
+// Las altas que reservan mobiliario se reintentan ante fallas de red con la misma
+// Idempotency-Key: el servidor solo hace la reserva una vez y repite la respuesta
+const postIdempotente = async (url, data, intentos = 3) => {
+  const headers = { 'Idempotency-Key': nuevoUUID() };
+  for (let intento = 1; ; intento++) {
+    try {
+      return await api.post(url, data, { headers });
+    } catch (error) {
+      if (error.response || intento >= intentos) throw error;
+      await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** (intento - 1)));
+    }
+  }
+};
+
 // --- Eventos --- //
 export const getEventos = () => api.get('/api/inventory/eventos/');
-export const createEvento = (evento) => api.post('/api/inventory/eventos/', evento);
+export const getEvento = (id) => api.get(`/api/inventory/eventos/${id}/`);
+export const createEvento = (evento) => postIdempotente('/api/inventory/eventos/', evento);
 export const updateEvento = (id, evento) => api.put(`/api/inventory/eventos/${id}/`, evento);
 export const deleteEvento = (id) => api.delete(`/api/inventory/eventos/${id}/`);
+// Copia el mobiliario de otro evento; con escalar lo ajusta a la cantidad de personas
+export const clonarMobiliarioEvento = (id, eventoOrigen, escalar = false) =>
+  postIdempotente(`/api/inventory/eventos/${id}/clonar-mobiliario/`, { evento_origen: eventoOrigen, escalar });
+
+// --- Kits de mobiliario --- //
+export const getKits = () => api.get('/api/inventory/kits/');
+export const createKit = (kit) => api.post('/api/inventory/kits/', kit);
+export const updateKit = (id, kit) => api.put(`/api/inventory/kits/${id}/`, kit);
+export const deleteKit = (id) => api.delete(`/api/inventory/kits/${id}/`);
+export const expandirKit = (id, cantidadPersonas) =>
+  api.get(`/api/inventory/kits/${id}/expandir/`, { params: { cantidad_personas: cantidadPersonas } });
 
 // --- Degustaciones --- //
 export const getDegustaciones = () => api.get('/api/inventory/degustaciones/');
-export const createDegustacion = (degustacion) => api.post('/api/inventory/degustaciones/', degustacion);
+export const getDegustacion = (id) => api.get(`/api/inventory/degustaciones/${id}/`);
+export const createDegustacion = (degustacion) => postIdempotente('/api/inventory/degustaciones/', degustacion);
 export const updateDegustacion = (id, degustacion) => api.put(`/api/inventory/degustaciones/${id}/`, degustacion);
 export const deleteDegustacion = (id) => api.delete(`/api/inventory/degustaciones/${id}/`);
 
@@ -34,22 +72,20 @@ const mobiliarioEndpoints = {
   'Extras': { url: '/api/inventory/extras/', model: 'extra' },
 };
 
+export const getInventoryOverview = (items = 0) => api.get('/api/inventory/items/overview/', { params: { items } });
+
+// Un solo request (resumen con todos los artículos) en lugar de uno por categoría
 export const getAllMobiliario = async () => {
-  const categories = Object.keys(mobiliarioEndpoints);
-  const requests = categories.map(cat => api.get(mobiliarioEndpoints[cat].url));
-  const responses = await Promise.all(requests);
-
-  const allMobiliario = responses.flatMap((response, index) => {
-    const categoryName = categories[index];
-    const modelName = mobiliarioEndpoints[categoryName].model;
-    return response.data.map(item => ({ 
-      ...item, 
-      categoryName, // For display in the UI
-      modelName     // For logic (matching with content type)
-    }));
-  });
+  const { data } = await getInventoryOverview('all');
+  const categoryNames = Object.fromEntries(
+    Object.entries(mobiliarioEndpoints).map(([categoryName, { model }]) => [model, categoryName])
+  );
 
-  return allMobiliario;
+  return data.categorias.flatMap(categoria => categoria.articulos.map(item => ({
+    ...item,
+    categoryName: categoryNames[categoria.modelo], // For display in the UI
+    modelName: categoria.modelo                    // For logic (matching with content type)
+  })));
 };
 
 // --- Content Types --- //
@@ -77,6 +113,12 @@ export const updateProduct = (id, productData) => {
 export const deleteProduct = (id) => api.delete(`/api/inventory/products/${id}/`);
 
 // --- Mantenimiento --- //
+// Envía la versión leída en If-Match: si otra persona modificó el artículo, el servidor responde 412
+export const updateInventoryItem = (itemType, itemId, data, version) => {
+  const headers = version === undefined || version === null ? {} : { 'If-Match': `"${version}"` };
+  return api.put(`/api/inventory/${itemType}/${itemId}/`, data, { headers });
+};
+
 export const enviarAMantenimiento = (itemType, itemId, cantidad) => {
   const url = `/api/inventory/${itemType}/${itemId}/mantenimiento/`;
   return api.post(url, { cantidad });
@@ -86,3 +128,19 @@ export const reintegrarDeMantenimiento = (itemType, itemId, cantidad) => {
   const url = `/api/inventory/${itemType}/${itemId}/reintegrar/`;
   return api.post(url, { cantidad });
 };
+
+export const registrarExistencias = (itemType, itemId, existencias) => {
+  const url = `/api/inventory/${itemType}/${itemId}/existencias/`;
+  return api.post(url, { existencias });
+};
+
+// --- Búsqueda y autocompletado --- //
+export const searchInventory = (q, page = 1, pageSize = 20) =>
+  api.get('/api/inventory/items/search/', { params: { q, page, page_size: pageSize } });
+
+export const autocomplete = (q, tipo = 'clientes,productos,inventario', limit = 10) =>
+  api.get('/api/inventory/autocomplete/', { params: { q, tipo, limit } });
+
+// --- Lotes --- //
+// Varias lecturas en un solo request: [{ id, url }] -> { responses: [{ id, status, body }] }
+export const batchGet = (requests) => api.post('/api/batch/', { requests });
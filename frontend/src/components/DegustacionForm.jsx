@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate, useParams } from 'react-router-dom';
-import { createDegustacion, updateDegustacion, getDegustaciones, getAllMobiliario, getContentTypes } from '../api/inventory';
+import { createDegustacion, updateDegustacion, getDegustacion, getAllMobiliario, getContentTypes } from '../api/inventory';
 import { toast } from 'react-hot-toast';
 import { FiSave, FiX, FiCalendar, FiClock, FiUser, FiUsers, FiPackage, FiPlus, FiTrash2, FiEdit2, FiInfo, FiTag } from 'react-icons/fi';
 import '../styles/Degustaciones.css';
@@ -143,8 +143,7 @@ function DegustacionForm() {
         setContentTypes(contentTypesRes.data);
 
         if (id) {
-          const { data: degustacionesData } = await getDegustaciones();
-          const currentDegustacion = degustacionesData.find(d => d.id === parseInt(id));
+          const { data: currentDegustacion } = await getDegustacion(id);
           if (currentDegustacion) {
             console.log('Degustación cargada:', currentDegustacion);
             
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate, useParams } from 'react-router-dom';
-import { createEvento, updateEvento, getEventos, getTiposEvento, getAllMobiliario, getContentTypes } from '../api/inventory';
+import { createEvento, updateEvento, getEvento, getTiposEvento, getAllMobiliario, getContentTypes } from '../api/inventory';
 import { toast } from 'react-hot-toast';
 import '../styles/EventoForm.css';
 
@@ -147,8 +147,7 @@ function EventoForm() {
         setContentTypes(contentTypesRes.data);
 
         if (id) {
-          const { data: eventosData } = await getEventos();
-          const currentEvento = eventosData.find(e => e.id === parseInt(id));
+          const { data: currentEvento } = await getEvento(id);
           if (currentEvento) {
             setEvento({
               ...currentEvento,
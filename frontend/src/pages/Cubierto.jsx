@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { FiPlus, FiEdit2, FiTrash2, FiTool, FiX } from 'react-icons/fi';
-import { getBodegas, enviarAMantenimiento, reintegrarDeMantenimiento } from '../api/inventory';
+import { getBodegas, enviarAMantenimiento, reintegrarDeMantenimiento, updateInventoryItem } from '../api/inventory';
 import '../styles/Cubierto.css';
 import api from '../api';
 
@@ -11,6 +11,7 @@ const Cubierto = () => {
   const [formData, setFormData] = useState({ producto: '', descripcion: '', cantidad: '', bodega: '' });
   const [isEditing, setIsEditing] = useState(false);
   const [currentItemId, setCurrentItemId] = useState(null);
+  const [currentItemVersion, setCurrentItemVersion] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
   const [mantenimientoModal, setMantenimientoModal] = useState({ isOpen: false, item: null, cantidad: 0 });
   const [formModal, setFormModal] = useState({ isOpen: false, title: '' });
@@ -47,7 +48,7 @@ const Cubierto = () => {
     const data = { ...formData, bodega: formData.bodega || null };
     try {
       if (isEditing) {
-        await api.put(`/api/inventory/cubiertos/${currentItemId}/`, data);
+        await updateInventoryItem('cubiertos', currentItemId, data, currentItemVersion);
       } else {
         await api.post('/api/inventory/cubiertos/', data);
       }
@@ -56,13 +57,19 @@ const Cubierto = () => {
       fetchItems();
     } catch (error) {
       console.error('Error saving item:', error);
-      alert('Ocurrió un error al guardar. Por favor, inténtalo de nuevo.');
+      if (error.response?.status === 412) {
+        alert(error.response.data.detail);
+        fetchItems();
+      } else {
+        alert('Ocurrió un error al guardar. Por favor, inténtalo de nuevo.');
+      }
     }
   };
 
   const handleEdit = (item) => {
     setIsEditing(true);
     setCurrentItemId(item.id);
+    setCurrentItemVersion(item.version);
     setFormData({ producto: item.producto, descripcion: item.descripcion, cantidad: item.cantidad, bodega: item.bodega || '' });
     setFormModal({ isOpen: true, title: 'Editar Cubierto' });
   };